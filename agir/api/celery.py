@@ -1,8 +1,11 @@
 import logging
 
 import os
+import redis
 from celery import Celery
-
+from celery.signals import task_prerun, task_postrun
+from prometheus_client import REGISTRY
+from prometheus_client.core import GaugeMetricFamily
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "agir.api.settings")
 
@@ -19,6 +22,118 @@ app.autodiscover_tasks()
 logger = logging.getLogger("agir.api.celery")
 
 
+@task_prerun.connect
+def reset_database_routing(task, **kwargs):
+    # chaque tâche repart d'un contexte de routage vierge, sauf si elle est exécutée
+    # directement dans le contexte de l'appelant
+    if not task.request.is_eager:
+        from agir.api.db_routers import reset_state
+
+        reset_state()
+
+
+# les connexions persistantes sont fermées après un fork et entre deux tâches si elles
+# sont trop anciennes ou en erreur par l'intégration Django de Celery ; on vérifie en
+# plus celles qui sont restées inactives trop longtemps entre deux tâches
+@task_prerun.connect
+def check_database_connections(task, **kwargs):
+    if not task.request.is_eager:
+        from agir.api.db_connections import check_idle_connections
+
+        check_idle_connections()
+
+
+@task_postrun.connect
+def release_database_connections(task, **kwargs):
+    if not task.request.is_eager:
+        from agir.api.db_connections import mark_connections_idle
+
+        mark_connections_idle()
+
+
+@task_prerun.connect
+def start_task_measurement(task, **kwargs):
+    # les tâches exécutées directement sont comptées avec la vue qui les appelle
+    from django.conf import settings
+
+    if settings.PERFORMANCE_INSTRUMENTATION and not task.request.is_eager:
+        from agir.lib.instrumentation import KIND_TASK, Measurement
+
+        Measurement(KIND_TASK).begin()
+
+
+@task_postrun.connect
+def record_task_measurement(task, **kwargs):
+    from agir.lib.instrumentation import KIND_TASK, get_current_measurement
+
+    measurement = get_current_measurement()
+    if (
+        measurement is not None
+        and measurement.kind == KIND_TASK
+        and not task.request.is_eager
+    ):
+        measurement.end()
+        measurement.record(task.name)
+
+
+class QueueLengthCollector:
+    """Exporte vers Prometheus le nombre de tâches en attente dans chaque file Celery
+
+    Le transport Redis de kombu stocke chaque file dans une liste, avec une liste
+    supplémentaire par niveau de priorité non nul.
+    """
+
+    PRIORITY_SEPARATOR = "\x06\x16"
+    PRIORITY_STEPS = [3, 6, 9]
+
+    def get_queue_names(self):
+        return sorted(
+            {app.conf.task_default_queue}
+            | {route["queue"] for route in app.conf.task_routes.values()}
+        )
+
+    def get_metric(self):
+        return GaugeMetricFamily(
+            "agir_celery_queue_length",
+            "Nombre de tâches en attente dans la file Celery",
+            labels=["queue"],
+        )
+
+    def describe(self):
+        # évite que prometheus_client n'appelle `collect` (et donc Redis) à l'enregistrement
+        yield self.get_metric()
+
+    def collect(self):
+        queues = self.get_queue_names()
+        keys_per_queue = len(self.PRIORITY_STEPS) + 1
+
+        try:
+            pipeline = redis.StrictRedis.from_url(app.conf.broker_url).pipeline(
+                transaction=False
+            )
+            for queue in queues:
+                pipeline.llen(queue)
+                for step in self.PRIORITY_STEPS:
+                    pipeline.llen(f"{queue}{self.PRIORITY_SEPARATOR}{step}")
+            lengths = pipeline.execute()
+        except redis.RedisError:
+            logger.warning(
+                "Impossible de lire la longueur des files Celery", exc_info=True
+            )
+            return
+
+        metric = self.get_metric()
+        for i, queue in enumerate(queues):
+            metric.add_metric(
+                [queue], sum(lengths[i * keys_per_queue : (i + 1) * keys_per_queue])
+            )
+
+        yield metric
+
+
+REGISTRY.register(QueueLengthCollector())
+
+
 _memory_tracker = None
 
 
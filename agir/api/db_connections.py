@@ -0,0 +1,41 @@
+"""Vérification des connexions persistantes à la base de données
+
+Avec `CONN_MAX_AGE`, les connexions sont réutilisées d'une requête (ou d'une tâche) à
+l'autre. Une connexion restée inutilisée un moment a pu être coupée par le serveur, un
+pare-feu ou le pooler : avant de la réutiliser, on vérifie qu'elle fonctionne toujours si
+elle est inactive depuis plus de `DATABASE_HEALTH_CHECK_DELAY` secondes, et on la ferme
+sinon, pour que Django en ouvre une nouvelle à la première requête SQL.
+
+Les connexions récemment utilisées ne sont pas vérifiées, pour ne pas ajouter un
+aller-retour avec le serveur à chaque requête.
+"""
+from time import monotonic
+
+from django.conf import settings
+from django.db import connections
+
+
+def mark_connections_idle(**kwargs):
+    """Note l'heure à laquelle les connexions ouvertes ont cessé d'être utilisées"""
+    now = monotonic()
+    for conn in connections.all():
+        if conn.connection is not None:
+            conn.idle_since = now
+
+
+def check_idle_connections(**kwargs):
+    """Ferme les connexions inactives depuis longtemps qui ne fonctionnent plus"""
+    now = monotonic()
+    for conn in connections.all():
+        if conn.connection is None or conn.in_atomic_block:
+            continue
+
+        idle_since = getattr(conn, "idle_since", None)
+        if (
+            idle_since is not None
+            and now - idle_since > settings.DATABASE_HEALTH_CHECK_DELAY
+            and not conn.is_usable()
+        ):
+            conn.close()
+
+        conn.idle_since = None
@@ -0,0 +1,111 @@
+"""Routage des lectures vers les réplicas de la base de données
+
+Les lectures ne sont envoyées sur une réplica que dans le contexte d'une vue ou d'une
+tâche qui le demande explicitement (`read_from_replica`, `use_replica`), et jamais après
+une écriture : dès qu'une écriture a lieu, les lectures suivantes du même contexte se
+font sur la base principale. Le middleware `ReplicaPinningMiddleware` prolonge ce
+comportement pendant quelques secondes pour les requêtes suivantes du même client, le
+temps que la réplication rattrape son retard.
+
+Les sessions sont toujours lues et écrites sur la base principale, et leur enregistrement
+(qui a lieu à la fin de la plupart des requêtes d'un client connecté) n'est pas compté
+comme une écriture : il épinglerait sinon chaque client à la base principale.
+
+Les réplicas sont les connexions dont l'alias commence par `replica`.
+"""
+import random
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_PREFIX = "replica"
+# applications dont les modèles ne sont jamais lus sur une réplica, et dont les écritures
+# ne comptent pas pour l'épinglage
+PRIMARY_ONLY_APP_LABELS = {"sessions"}
+
+_state = threading.local()
+
+
+def get_replicas():
+    return [alias for alias in settings.DATABASES if alias.startswith(REPLICA_PREFIX)]
+
+
+def reset_state(pinned=False):
+    """Réinitialise le contexte de routage au début d'une requête ou d'une tâche
+
+    :param pinned: si les lectures doivent se faire sur la base principale, parce que le
+      client vient d'écrire
+    """
+    _state.use_replica = False
+    _state.pinned = pinned
+    _state.has_written = False
+
+
+def has_written():
+    return getattr(_state, "has_written", False)
+
+
+def get_read_database():
+    """Renvoie l'alias de la base sur laquelle lire dans le contexte actuel
+
+    Utile pour les querysets évalués hors du contexte de la vue, par exemple dans une
+    `StreamingHttpResponse`.
+    """
+    replicas = get_replicas()
+    if (
+        replicas
+        and getattr(_state, "use_replica", False)
+        and not getattr(_state, "pinned", False)
+        and not has_written()
+    ):
+        return random.choice(replicas)
+    return DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def use_replica():
+    previous = getattr(_state, "use_replica", False)
+    _state.use_replica = True
+    try:
+        yield
+    finally:
+        _state.use_replica = previous
+
+
+def read_from_replica(func):
+    """Décorateur pour les vues et tâches en lecture seule qui peuvent lire sur une réplica
+
+    Pour une vue fondée sur une classe, utiliser
+    `method_decorator(read_from_replica, name="dispatch")`.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with use_replica():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APP_LABELS:
+            return DEFAULT_DB_ALIAS
+        # on renvoie toujours un alias explicite : sinon Django utiliserait la base de
+        # l'instance passée en indice, même après une écriture
+        return get_read_database()
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in PRIMARY_ONLY_APP_LABELS:
+            _state.has_written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # les réplicas contiennent les mêmes données que la base principale
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return not db.startswith(REPLICA_PREFIX)
@@ -13,5 +13,6 @@ urlpatterns = [
     path("", include("agir.notifications.urls")),
     path("", include("agir.loans.urls")),
     path("", include("agir.municipales.urls")),
+    path("", include("agir.statistics.urls")),
     path("data-france/", include("data_france.urls")),
 ]
@@ -67,6 +67,23 @@ class SignatureGenerator(PasswordResetTokenGenerator):
 
         return False
 
+    def check_token_timestamp(self, token):
+        """Vérifie le format et la date d'un jeton, sans en vérifier la signature
+
+        Permet d'écarter les jetons forgés grossièrement ou expirés avant de récupérer les
+        paramètres nécessaires à la vérification complète.
+        """
+        try:
+            ts_b36, hash = token.split("-")
+            ts = base36_to_int(ts_b36)
+        except (AttributeError, ValueError):
+            return False
+
+        if ts < 7228:
+            ts = ts * 24 * 60 * 60
+
+        return (self._num_seconds(self._now()) - ts) <= self.validity
+
     def check_token(self, token, **params):
         """copied from """
         self._check_params(params)
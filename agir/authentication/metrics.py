@@ -1,5 +1,11 @@
-from prometheus_client import Counter
+from prometheus_client import Counter, Histogram
 
 logged_in = Counter("agir_auth_logged_in", "Connexions réussies", ["backend"])
 logged_out = Counter("agir_auth_logged_out", "Déconnexions")
 login_failed = Counter("agir_auth_login_failed", "Connexions échouées", ["backend"])
+mail_link_duration = Histogram(
+    "agir_auth_mail_link_seconds",
+    "Durée de traitement des liens de connexion automatique",
+    ["outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
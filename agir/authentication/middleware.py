@@ -1,12 +1,22 @@
+import uuid
 from datetime import datetime
+from time import perf_counter
 
+from django.conf import settings
 from django.contrib import messages
-from django.contrib.auth import authenticate, login
+from django.contrib.auth import login, SESSION_KEY, user_login_failed
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 from django.utils.html import format_html
 from django.utils.translation import ugettext as _
 
+from agir.authentication import metrics
+from agir.authentication.backend import MailLinkBackend
+from agir.authentication.models import Role
+from agir.authentication.tokens import connection_token_generator
+
+MAIL_LINK_BACKEND = "agir.authentication.backend.MailLinkBackend"
+
 
 class MailLinkMiddleware:
     @staticmethod
@@ -36,11 +46,67 @@ class MailLinkMiddleware:
 
     def __init__(self, get_response):
         self.get_response = get_response
+        self.backend = MailLinkBackend()
+
+    def get_link_person_id(self, request):
+        try:
+            return uuid.UUID(request.GET["p"])
+        except ValueError:
+            return None
+
+    def is_connected_as(self, request, person_id):
+        # pas de requête pour les visiteurs qui n'ont pas de session authentifiée
+        if SESSION_KEY not in request.session:
+            return False
+        user = request.user
+        return (
+            user.is_authenticated
+            and user.type == Role.PERSON_ROLE
+            and user.person.pk == person_id
+        )
+
+    def get_link_user(self, request, person_id):
+        """Authentifie la personne à qui le lien a été envoyé
+
+        Seul le backend des liens de connexion est consulté, et les liens mal formés ou
+        expirés sont écartés sans aucune requête à la base de données.
+        """
+        token = request.GET["code"]
+
+        user = (
+            person_id is not None
+            and MAIL_LINK_BACKEND in settings.AUTHENTICATION_BACKENDS
+            and connection_token_generator.check_token_timestamp(token)
+            and self.backend.authenticate(request, user_pk=person_id, token=token)
+        )
+
+        if not user:
+            user_login_failed.send(
+                sender=__name__,
+                credentials={"user_pk": request.GET["p"], "token": "********"},
+                request=request,
+            )
+            return None
+
+        user.backend = MAIL_LINK_BACKEND
+        return user
 
     def __call__(self, request):
         if not ("p" in request.GET and "code" in request.GET):
             return self.get_response(request)
 
+        start = perf_counter()
+        outcome, response = self.process_link(request)
+        metrics.mail_link_duration.labels(outcome).observe(perf_counter() - start)
+
+        return response or self.get_response(request)
+
+    def process_link(self, request):
+        """Traite un lien de connexion automatique
+
+        :return: un couple `(outcome, response)`, où `response` est `None` si la requête
+          doit être transmise à la vue
+        """
         # preserve other query params than p and code when we redirect
         other_params = request.GET.copy()
         del other_params["p"]
@@ -54,21 +120,26 @@ class MailLinkMiddleware:
             else request.path
         )
 
-        link_user = authenticate(
-            request, user_pk=request.GET["p"], token=request.GET["code"]
-        )
-
         force_login = request.GET.get("force_login")
         no_session = request.GET.get("no_session")
+        person_id = self.get_link_person_id(request)
+
+        if person_id is not None and self.is_connected_as(request, person_id):
+            # déjà connecté comme la personne du lien : inutile de vérifier le jeton, ou
+            # de renouveler la session
+            response = None if no_session else HttpResponseRedirect(url)
+            return "already_connected", response
+
+        link_user = self.get_link_user(request, person_id)
 
         if no_session:
             if link_user:
                 request.user = link_user
-            return self.get_response(request)
+            return "no_session", None
         elif not link_user:
             # if we don't have any link_user, it means the link was forged or expired: we just ignore and redirect to
             # same url without the parameters
-            return HttpResponseRedirect(url)
+            return "invalid", HttpResponseRedirect(url)
         elif request.user.is_anonymous or force_login:
             # we have a link_user, and current user is anonymous or asked for force_login ==> we log her in and redirect
             login(request, link_user)
@@ -81,7 +152,8 @@ class MailLinkMiddleware:
                 level=messages.WARNING,
                 message=self.get_just_connected_message(link_user),
             )
-        elif request.user != link_user:
+            return "login", HttpResponseRedirect(url)
+        else:
             # we have a link_user, but current user is already logged in: we show a warning offering to connect with
             # link_user anyway
             params = request.GET.copy()
@@ -95,5 +167,4 @@ class MailLinkMiddleware:
                     request.user, link_user, link_url
                 ),
             )
-
-        return HttpResponseRedirect(url)
+            return "other_user", HttpResponseRedirect(url)
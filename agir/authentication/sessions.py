@@ -0,0 +1,160 @@
+"""Moteur de sessions servies depuis Redis, avec la base de données comme référence
+
+Les sessions sont lues dans Redis, et ne sont lues dans la base de données que si elles
+en sont absentes (après un vidage de Redis, par exemple). L'écriture dans Redis a lieu
+à chaque enregistrement de la session, mais l'écriture dans la base de données n'a lieu
+que si le contenu de la session a changé, ou si la date d'expiration enregistrée dans la
+base doit être repoussée de plus de `SESSION_DB_REFRESH_INTERVAL` secondes.
+
+L'expiration des sessions dans Redis est gérée par Redis lui-même ; la commande
+`clearsessions` supprime les sessions expirées de la base de données par lots.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.contrib.sessions.backends.base import UpdateError
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.utils import timezone
+from redis import RedisError
+
+from agir.api.redis import get_auth_redis_client
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY_PREFIX = "Session:"
+CLEAR_EXPIRED_BATCH_SIZE = 10000
+
+
+def get_cache_key(session_key):
+    return f"{SESSION_KEY_PREFIX}{session_key}"
+
+
+class SessionStore(DBStore):
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # empreinte des données et date d'expiration de la session dans la base
+        self._persisted = None
+
+    def _digest(self, serialized):
+        return hashlib.sha1(serialized).hexdigest()
+
+    def _load_from_cache(self):
+        try:
+            cached = get_auth_redis_client().get(get_cache_key(self.session_key))
+        except RedisError:
+            logger.warning("Impossible de lire la session dans Redis", exc_info=True)
+            return None
+
+        if cached is None:
+            return None
+
+        header, _, serialized = cached.partition(b"\n")
+        digest, db_expire = header.decode().split(" ")
+        self._persisted = (digest, float(db_expire))
+        return self.serializer().loads(serialized)
+
+    def _store_in_cache(self, serialized):
+        digest, db_expire = self._persisted
+        try:
+            get_auth_redis_client().set(
+                get_cache_key(self.session_key),
+                f"{digest} {db_expire}\n".encode() + serialized,
+                ex=max(self.get_expiry_age(), 1),
+            )
+        except RedisError:
+            # la session sera relue dans la base de données
+            logger.warning(
+                "Impossible d'enregistrer la session dans Redis", exc_info=True
+            )
+
+    def load(self):
+        if self.session_key is None:
+            return {}
+
+        data = self._load_from_cache()
+        if data is not None:
+            return data
+
+        s = self._get_session_from_db()
+        if s is None:
+            self._persisted = None
+            return {}
+
+        data = self.decode(s.session_data)
+        serialized = self.serializer().dumps(data)
+        self._persisted = (self._digest(serialized), s.expire_date.timestamp())
+        self._store_in_cache(serialized)
+        return data
+
+    def exists(self, session_key):
+        try:
+            if get_auth_redis_client().exists(get_cache_key(session_key)):
+                return True
+        except RedisError:
+            pass
+        return super().exists(session_key)
+
+    def _needs_db_write(self, digest, expire_date):
+        if self._persisted is None:
+            return True
+
+        persisted_digest, persisted_expire = self._persisted
+        return (
+            digest != persisted_digest
+            or expire_date.timestamp() - persisted_expire
+            >= settings.SESSION_DB_REFRESH_INTERVAL
+        )
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+
+        serialized = self.serializer().dumps(self._get_session(no_load=must_create))
+        digest = self._digest(serialized)
+        expire_date = self.get_expiry_date()
+
+        if must_create or self._needs_db_write(digest, expire_date):
+            try:
+                super().save(must_create=must_create)
+            except UpdateError:
+                # la date d'expiration de la session dans la base est en retard sur
+                # celle de Redis : la session a pu en être supprimée alors qu'elle était
+                # encore valide ; elle n'est recréée que si elle n'a pas été supprimée
+                # de Redis entre temps (par une déconnexion, par exemple)
+                if not get_auth_redis_client().exists(get_cache_key(self.session_key)):
+                    raise
+                super().save(must_create=True)
+            self._persisted = (digest, expire_date.timestamp())
+
+        self._store_in_cache(serialized)
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            session_key = self.session_key
+        if session_key is None:
+            return
+
+        super().delete(session_key)
+        try:
+            get_auth_redis_client().delete(get_cache_key(session_key))
+        except RedisError:
+            logger.warning("Impossible de supprimer la session de Redis", exc_info=True)
+
+    @classmethod
+    def clear_expired(cls):
+        """Supprime les sessions expirées de la base de données, par lots
+
+        Chaque lot est sélectionné grâce à l'index sur la date d'expiration, pour ne pas
+        verrouiller la table pendant toute la durée du nettoyage.
+        """
+        model = cls.get_model_class()
+        expired = model.objects.filter(expire_date__lt=timezone.now())
+
+        while True:
+            keys = list(
+                expired.values_list("session_key", flat=True)[:CLEAR_EXPIRED_BATCH_SIZE]
+            )
+            if not keys:
+                break
+            model.objects.filter(session_key__in=keys).delete()
@@ -1,7 +1,7 @@
 from social_django.models import DjangoStorage, UserSocialAuth
 
 from agir.authentication.models import Role
-from agir.people.models import Person
+from agir.people.models import Person, PersonEmail
 
 
 class AgirSocialUser(UserSocialAuth):
@@ -12,7 +12,7 @@ class AgirSocialUser(UserSocialAuth):
     def get_users_by_email(cls, email):
         try:
             person = Person.objects.select_related("role").get(
-                emails__address__iexact=email
+                emails__in=PersonEmail.objects.filter_by_address(email)
             )
             person.ensure_role_exists()
             return [person.role]
@@ -4,14 +4,17 @@ from unittest import mock
 import re
 from django.contrib.auth import get_user
 from django.core import mail
-from django.http import QueryDict
-from django.test import TestCase
+from django.http import QueryDict, HttpResponse
+from django.test import TestCase, RequestFactory
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
 
-from agir.api.redis import using_separate_redis_server
+from agir.api.redis import using_separate_redis_server, get_auth_redis_client
+from agir.authentication.middleware import MailLinkMiddleware
+from agir.authentication.sessions import SessionStore, get_cache_key
 from agir.authentication.tokens import connection_token_generator, short_code_generator
+from agir.clients.models import Client
 from agir.events.models import Event
 from agir.groups.models import SupportGroup
 from agir.people.models import Person
@@ -61,6 +64,49 @@ class MailLinkTestCase(TestCase):
             response.redirect_chain,
         )
 
+    def test_expired_or_malformed_links_are_rejected_without_queries(self):
+        middleware = MailLinkMiddleware(lambda request: HttpResponse())
+        factory = RequestFactory()
+
+        for params in [
+            {"p": self.person.pk, "code": "1-abcdef"},
+            {"p": self.person.pk, "code": "prout"},
+            {"p": "prout", "code": "1-abcdef"},
+        ]:
+            request = factory.get("/", data=params)
+            request.session = {}
+            with self.assertNumQueries(0):
+                response = middleware(request)
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(response.url, "/")
+
+    def test_link_for_connected_person_does_not_renew_session(self):
+        self.client.force_login(self.person.role, self.soft_backend)
+        session_key = self.client.session.session_key
+        code = connection_token_generator.make_token(user=self.person)
+
+        response = self.client.get(
+            reverse("volunteer"),
+            data={"p": self.person.pk, "code": code, "force_login": "yes"},
+        )
+
+        self.assertRedirects(response, reverse("volunteer"))
+        self.assertEqual(self.client.session.session_key, session_key)
+        self.assertEqual(get_user(self.client), self.person.role)
+
+    def test_link_while_connected_as_client(self):
+        client = Client.objects.create_client("client")
+        self.client.force_login(client.role)
+        code = connection_token_generator.make_token(user=self.person)
+
+        response = self.client.get(
+            reverse("volunteer"),
+            data={"p": self.person.pk, "code": code, "force_login": "yes"},
+        )
+
+        self.assertRedirects(response, reverse("volunteer"))
+        self.assertEqual(get_user(self.client), self.person.role)
+
     def test_can_access_soft_login_while_already_connected(self):
         self.client.force_login(self.person.role, self.soft_backend)
 
@@ -98,6 +144,49 @@ class MailLinkTestCase(TestCase):
         self.assertContains(response, 'action="{}"'.format(message_preferences_path))
 
 
+@using_separate_redis_server
+class SessionStoreTestCase(TestCase):
+    def setUp(self):
+        self.session = SessionStore()
+        self.session["login_action"] = 1
+        self.session.save()
+
+    def test_session_is_read_from_redis(self):
+        with self.assertNumQueries(0):
+            session = SessionStore(self.session.session_key)
+            self.assertEqual(session["login_action"], 1)
+
+    def test_unchanged_session_is_not_written_to_database(self):
+        session = SessionStore(self.session.session_key)
+        session["login_action"] = 1
+
+        with self.assertNumQueries(0):
+            session.save()
+
+        session["login_action"] = 2
+        session.save()
+
+        get_auth_redis_client().delete(get_cache_key(self.session.session_key))
+        self.assertEqual(SessionStore(self.session.session_key)["login_action"], 2)
+
+    def test_session_is_read_from_database_when_missing_from_redis(self):
+        get_auth_redis_client().delete(get_cache_key(self.session.session_key))
+
+        session = SessionStore(self.session.session_key)
+        self.assertEqual(session["login_action"], 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(SessionStore(self.session.session_key)["login_action"], 1)
+
+    def test_deleted_session_is_removed_from_redis(self):
+        self.session.delete()
+
+        self.assertFalse(
+            get_auth_redis_client().exists(get_cache_key(self.session.session_key))
+        )
+        self.assertEqual(dict(SessionStore(self.session.session_key).items()), {})
+
+
 @using_separate_redis_server
 class ShortCodeTestCase(TestCase):
     def setUp(self):
@@ -9,6 +9,7 @@ from django.utils.html import mark_safe
 from django.utils.timezone import now
 from django.utils.translation import ugettext as _
 from django.views.decorators import cache
+from django.utils.decorators import method_decorator
 from django.views.decorators.clickjacking import xframe_options_exempt
 from django.views.generic import TemplateView, DetailView
 from django_filters.rest_framework.backends import DjangoFilterBackend
@@ -16,6 +17,7 @@ from rest_framework.authentication import SessionAuthentication
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import ListAPIView
 
+from agir.api.db_routers import read_from_replica
 from agir.lib.export import dict_to_camelcase
 from agir.municipales.models import CommunePage
 from . import serializers
@@ -79,6 +81,7 @@ class BBoxFilterBackend(object):
         return queryset.filter(coordinates__intersects=bbox)
 
 
+@method_decorator(read_from_replica, name="dispatch")
 class EventsView(ListAPIView):
     permission_classes = ()
     serializer_class = serializers.MapEventSerializer
@@ -111,6 +114,7 @@ class GroupFilterSet(django_filters.rest_framework.FilterSet):
         fields = ("subtype",)
 
 
+@method_decorator(read_from_replica, name="dispatch")
 class GroupsView(ListAPIView):
     permission_classes = ()
     serializer_class = serializers.MapGroupSerializer
@@ -1,4 +1,9 @@
+import hashlib
 import hmac
+import json
+
+from django.conf import settings
+from django.utils import timezone
 from oauth2_provider.contrib.rest_framework import OAuth2Authentication
 from oauth2_provider.models import AccessToken
 
@@ -6,10 +11,67 @@ from rules.permissions import ObjectPermissionBackend as RulesObjectPermissionBa
 from django.utils.translation import ugettext as _
 from django.core.exceptions import PermissionDenied
 from rest_framework import exceptions
-from rest_framework.authentication import BasicAuthentication
+from rest_framework.authentication import BasicAuthentication, get_authorization_header
 
+from agir.api.redis import get_auth_redis_client
+from agir.authentication.models import Role
 from agir.clients.models import Client
 
+# durée maximale de conservation d'un jeton dans le cache, en secondes
+ACCESS_TOKEN_CACHE_MAX_TTL = 300
+
+
+def get_access_token_cache_key(token):
+    # on ne stocke pas le jeton en clair dans les noms de clés
+    return settings.AUTH_REDIS_PREFIX + hashlib.sha256(token.encode()).hexdigest()
+
+
+def cache_access_token(access_token):
+    ttl = min(
+        int((access_token.expires - timezone.now()).total_seconds()),
+        ACCESS_TOKEN_CACHE_MAX_TTL,
+    )
+    if ttl <= 0 or access_token.user_id is None:
+        return
+
+    payload = json.dumps(
+        {
+            "id": access_token.id,
+            "role_id": str(access_token.user_id),
+            "application_id": access_token.application_id,
+            "scope": access_token.scope,
+            "expires": access_token.expires.timestamp(),
+        }
+    )
+    get_auth_redis_client().set(
+        get_access_token_cache_key(access_token.token), payload, ex=ttl
+    )
+
+
+def get_cached_access_token(token):
+    """Renvoie le jeton d'accès correspondant à `token` s'il est dans le cache
+
+    Le jeton renvoyé est reconstitué sans requête à la base de données : son application
+    n'est chargée que si l'on y accède.
+    """
+    payload = get_auth_redis_client().get(get_access_token_cache_key(token))
+    if payload is None:
+        return None
+
+    payload = json.loads(payload)
+    return AccessToken(
+        id=payload["id"],
+        token=token,
+        user_id=payload["role_id"],
+        application_id=payload["application_id"],
+        scope=payload["scope"],
+        expires=timezone.datetime.fromtimestamp(payload["expires"], timezone.utc),
+    )
+
+
+def invalidate_access_token(token):
+    get_auth_redis_client().delete(get_access_token_cache_key(token))
+
 
 class AccessTokenRulesPermissionBackend(RulesObjectPermissionBackend):
     """
@@ -30,17 +92,51 @@ class AccessTokenRulesPermissionBackend(RulesObjectPermissionBackend):
 
 
 class AccessTokenAuthentication(OAuth2Authentication):
+    """Authentification par jeton OAuth2, avec un cache Redis des jetons valides
+
+    Les jetons transmis dans l'en-tête `Authorization` sont d'abord recherchés dans le
+    cache : en cas de succès, seul le rôle est chargé depuis la base de données. Sinon,
+    la validation est déléguée à django-oauth-toolkit, et le jeton est mis en cache s'il
+    est valide. Les entrées du cache expirent au plus tard avec le jeton, et sont
+    supprimées quand le jeton est modifié ou révoqué (voir `agir.clients.signals`).
+    """
+
     def authenticate(self, request):
-        result = super().authenticate(request)
+        result = self.authenticate_from_cache(request)
 
         if result is None:
-            return None
+            result = super().authenticate(request)
+            if result is None:
+                return None
+            cache_access_token(result[1])
 
         user, token = result
         user.token = token
 
         return user, token
 
+    def authenticate_from_cache(self, request):
+        auth = get_authorization_header(request).split()
+        if len(auth) != 2 or auth[0].lower() != b"bearer":
+            return None
+
+        token_string = auth[1].decode("latin-1")
+        token = get_cached_access_token(token_string)
+        if token is None:
+            return None
+
+        if token.is_expired():
+            invalidate_access_token(token_string)
+            return None
+
+        try:
+            token.user = Role.objects.get(pk=token.user_id)
+        except Role.DoesNotExist:
+            invalidate_access_token(token_string)
+            return None
+
+        return token.user, token
+
 
 class ClientAuthentication(BasicAuthentication):
     """
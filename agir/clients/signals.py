@@ -1,6 +1,8 @@
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
+from oauth2_provider.models import AccessToken
 
+from .authentication import invalidate_access_token
 from .models import Client
 from ..authentication.models import Role
 
@@ -10,3 +12,9 @@ def ensure_has_role(sender, instance, raw, **kwargs):
     if not raw and instance.role_id is None:
         role = Role.objects.create(type=Role.CLIENT_ROLE)
         instance.role = role
+
+
+@receiver(post_save, sender=AccessToken, dispatch_uid="access_token_invalidate_cache")
+@receiver(post_delete, sender=AccessToken, dispatch_uid="access_token_invalidate_cache")
+def invalidate_access_token_cache(sender, instance, **kwargs):
+    invalidate_access_token(instance.token)
@@ -75,6 +75,31 @@ class TokenTestCase(TestCase):
             auth_info.scopes, [self.scope.name, self.other_scope.name]
         )
 
+    def test_token_is_cached_after_first_authentication(self):
+        request = self.factory.get(
+            "", HTTP_AUTHORIZATION="Bearer {token}".format(token=self.token)
+        )
+        self.token_authentifier.authenticate(request=request)
+
+        with self.assertNumQueries(1):
+            auth_user, auth_info = self.token_authentifier.authenticate(request=request)
+
+        self.assertEqual(auth_user, self.person.role)
+        self.assertEqual(auth_info.pk, self.token.pk)
+        self.assertEqual(auth_user.token, auth_info)
+        self.assertEqual(auth_info.application, self.client)
+        self.assertTrue(auth_info.allow_scopes([self.scope.name]))
+
+    def test_cannot_authenticate_with_revoked_cached_token(self):
+        request = self.factory.get(
+            "", HTTP_AUTHORIZATION="Bearer {token}".format(token=self.token)
+        )
+        self.token_authentifier.authenticate(request=request)
+
+        self.token.revoke()
+
+        self.assertIsNone(self.token_authentifier.authenticate(request=request))
+
 
 class ScopeTestCase(APITestCase):
     def setUp(self):
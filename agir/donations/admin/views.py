@@ -38,11 +38,17 @@ class HandleRequestView(AdminViewMixin, DetailView):
             spending_request=self.object,
             documents=self.object.documents.all(),
             fields=admin_summary(self.object),
-            history=self.object.get_history(admin=True),
+            **self.get_history_context(),
             **self.get_admin_helpers(kwargs["form"], kwargs["form"].fields),
             **kwargs
         )
 
+    def get_history_context(self):
+        history, history_truncated = self.object.get_history_page(
+            full="historique" in self.request.GET, admin=True
+        )
+        return {"history": history, "history_truncated": history_truncated}
+
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
         form = self.get_form()
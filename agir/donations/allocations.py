@@ -1,15 +1,73 @@
 from django.conf import settings
+from django.db import transaction
 from django.db.models import Sum
 
 from agir.donations.apps import DonsConfig
-from agir.donations.models import Operation, MonthlyAllocation
+from agir.donations.models import Operation, MonthlyAllocation, GroupBalance
 from agir.payments.actions.subscriptions import create_subscription
 
 
 def get_balance(group):
+    """Renvoie le solde de l'allocation d'un groupe
+
+    Le solde est lu dans la table `GroupBalance`, maintenue à jour par trigger à chaque
+    opération, plutôt que recalculé à partir de l'ensemble des opérations du groupe.
+    """
     return (
-        Operation.objects.filter(group=group).aggregate(sum=Sum("amount"))["sum"] or 0
+        GroupBalance.objects.filter(group=group)
+        .values_list("amount", flat=True)
+        .first()
+        or 0
+    )
+
+
+def get_balances(groups):
+    """Renvoie les soldes de plusieurs groupes en une seule requête
+
+    :param groups: un itérable de groupes ou d'identifiants de groupes
+    :return: un dictionnaire associant l'identifiant de chaque groupe à son solde
+    """
+    group_ids = [getattr(g, "pk", g) for g in groups]
+    balances = dict(
+        GroupBalance.objects.filter(group_id__in=group_ids).values_list(
+            "group_id", "amount"
+        )
     )
+    return {group_id: balances.get(group_id, 0) for group_id in group_ids}
+
+
+def reconcile_balances():
+    """Vérifie les soldes de groupe par rapport aux opérations, et corrige les écarts
+
+    Toutes les lignes de solde sont verrouillées le temps de la vérification, pour que les
+    opérations enregistrées en parallèle ne puissent pas fausser la comparaison.
+
+    :return: un dictionnaire associant l'identifiant de chaque groupe corrigé au couple
+      (ancien solde, solde recalculé)
+    """
+    with transaction.atomic():
+        balances = dict(
+            GroupBalance.objects.select_for_update().values_list("group_id", "amount")
+        )
+        ledger = dict(
+            Operation.objects.order_by()
+            .values("group_id")
+            .annotate(total=Sum("amount"))
+            .values_list("group_id", "total")
+        )
+
+        differences = {
+            group_id: (balances.get(group_id), ledger.get(group_id, 0))
+            for group_id in set(balances) | set(ledger)
+            if balances.get(group_id) != ledger.get(group_id, 0)
+        }
+
+        for group_id, (_old, amount) in differences.items():
+            GroupBalance.objects.update_or_create(
+                group_id=group_id, defaults={"amount": amount}
+            )
+
+    return differences
 
 
 def group_can_handle_allocation(group):
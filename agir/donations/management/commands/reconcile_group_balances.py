@@ -0,0 +1,19 @@
+from django.core.management import BaseCommand
+
+from agir.donations.allocations import reconcile_balances
+from agir.lib.display import display_price
+
+
+class Command(BaseCommand):
+    help = "Check group balances against the operations ledger and fix any difference"
+
+    def handle(self, **kwargs):
+        differences = reconcile_balances()
+
+        for group_id, (old, new) in differences.items():
+            self.stdout.write(
+                f"{group_id} : {display_price(old) if old is not None else '-'} -> {display_price(new)}"
+            )
+
+        if not differences:
+            self.stdout.write("No difference found")
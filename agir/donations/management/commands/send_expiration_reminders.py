@@ -6,6 +6,8 @@ from django.utils.timezone import now
 from agir.donations import tasks
 from agir.system_pay.models import SystemPaySubscription
 
+BATCH_SIZE = 200
+
 
 class Command(BaseCommand):
     def handle(self, **kwargs):
@@ -13,10 +15,17 @@ class Command(BaseCommand):
             # seulement le dernier dimanche du mois
             return
 
-        for s in SystemPaySubscription.objects.filter(
-            active=True,
-            alias__expiry_date__lt=now() + timedelta(days=8),
-            alias__expiry_date__gt=now() - timedelta(days=32),
-        ).distinct("id"):
-            tasks.send_expiration_email_reminder.delay(s.pk)
-            tasks.send_expiration_sms_reminder.delay(s.pk)
+        pks = list(
+            SystemPaySubscription.objects.filter(
+                active=True,
+                alias__expiry_date__lt=now() + timedelta(days=8),
+                alias__expiry_date__gt=now() - timedelta(days=32),
+            )
+            .awaiting_expiration_reminder()
+            .order_by("id")
+            .values_list("id", flat=True)
+            .distinct()
+        )
+
+        for i in range(0, len(pks), BATCH_SIZE):
+            tasks.send_expiration_reminders.delay(pks[i : i + BATCH_SIZE])
@@ -0,0 +1,181 @@
+import agir.donations.model_fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copié depuis 0018_fix_operations_triggers
+old_operations_trigger_function = """
+CREATE OR REPLACE FUNCTION check_spendings_when_operation_modified() RETURNS TRIGGER AS
+$check_spendings$
+    DECLARE
+        same_group BOOLEAN;
+        balance INTEGER;
+    BEGIN
+        IF TG_OP = 'UPDATE' THEN
+            same_group := NEW.group_id = OLD.group_id;
+        ELSE
+            same_group := FALSE;
+        END IF;
+    
+        -- Vérifions que la balance du NOUVEAU groupe est supérieure à zéro
+        IF TG_OP = 'INSERT' OR TG_OP = 'UPDATE' THEN
+            SELECT COALESCE(SUM(amount), 0) INTO balance FROM donations_operation WHERE donations_operation.group_id = NEW.group_id;
+
+            -- On ajoute à ce total la valeur de la nouvelle opération
+            balance := balance + NEW.amount;
+            
+            IF same_group THEN
+                -- Si on a mis à jour une opération (sans changer le groupe), il ne faut pas faire de double
+                -- comptage. Le SELECT ci-dessus inclut dans la somme le montant de l'opération avant mise à jour,
+                -- qu'il faut donc soustraire à la balance.
+                balance := balance - OLD.amount;
+            END IF;
+
+            -- Le total doit rester supérieur ou égal à zéro
+            IF balance < 0 THEN
+                RAISE integrity_constraint_violation;
+            END IF;
+        END IF;
+
+        -- Vérifions que la balance de l'ANCIEN groupe est supérieure à zéro
+        IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND NOT same_group) THEN
+            SELECT COALESCE(SUM(amount), 0) INTO balance FROM donations_operation WHERE donations_operation.group_id = OLD.group_id;
+
+            -- On retire à ce total le montant de l'opération qui est supprimée
+            balance := balance - OLD.amount;
+
+            IF balance < 0 THEN
+                RAISE integrity_constraint_violation;
+            END IF;
+        END IF;
+        RETURN NEW;
+      END
+$check_spendings$ LANGUAGE plpgsql;
+"""
+
+
+new_operations_trigger_function = """
+CREATE OR REPLACE FUNCTION check_spendings_when_operation_modified() RETURNS TRIGGER AS
+$check_spendings$
+    DECLARE
+        same_group BOOLEAN;
+        balance INTEGER;
+    BEGIN
+        IF TG_OP = 'UPDATE' THEN
+            same_group := NEW.group_id = OLD.group_id;
+        ELSE
+            same_group := FALSE;
+        END IF;
+
+        -- Vérifions que la balance du NOUVEAU groupe est supérieure à zéro
+        IF TG_OP = 'INSERT' OR TG_OP = 'UPDATE' THEN
+            -- On s'assure que la ligne de solde existe, puis on la verrouille jusqu'à la fin de la transaction :
+            -- deux opérations concurrentes sur le même groupe sont ainsi vérifiées l'une après l'autre.
+            INSERT INTO donations_groupbalance (group_id, amount) VALUES (NEW.group_id, 0)
+                ON CONFLICT (group_id) DO NOTHING;
+            SELECT amount INTO balance FROM donations_groupbalance WHERE group_id = NEW.group_id FOR UPDATE;
+
+            -- On ajoute à ce total la valeur de la nouvelle opération
+            balance := balance + NEW.amount;
+
+            IF same_group THEN
+                -- Si on a mis à jour une opération (sans changer le groupe), le solde inclut le montant de
+                -- l'opération avant mise à jour, qu'il faut donc soustraire.
+                balance := balance - OLD.amount;
+            END IF;
+
+            -- Le total doit rester supérieur ou égal à zéro
+            IF balance < 0 THEN
+                RAISE integrity_constraint_violation;
+            END IF;
+        END IF;
+
+        -- Vérifions que la balance de l'ANCIEN groupe est supérieure à zéro
+        IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND NOT same_group) THEN
+            SELECT amount INTO balance FROM donations_groupbalance WHERE group_id = OLD.group_id FOR UPDATE;
+
+            -- On retire à ce total le montant de l'opération qui est supprimée
+            balance := COALESCE(balance, 0) - OLD.amount;
+
+            IF balance < 0 THEN
+                RAISE integrity_constraint_violation;
+            END IF;
+        END IF;
+        RETURN NEW;
+      END
+$check_spendings$ LANGUAGE plpgsql;
+"""
+
+
+add_balance_trigger = """
+CREATE FUNCTION update_balance_when_operation_modified() RETURNS TRIGGER AS
+$update_balance$
+    BEGIN
+        IF TG_OP = 'DELETE' OR TG_OP = 'UPDATE' THEN
+            INSERT INTO donations_groupbalance (group_id, amount) VALUES (OLD.group_id, -OLD.amount)
+                ON CONFLICT (group_id) DO UPDATE SET amount = donations_groupbalance.amount + EXCLUDED.amount;
+        END IF;
+
+        IF TG_OP = 'INSERT' OR TG_OP = 'UPDATE' THEN
+            INSERT INTO donations_groupbalance (group_id, amount) VALUES (NEW.group_id, NEW.amount)
+                ON CONFLICT (group_id) DO UPDATE SET amount = donations_groupbalance.amount + EXCLUDED.amount;
+        END IF;
+        RETURN NULL;
+    END
+$update_balance$ LANGUAGE plpgsql;
+
+CREATE TRIGGER update_balance_when_operation_modified AFTER INSERT OR UPDATE OR DELETE ON donations_operation
+    FOR EACH ROW EXECUTE PROCEDURE update_balance_when_operation_modified();
+"""
+
+
+remove_balance_trigger = """
+DROP TRIGGER update_balance_when_operation_modified ON donations_operation;
+DROP FUNCTION update_balance_when_operation_modified();
+"""
+
+
+initialize_balances = """
+INSERT INTO donations_groupbalance (group_id, amount)
+SELECT group_id, SUM(amount) FROM donations_operation GROUP BY group_id;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("groups", "0041_auto_20201021_1525"),
+        ("donations", "0022_payer_name"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GroupBalance",
+            fields=[
+                (
+                    "group",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="balance",
+                        serialize=False,
+                        to="groups.supportgroup",
+                    ),
+                ),
+                (
+                    "amount",
+                    agir.donations.model_fields.BalanceField(
+                        default=0, verbose_name="solde"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Solde d'allocation",
+                "verbose_name_plural": "Soldes d'allocation",
+            },
+        ),
+        migrations.RunSQL(sql=initialize_balances, reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(sql=add_balance_trigger, reverse_sql=remove_balance_trigger),
+        migrations.RunSQL(
+            sql=new_operations_trigger_function,
+            reverse_sql=old_operations_trigger_function,
+        ),
+    ]
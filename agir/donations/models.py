@@ -77,6 +77,31 @@ class Operation(models.Model):
         unique_together = ("payment", "group")
 
 
+class GroupBalance(models.Model):
+    """Solde courant de l'allocation d'un groupe
+
+    Cette table est maintenue par un trigger sur `donations_operation` : chaque insertion,
+    modification ou suppression d'opération met à jour la ligne du groupe concerné, ce qui
+    verrouille cette ligne jusqu'à la fin de la transaction. Deux dépenses concurrentes sur
+    le même groupe sont donc vérifiées l'une après l'autre.
+
+    Il ne faut pas modifier cette table directement, sauf pour la réconcilier avec les
+    opérations (voir `agir.donations.allocations.reconcile_balances`).
+    """
+
+    group = models.OneToOneField(
+        to="groups.SupportGroup",
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="balance",
+    )
+    amount = BalanceField(_("solde"), null=False, default=0)
+
+    class Meta:
+        verbose_name = "Solde d'allocation"
+        verbose_name_plural = "Soldes d'allocation"
+
+
 class Spending(Operation):
     """
     Utility class to use when playing with spending operations.
@@ -105,6 +130,7 @@ class SpendingRequest(HistoryMixin, TimeStampedModel):
         "provider",
         "iban",
     ]
+    HISTORY_FIELDS = ["status", "modified"]
 
     STATUS_DRAFT = "D"
     STATUS_AWAITING_GROUP_VALIDATION = "G"
@@ -278,17 +304,15 @@ class SpendingRequest(HistoryMixin, TimeStampedModel):
 
     # noinspection PyMethodOverriding
     @classmethod
-    def get_history_step(cls, old, new, *, admin=False, **kwargs):
-        old_fields = old.field_dict if old else {}
-        new_fields = new.field_dict
-        old_status, new_status = old_fields.get("status"), new_fields["status"]
-        revision = new.revision
+    def get_history_step(cls, step, version, *, admin=False, **kwargs):
+        old_status, new_status = step["old"].get("status"), step["new"]["status"]
+        revision = version.revision
         person = revision.user.person if revision and revision.user else None
 
         res = {
-            "modified": new_fields["modified"],
+            "modified": step["new"]["modified"],
             "comment": revision.get_comment(),
-            "diff": cls.get_diff(old_fields, new_fields) if old_fields else [],
+            "diff": cls.get_diff(step["diff"]),
         }
 
         if person and admin:
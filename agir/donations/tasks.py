@@ -1,18 +1,25 @@
+import logging
 from urllib.parse import urljoin
 
 from django.conf import settings
+from django.core.mail import get_connection
+from django.db.models import Prefetch
 from django.urls import reverse
+from django.utils import timezone
+from requests import RequestException
 
 from agir.authentication.tokens import monthly_donation_confirmation_token_generator
 from agir.donations.models import SpendingRequest
 from agir.lib.celery import emailing_task, http_task
 from agir.lib.mailing import send_mosaico_email, add_params_to_urls
 from agir.lib.phone_numbers import is_french_number, is_mobile_number
-from agir.lib.sms import send_sms
+from agir.lib.sms import send_sms, SMSSendException
 from agir.lib.utils import front_url, generate_token_params, shorten_url
-from agir.people.models import Person
+from agir.people.models import Person, PersonEmail
 from agir.system_pay.models import SystemPaySubscription
 
+logger = logging.getLogger(__name__)
+
 
 @emailing_task
 def send_donation_email(person_pk, template_code="DONATION_MESSAGE"):
@@ -78,15 +85,7 @@ def send_monthly_donation_confirmation_email(email, **kwargs):
     )
 
 
-@emailing_task
-def send_expiration_email_reminder(sp_subscription_pk):
-    try:
-        sp_subscription = SystemPaySubscription.objects.select_related(
-            "subscription__person", "alias"
-        ).get(pk=sp_subscription_pk)
-    except SystemPaySubscription.DoesNotExist:
-        return
-
+def _send_expiration_email(sp_subscription, connection=None):
     send_mosaico_email(
         code="CARD_EXPIRATION",
         subject="Mettez à jour votre carte bancaire !",
@@ -98,18 +97,11 @@ def send_expiration_email_reminder(sp_subscription_pk):
             "GREETINGS": sp_subscription.subscription.person.get_greeting(),
         },
         recipients=[sp_subscription.subscription.person],
+        connection=connection,
     )
 
 
-@http_task
-def send_expiration_sms_reminder(sp_subscription_pk):
-    try:
-        sp_subscription = SystemPaySubscription.objects.select_related(
-            "subscription__person", "alias"
-        ).get(pk=sp_subscription_pk)
-    except SystemPaySubscription.DoesNotExist:
-        return
-
+def _send_expiration_sms(sp_subscription):
     recipient = sp_subscription.subscription.person
 
     if (
@@ -131,3 +123,71 @@ def send_expiration_sms_reminder(sp_subscription_pk):
         f"Merci encore de votre soutien !",
         recipient.contact_phone,
     )
+
+
+@emailing_task
+def send_expiration_email_reminder(sp_subscription_pk):
+    try:
+        sp_subscription = SystemPaySubscription.objects.select_related(
+            "subscription__person", "alias"
+        ).get(pk=sp_subscription_pk)
+    except SystemPaySubscription.DoesNotExist:
+        return
+
+    _send_expiration_email(sp_subscription)
+
+
+@http_task
+def send_expiration_sms_reminder(sp_subscription_pk):
+    try:
+        sp_subscription = SystemPaySubscription.objects.select_related(
+            "subscription__person", "alias"
+        ).get(pk=sp_subscription_pk)
+    except SystemPaySubscription.DoesNotExist:
+        return
+
+    _send_expiration_sms(sp_subscription)
+
+
+@emailing_task
+def send_expiration_reminders(sp_subscription_pks):
+    """Envoie les rappels d'expiration de carte d'un lot de souscriptions
+
+    Tous les emails du lot sont envoyés par la même connexion SMTP. Chaque souscription
+    est marquée comme rappelée dès l'envoi de ses messages : si la tâche est relancée
+    après une erreur, seules les souscriptions restantes sont traitées.
+    """
+    sp_subscriptions = (
+        SystemPaySubscription.objects.filter(pk__in=sp_subscription_pks)
+        .awaiting_expiration_reminder()
+        .select_related("subscription__person", "alias")
+        .prefetch_related(
+            # les adresses non invalides d'abord, dans l'ordre de préférence
+            Prefetch(
+                "subscription__person__emails",
+                queryset=PersonEmail.objects.order_by("_bounced", "_order"),
+                to_attr="ordered_emails",
+            )
+        )
+    )
+
+    with get_connection() as connection:
+        for sp_subscription in sp_subscriptions:
+            person = sp_subscription.subscription.person
+            # même choix que `Person.primary_email`, sans requête supplémentaire
+            person.primary_email = next(iter(person.ordered_emails), None)
+
+            _send_expiration_email(sp_subscription, connection=connection)
+
+            try:
+                _send_expiration_sms(sp_subscription)
+            except (SMSSendException, RequestException):
+                # un SMS non envoyé ne doit pas empêcher le reste du lot
+                logger.exception(
+                    "Impossible d'envoyer le SMS de rappel d'expiration",
+                    extra={"sp_subscription": sp_subscription.pk},
+                )
+
+            SystemPaySubscription.objects.filter(pk=sp_subscription.pk).update(
+                expiration_reminder_sent=timezone.now()
+            )
@@ -17,6 +17,7 @@ from agir.donations.models import Operation, MonthlyAllocation
 from agir.donations.tasks import (
     send_monthly_donation_confirmation_email,
     send_donation_email,
+    send_expiration_reminders,
 )
 from agir.groups.models import SupportGroup, Membership, SupportGroupSubtype
 from agir.lib.utils import front_url
@@ -382,6 +383,23 @@ class MonthlyDonationTestCase(DonationTestMixin, TestCase):
 
         return s
 
+    @mock.patch("agir.donations.tasks.send_sms")
+    @mock.patch("agir.donations.tasks.shorten_url", lambda url, **kwargs: url)
+    def test_expiration_reminders_are_sent_only_once(self, send_sms):
+        self.p1.contact_phone = "+33645789845"
+        self.p1.save()
+        s = self.create_subscription(self.p1, 1000)
+        sp_subscription = s.system_pay_subscriptions.get()
+
+        send_expiration_reminders([sp_subscription.pk])
+        send_expiration_reminders([sp_subscription.pk])
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.p1.email])
+        send_sms.assert_called_once()
+        sp_subscription.refresh_from_db()
+        self.assertIsNotNone(sp_subscription.expiration_reminder_sent)
+
     @mock.patch("django.db.transaction.on_commit")
     def test_can_make_monthly_donation_while_logged_in(self, on_commit):
         self.client.force_login(self.p1.role)
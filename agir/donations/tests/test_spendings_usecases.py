@@ -1,9 +1,13 @@
+from unittest import mock
+
+import reversion
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 from django.urls import reverse
 from django.utils import timezone
 
+from agir.api.redis import get_auth_redis_client, using_separate_redis_server
 from agir.donations.models import Operation, SpendingRequest, Document
 from agir.groups.models import SupportGroupSubtype, SupportGroup, Membership
 from agir.payments.models import Payment
@@ -119,6 +123,38 @@ class SpendingRequestTestCase(TestCase):
             ],
         )
 
+    @using_separate_redis_server
+    def test_history_steps_are_precomputed(self):
+        with reversion.create_revision():
+            reversion.set_comment("Création")
+            spending_request = SpendingRequest.objects.create(
+                group=self.group1, **self.spending_request_data
+            )
+        with reversion.create_revision():
+            reversion.set_comment("Modification")
+            spending_request.amount = 7700
+            spending_request.save()
+
+        keys = get_auth_redis_client().keys("HistoryStep:*")
+        self.assertEqual(len(keys), 2)
+        self.assertTrue(all(get_auth_redis_client().ttl(key) > 0 for key in keys))
+
+        history = spending_request.get_history()
+        self.assertEqual(
+            [(step["comment"], step["diff"]) for step in history],
+            [("Création", []), ("Modification", ["Montant de la dépense"])],
+        )
+        self.assertEqual(spending_request.get_history(last=1), history[1:])
+        with mock.patch.object(SpendingRequest, "HISTORY_PAGE_SIZE", 1):
+            self.assertEqual(spending_request.get_history_page(), (history[1:], True))
+            self.assertEqual(
+                spending_request.get_history_page(full=True), (history, False)
+            )
+
+        # les étapes manquantes sont recalculées à la lecture
+        get_auth_redis_client().delete(*get_auth_redis_client().keys("HistoryStep:*"))
+        self.assertEqual(spending_request.get_history(), history)
+
     def test_can_manage_spending_request(self):
         """Peut accéder à la page de gestion d'une demande
         """
@@ -1,7 +1,13 @@
 from django.db import IntegrityError, transaction
 from django.test import TestCase
 
-from agir.donations.models import Operation, Spending, MonthlyAllocation
+from agir.donations.allocations import get_balance, get_balances, reconcile_balances
+from agir.donations.models import (
+    Operation,
+    Spending,
+    MonthlyAllocation,
+    GroupBalance,
+)
 from agir.groups.models import SupportGroup
 from agir.payments.models import Payment, Subscription
 from agir.people.models import Person
@@ -143,6 +149,44 @@ class SpendingTestCase(TriggersTestCaseMixin, TestCase):
             o.delete()
 
 
+class GroupBalanceTestCase(TriggersTestCaseMixin, TestCase):
+    def test_balance_follows_operations(self):
+        self.create_payment(1000, group=self.group1, allocation=800)
+        o = Operation.objects.create(amount=500, group=self.group1)
+        Spending.objects.create(group=self.group1, amount=-300)
+        self.assertEqual(get_balance(self.group1), 1000)
+
+        o.group = self.group2
+        o.save()
+        self.assertEqual(
+            get_balances([self.group1, self.group2, self.group3]),
+            {self.group1.pk: 500, self.group2.pk: 500, self.group3.pk: 0,},
+        )
+
+    def test_failed_spending_does_not_change_balance(self):
+        self.create_payment(1000, group=self.group1)
+
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Spending.objects.create(group=self.group1, amount=-1800)
+
+        self.assertEqual(get_balance(self.group1), 1000)
+
+    def test_reconcile_balances(self):
+        self.create_payment(1000, group=self.group1)
+        self.create_payment(1000, group=self.group2, allocation=400)
+        GroupBalance.objects.filter(group=self.group1).update(amount=200)
+        GroupBalance.objects.filter(group=self.group2).delete()
+
+        self.assertEqual(
+            reconcile_balances(),
+            {self.group1.pk: (200, 1000), self.group2.pk: (None, 400)},
+        )
+        self.assertEqual(get_balance(self.group1), 1000)
+        self.assertEqual(get_balance(self.group2), 400)
+        self.assertEqual(reconcile_balances(), {})
+
+
 class MonthlyAllocationTestCase(TriggersTestCaseMixin, TestCase):
     def setUp(self) -> None:
         super().setUp()
@@ -121,13 +121,17 @@ class ManageSpendingRequestView(
     permission_required = ("donations.view_spendingrequest",)
 
     def get_context_data(self, **kwargs):
+        history, history_truncated = self.object.get_history_page(
+            full="historique" in self.request.GET
+        )
         return super().get_context_data(
             supportgroup=self.object.group,
             documents=self.object.documents.filter(deleted=False),
             can_edit=can_edit(self.object),
             action=get_current_action(self.object, self.request.user),
             summary=summary(self.object),
-            history=self.object.get_history(),
+            history=history,
+            history_truncated=history_truncated,
             **kwargs,
         )
 
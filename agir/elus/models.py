@@ -70,16 +70,14 @@ STATUT_CHOICES = (
 
 
 class MandatHistoryMixin(HistoryMixin):
-    def get_history_step(cls, old, new, **kwargs):
-        old_fields = old.field_dict if old else {}
-        new_fields = new.field_dict
-        revision = new.revision
+    def get_history_step(cls, step, version, **kwargs):
+        revision = version.revision
         person = revision.user.person if revision.user else None
 
         res = {
             "modified": revision.date_created,
             "comment": revision.get_comment(),
-            "diff": cls.get_diff(old_fields, new_fields) if old_fields else [],
+            "diff": cls.get_diff(step["diff"]),
         }
 
         if person:
@@ -91,7 +89,7 @@ class MandatHistoryMixin(HistoryMixin):
         else:
             res["user"] = "Utilisateur inconnu"
 
-        if old is None:
+        if step["creation"]:
             res["title"] = "Création"
         else:
             res["title"] = "Modification"
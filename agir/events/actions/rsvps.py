@@ -9,8 +9,12 @@ from django.utils.translation import ugettext as _
 from agir.payments.actions.payments import create_payment, cancel_payment
 
 from ..apps import EventsConfig
-from ..models import RSVP, IdentifiedGuest, JitsiMeeting
-from ..tasks import send_rsvp_notification, send_guest_confirmation
+from ..models import Event, RSVP, IdentifiedGuest, JitsiMeeting
+from ..tasks import (
+    send_rsvp_notification,
+    send_guest_confirmation,
+    send_rsvp_notifications,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -38,14 +42,32 @@ MESSAGES = {
 }
 
 
+def _reserve_places(event, number):
+    """Vérifie qu'il reste `number` places à l'événement, et les lui réserve
+
+    La vérification est une mise à jour conditionnelle de la ligne de l'événement, qui
+    reste verrouillée jusqu'à la fin de la transaction en cours : les inscriptions
+    simultanées au même événement attendent que cette transaction soit validée ou
+    annulée, puis réévaluent la condition avec le compteur de participants à jour. La
+    jauge ne peut donc pas être dépassée.
+
+    Doit être appelée dans la transaction qui enregistre ensuite les inscriptions (et
+    met ainsi à jour le compteur de participants).
+    """
+    return (
+        Event.objects.filter(
+            pk=event.pk, all_attendee_count__lte=event.max_participants - number
+        ).update(all_attendee_count=F("all_attendee_count"))
+        == 1
+    )
+
+
 def _ensure_can_rsvp(event, number=0):
     if event.is_past():
         raise RSVPException(MESSAGES["finished"])
 
-    # does not try to prevent race conditions
     if event.max_participants is not None and number:
-        current_participants = event.participants
-        if current_participants + number > event.max_participants:
+        if not _reserve_places(event, number):
             raise RSVPException(MESSAGES["full"])
 
 
@@ -61,10 +83,6 @@ def _get_meta(event, form_submission, is_guest):
 
 # idempotent if not confirmed
 def _get_rsvp_for_event(event, person, form_submission, paying):
-    # TODO: add race conditions handling with explicit locking for maximum participants
-    # see https://www.caktusgroup.com/blog/2009/05/26/explicit-table-locking-with-postgresql-and-django/
-    # for potential solution
-
     if (event.subscription_form is None) != (form_submission is None):
         raise RSVPException(MESSAGES["submission_issue"])
 
@@ -98,6 +116,62 @@ def rsvp_to_free_event(event, person, form_submission=None):
         send_rsvp_notification.delay(rsvp.pk)
 
 
+def bulk_rsvp_to_free_event(event, people):
+    """Inscrit en une seule fois un grand nombre de personnes à un événement gratuit
+
+    Les personnes déjà inscrites sont ignorées. Les places nécessaires sont réservées
+    en une seule opération : si l'événement n'a pas assez de places pour tout le monde,
+    personne n'est inscrit. Les emails de confirmation sont envoyés par une seule tâche.
+
+    :param event: l'événement, qui doit être gratuit et sans formulaire d'inscription
+    :param people: les personnes à inscrire
+    :return: la liste des inscriptions créées ou réactivées
+    """
+    if not event.is_free or event.subscription_form is not None:
+        raise RSVPException(
+            "Seuls les événements gratuits et sans formulaire permettent les inscriptions groupées."
+        )
+
+    people = {person.pk: person for person in people}
+
+    with transaction.atomic():
+        existing = {
+            rsvp.person_id: rsvp
+            for rsvp in RSVP.objects.select_for_update().filter(
+                event=event, person_id__in=people
+            )
+        }
+        reactivated = [
+            rsvp for rsvp in existing.values() if rsvp.status == RSVP.STATUS_CANCELED
+        ]
+        new = [
+            RSVP(event=event, person=person, status=RSVP.STATUS_CONFIRMED)
+            for pk, person in people.items()
+            if pk not in existing
+        ]
+
+        _ensure_can_rsvp(event, len(reactivated) + len(new))
+
+        for rsvp in reactivated:
+            rsvp.status = RSVP.STATUS_CONFIRMED
+        RSVP.objects.bulk_update(reactivated, ["status"])
+        RSVP.objects.bulk_create(new)
+        # les opérations en masse ne déclenchent pas les signaux qui tiennent à jour les compteurs
+        Event.objects.filter(pk=event.pk).update_attendee_counts()
+
+        rsvps = reactivated + new
+        if rsvps:
+            transaction.on_commit(
+                partial(
+                    send_rsvp_notifications.delay,
+                    event.pk,
+                    [rsvp.pk for rsvp in rsvps],
+                )
+            )
+
+    return rsvps
+
+
 def rsvp_to_paid_event_and_create_payment(
     event, person, payment_mode, form_submission=None
 ):
@@ -180,6 +254,14 @@ def _add_identified_guest(event, person, submission, status):
 
     _ensure_can_rsvp(event, 1)
     RSVP.objects.filter(pk=rsvp.pk).update(guests=F("guests") + 1)
+    # la mise à jour ne déclenche pas de signal : l'invité supplémentaire est compté
+    # ici pour les événements sans formulaire (il l'est sinon à l'enregistrement de
+    # l'invité identifié)
+    Event.objects.filter(pk=event.pk).add_to_attendee_counts(
+        (1, 0), (int(rsvp.status == RSVP.STATUS_CONFIRMED), 0)
+    )
+    rsvp.guests += 1
+    rsvp._loaded_values["guests"] = rsvp.guests
     return IdentifiedGuest(rsvp=rsvp, submission=submission, status=status)
 
 
@@ -2,11 +2,16 @@ from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
+from agir.api.db_routers import use_replica, get_read_database
 from agir.events.models import Event
 from ..actions import events_to_csv_lines
 
 
 def export_events(modeladmin, request, queryset):
+    # la réponse est générée après la fin de la vue : la base doit être choisie ici
+    with use_replica():
+        queryset = queryset.using(get_read_database())
+
     response = StreamingHttpResponse(
         events_to_csv_lines(queryset), content_type="text/csv"
     )
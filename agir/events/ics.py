@@ -0,0 +1,105 @@
+"""Flux iCalendar des événements, des agendas et des groupes
+
+Les flux sont interrogés toutes les quelques minutes par les logiciels d'agenda : leur
+contenu sérialisé est conservé en cache et n'est regénéré qu'après une modification de
+l'un des événements qu'ils contiennent (voir `agir.events.signals`). Les réponses
+portent un `ETag` et un `Last-Modified`, pour que les clients reçoivent une réponse 304
+lorsque le flux n'a pas changé.
+
+Chaque flux en cache est associé à une version aléatoire, elle-même conservée en cache,
+et l'invalidation supprime la version plutôt que le flux : un flux généré avant une
+invalidation, mais enregistré après, l'est sous l'ancienne version et n'est donc jamais
+servi.
+
+Les flux des agendas et des groupes ne contiennent que les événements à venir et ceux
+terminés depuis moins de `FEED_PAST_WINDOW`.
+"""
+import hashlib
+import uuid
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+FEED_PAST_WINDOW = timedelta(days=90)
+FEED_CACHE_TIMEOUT = 3600
+
+FEED_EVENT = "event"
+FEED_CALENDAR = "calendar"
+FEED_GROUP = "group"
+
+
+def get_feed_version_key(kind, identifier):
+    return f"ics:{kind}:{identifier}:version"
+
+
+def get_feed_cache_key(kind, identifier, version):
+    return f"ics:{kind}:{identifier}:{version}"
+
+
+def bounded_events(queryset):
+    return queryset.filter(end_time__gte=timezone.now() - FEED_PAST_WINDOW).order_by(
+        "start_time"
+    )
+
+
+def get_feed_version(kind, identifier):
+    version_key = get_feed_version_key(kind, identifier)
+    version = cache.get(version_key)
+    if version is None:
+        # un autre processus a pu créer la version entre temps : c'est la sienne qui
+        # est conservée
+        cache.add(version_key, uuid.uuid4().hex, FEED_CACHE_TIMEOUT)
+        version = cache.get(version_key)
+    return version
+
+
+def get_feed(kind, identifier, build_calendar):
+    """Renvoie le flux depuis le cache, ou le génère avec `build_calendar`
+
+    :param kind: le type de flux (`FEED_EVENT`, `FEED_CALENDAR` ou `FEED_GROUP`)
+    :param identifier: l'identifiant de l'objet dans l'URL du flux
+    :param build_calendar: une fonction sans argument qui renvoie le `ics.Calendar`
+    :return: un dictionnaire avec le contenu, l'etag et la date de génération du flux
+    """
+    # la version est lue avant la génération du flux : si le flux est invalidé pendant
+    # la génération, il est enregistré sous une version qui n'est plus utilisée
+    key = get_feed_cache_key(kind, identifier, get_feed_version(kind, identifier))
+    feed = cache.get(key)
+
+    if feed is None:
+        content = str(build_calendar())
+        feed = {
+            "content": content,
+            "etag": hashlib.sha1(content.encode()).hexdigest(),
+            # la date de génération est postérieure à toute modification prise en compte
+            "last_modified": int(timezone.now().timestamp()),
+        }
+        cache.set(key, feed, FEED_CACHE_TIMEOUT)
+
+    return feed
+
+
+def feed_response(request, feed):
+    etag = quote_etag(feed["etag"])
+    response = get_conditional_response(
+        request, etag=etag, last_modified=feed["last_modified"]
+    )
+
+    if response is None:
+        response = HttpResponse(feed["content"], content_type="text/calendar")
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(feed["last_modified"])
+    return response
+
+
+def invalidate_feeds(kind, identifiers):
+    """Supprime les versions des flux du cache, une fois la transaction en cours validée"""
+    keys = [get_feed_version_key(kind, identifier) for identifier in identifiers]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,28 @@
+from django.core.management import BaseCommand
+
+from agir.events.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconcile the denormalized attendee counts of events with their RSVPs. "
+        "By default only events that are not finished yet are updated."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-a",
+            "--all",
+            action="store_true",
+            dest="all",
+            default=False,
+            help="Update all events, including past ones.",
+        )
+
+    def handle(self, *args, all, **options):
+        events = Event.objects.all()
+        if not all:
+            events = events.upcoming(published_only=False)
+
+        updated = events.update_attendee_counts()
+        self.stdout.write(f"{updated} event(s) updated.")
@@ -0,0 +1,72 @@
+from django.db import migrations, models
+
+BACKFILL_SQL = """
+WITH rsvps AS (
+    SELECT
+        r.event_id,
+        SUM(r.guests + 1) AS with_guests,
+        COUNT(*) AS without_guests,
+        SUM(r.guests + 1) FILTER (WHERE r.status = 'CO') AS confirmed_with_guests,
+        COUNT(*) FILTER (WHERE r.status = 'CO') AS confirmed_without_guests
+    FROM events_rsvp r
+    GROUP BY r.event_id
+), guests AS (
+    SELECT
+        r.event_id,
+        COUNT(*) AS all_guests,
+        COUNT(*) FILTER (WHERE g.status = 'CO') AS confirmed_guests
+    FROM events_rsvp_guests_form_submissions g
+    JOIN events_rsvp r ON r.id = g.rsvp_id
+    GROUP BY r.event_id
+), counts AS (
+    SELECT
+        e.id,
+        CASE WHEN e.subscription_form_id IS NULL
+            THEN COALESCE(rsvps.with_guests, 0)
+            ELSE COALESCE(rsvps.without_guests, 0) + COALESCE(guests.all_guests, 0)
+        END AS all_count,
+        CASE WHEN e.subscription_form_id IS NULL
+            THEN COALESCE(rsvps.confirmed_with_guests, 0)
+            ELSE COALESCE(rsvps.confirmed_without_guests, 0) + COALESCE(guests.confirmed_guests, 0)
+        END AS confirmed_count
+    FROM events_event e
+    LEFT JOIN rsvps ON rsvps.event_id = e.id
+    LEFT JOIN guests ON guests.event_id = e.id
+)
+UPDATE events_event e
+SET
+    all_attendee_count = counts.all_count,
+    confirmed_attendee_count = CASE WHEN e.payment_parameters IS NULL
+        THEN counts.all_count
+        ELSE counts.confirmed_count
+    END
+FROM counts
+WHERE counts.id = e.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0085_auto_20201021_1525"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="all_attendee_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Nombre de participants"
+            ),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="confirmed_attendee_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                verbose_name="Nombre de participants confirmés",
+            ),
+        ),
+        migrations.RunSQL(sql=BACKFILL_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations, models
+
+BACKFILL_SQL = """
+WITH RECURSIVE paths AS (
+    SELECT id, id::text || '/' AS path
+    FROM events_calendar
+    WHERE parent_id IS NULL
+  UNION ALL
+    SELECT c.id, p.path || c.id::text || '/'
+    FROM events_calendar AS c
+    JOIN paths AS p
+    ON c.parent_id = p.id
+)
+UPDATE events_calendar
+SET path = paths.path
+FROM paths
+WHERE events_calendar.id = paths.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0086_event_attendee_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="calendar",
+            name="path",
+            field=models.TextField(default="", editable=False),
+        ),
+        migrations.RunSQL(sql=BACKFILL_SQL, reverse_sql=migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name="calendar",
+            index=models.Index(
+                fields=["path"],
+                name="events_calendar_path_index",
+                opclasses=["text_pattern_ops"],
+            ),
+        ),
+    ]
@@ -9,8 +9,8 @@ from django.contrib.postgres.search import SearchVector, SearchRank
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.db import models
-from django.db.models import Case, Sum, Count, When, CharField, F, Q
-from django.db.models.functions import Coalesce
+from django.db.models import Case, Sum, Count, When, F, Q, Value
+from django.db.models.functions import Coalesce, Concat, Substr
 from django.template.defaultfilters import floatformat
 from django.utils import formats, timezone
 from django.utils.translation import ugettext_lazy as _
@@ -57,6 +57,17 @@ class EventQuerySet(models.QuerySet):
 
         return self.filter(condition)
 
+    def in_calendar(self, calendar):
+        """Filtre les événements de l'agenda ou de l'un de ses sous-agendas"""
+        return self.filter(
+            models.Exists(
+                CalendarItem.objects.filter(
+                    event_id=models.OuterRef("id"),
+                    calendar__path__startswith=calendar.path,
+                )
+            )
+        )
+
     def past(self, as_of=None, published_only=True):
         if as_of is None:
             as_of = timezone.now()
@@ -66,37 +77,78 @@ class EventQuerySet(models.QuerySet):
             condition &= models.Q(visibility=Event.VISIBILITY_PUBLIC)
         return self.filter(condition)
 
-    def with_participants(self):
-        confirmed_guests = Q(rsvps__identified_guests__status=RSVP.STATUS_CONFIRMED)
-        confirmed_rsvps = Q(rsvps__status=RSVP.STATUS_CONFIRMED)
-
-        return self.annotate(
-            all_attendee_count=Case(
-                When(
-                    subscription_form=None,
-                    then=Coalesce(Sum("rsvps__guests") + Count("rsvps"), 0),
+    def update_attendee_counts(self):
+        """Recalcule les compteurs de participants des événements à partir des inscriptions
+
+        Les compteurs sont normalement tenus à jour au fil des inscriptions : cette méthode
+        sert à les réconcilier régulièrement, et après les opérations en masse.
+        """
+        rsvps = RSVP.objects.filter(event_id=models.OuterRef("id")).order_by()
+        guests = IdentifiedGuest.objects.filter(
+            rsvp__event_id=models.OuterRef("id")
+        ).order_by()
+        confirmed = Q(status=RSVP.STATUS_CONFIRMED)
+
+        def aggregate(qs, group_by, aggregation):
+            return Coalesce(
+                models.Subquery(
+                    qs.values(group_by).annotate(v=aggregation).values("v"),
+                    output_field=models.IntegerField(),
                 ),
-                default=Coalesce(Count("rsvps__identified_guests") + Count("rsvps"), 0),
-                output_field=CharField(),
+                0,
             )
-        ).annotate(
+
+        with_guests = aggregate(rsvps, "event_id", Sum(F("guests") + 1))
+        without_guests = aggregate(rsvps, "event_id", Count("id")) + aggregate(
+            guests, "rsvp__event_id", Count("id")
+        )
+        confirmed_with_guests = aggregate(
+            rsvps.filter(confirmed), "event_id", Sum(F("guests") + 1)
+        )
+        confirmed_without_guests = aggregate(
+            rsvps.filter(confirmed), "event_id", Count("id")
+        ) + aggregate(guests.filter(confirmed), "rsvp__event_id", Count("id"))
+
+        return self.update(
+            all_attendee_count=Case(
+                When(subscription_form__isnull=True, then=with_guests),
+                default=without_guests,
+                output_field=models.IntegerField(),
+            ),
             confirmed_attendee_count=Case(
-                When(payment_parameters=None, then=F("all_attendee_count")),
                 When(
-                    subscription_form=None,
-                    then=Coalesce(
-                        Sum("rsvps__guests", filter=confirmed_rsvps)
-                        + Count("rsvps", filter=confirmed_rsvps),
-                        0,
-                    ),
-                ),
-                default=Coalesce(
-                    Count("rsvps__identified_guests", filter=confirmed_guests)
-                    + Count("rsvps", filter=confirmed_rsvps),
-                    0,
+                    payment_parameters__isnull=True,
+                    subscription_form__isnull=True,
+                    then=with_guests,
                 ),
-                output_field=CharField(),
-            )
+                When(payment_parameters__isnull=True, then=without_guests),
+                When(subscription_form__isnull=True, then=confirmed_with_guests),
+                default=confirmed_without_guests,
+                output_field=models.IntegerField(),
+            ),
+        )
+
+    def add_to_attendee_counts(self, all_delta, confirmed_delta):
+        """Met à jour les compteurs de participants d'après la variation due à une inscription
+
+        Chaque variation est un couple dont le premier élément s'applique aux événements
+        sans formulaire d'inscription (où les invités sont comptés avec `RSVP.guests`), et
+        le second aux événements avec formulaire (où les invités sont identifiés).
+        """
+        all_value = Case(
+            When(subscription_form__isnull=True, then=Value(all_delta[0])),
+            default=Value(all_delta[1]),
+            output_field=models.IntegerField(),
+        )
+        return self.update(
+            all_attendee_count=F("all_attendee_count") + all_value,
+            confirmed_attendee_count=F("confirmed_attendee_count")
+            + Case(
+                When(payment_parameters__isnull=True, then=all_value),
+                When(subscription_form__isnull=True, then=Value(confirmed_delta[0])),
+                default=Value(confirmed_delta[1]),
+                output_field=models.IntegerField(),
+            ),
         )
 
     def search(self, query):
@@ -299,6 +351,14 @@ class Event(
         encoder=CustomJSONEncoder,
     )
 
+    ATTENDEE_COUNTERS = ("all_attendee_count", "confirmed_attendee_count")
+    all_attendee_count = models.PositiveIntegerField(
+        "Nombre de participants", default=0, editable=False
+    )
+    confirmed_attendee_count = models.PositiveIntegerField(
+        "Nombre de participants confirmés", default=0, editable=False
+    )
+
     class Meta:
         verbose_name = _("événement")
         verbose_name_plural = _("événements")
@@ -338,24 +398,17 @@ class Event(
 
     @property
     def participants(self):
-        try:
-            return self.all_attendee_count
-        except AttributeError:
-            if self.subscription_form:
-                return (
-                    self.rsvps.annotate(
-                        identified_guests_count=Count("identified_guests")
-                    ).aggregate(participants=Sum(F("identified_guests_count") + 1))[
-                        "participants"
-                    ]
-                    or 0
-                )
-            return (
-                self.rsvps.aggregate(participants=Sum(models.F("guests") + 1))[
-                    "participants"
-                ]
-                or 0
-            )
+        return self.all_attendee_count
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # les compteurs de participants ne sont modifiés que par des mises à jour F() :
+        # une instance chargée avant une inscription ne doit pas écraser leur valeur
+        values = [
+            value for value in values if value[0].attname not in self.ATTENDEE_COUNTERS
+        ]
+        return super()._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update
+        )
 
     @property
     def type(self):
@@ -560,6 +613,9 @@ class Calendar(NationBuilderResource, ImageMixin):
     events = models.ManyToManyField(
         "Event", related_name="calendars", through="CalendarItem"
     )
+    # identifiants des ancêtres de l'agenda puis de l'agenda lui-même, séparés par des
+    # `/` : les sous-agendas sont ceux dont le chemin commence par celui de l'agenda
+    path = models.TextField(editable=False, default="")
 
     user_contributed = models.BooleanField(
         _("Les utilisateurs peuvent ajouter des événements"), default=False
@@ -582,10 +638,47 @@ class Calendar(NationBuilderResource, ImageMixin):
 
     class Meta:
         verbose_name = _("Agenda")
+        indexes = (
+            models.Index(
+                fields=["path"],
+                name="events_calendar_path_index",
+                opclasses=["text_pattern_ops"],
+            ),
+        )
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        parent_path = ""
+        if self.parent_id:
+            parent_path = (
+                Calendar.objects.filter(pk=self.parent_id)
+                .values_list("path", flat=True)
+                .first()
+            )
+        path = f"{parent_path}{self.pk}/"
+
+        if path != self.path:
+            if self.path:
+                # l'agenda a été déplacé : on réécrit le début du chemin de ses descendants
+                Calendar.objects.filter(path__startswith=self.path).update(
+                    path=Concat(
+                        Value(path),
+                        Substr("path", len(self.path) + 1),
+                        output_field=models.TextField(),
+                    )
+                )
+            else:
+                Calendar.objects.filter(pk=self.pk).update(path=path)
+            self.path = path
+
+    def descendants(self):
+        """Renvoie l'agenda et tous ses sous-agendas"""
+        return Calendar.objects.filter(path__startswith=self.path)
+
     def clean_fields(self, exclude=None):
         super().clean_fields()
 
@@ -697,6 +790,26 @@ class RSVP(ExportModelOperationsMixin("rsvp"), TimeStampedModel):
         verbose_name_plural = "RSVP"
         unique_together = ("event", "person")
 
+    ATTENDEE_COUNT_FIELDS = ("status", "guests")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # conservé pour calculer la variation des compteurs de participants lors de la sauvegarde
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_attendee_counts(self):
+        """Renvoie la contribution de cette inscription aux compteurs de participants
+
+        Voir `EventQuerySet.add_to_attendee_counts` pour le format des valeurs renvoyées.
+        """
+        confirmed = self.status == RSVP.STATUS_CONFIRMED
+        return (
+            (1 + self.guests, 1),
+            (confirmed * (1 + self.guests), int(confirmed)),
+        )
+
     def __str__(self):
         info = "{person} --> {event} ({guests} invités)".format(
             person=self.person, event=self.event, guests=self.guests
@@ -741,6 +854,18 @@ class IdentifiedGuest(ExportModelOperationsMixin("identified_guest"), models.Mod
         db_table = "events_rsvp_guests_form_submissions"
         unique_together = ("rsvp", "submission")
 
+    ATTENDEE_COUNT_FIELDS = ("status",)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_attendee_counts(self):
+        confirmed = self.status == RSVP.STATUS_CONFIRMED
+        return (0, 1), (0, int(confirmed))
+
 
 class OrganizerConfig(ExportModelOperationsMixin("organizer_config"), models.Model):
     person = models.ForeignKey(
@@ -1,7 +1,23 @@
-from django.db.models.signals import pre_save
+from django.db.models.signals import (
+    pre_save,
+    post_save,
+    post_delete,
+    pre_delete,
+    m2m_changed,
+)
+from django.db.models.functions import Substr
 from django.dispatch import receiver
 
-from agir.events.models import Event
+from agir.events import ics
+from agir.events.models import (
+    Event,
+    RSVP,
+    IdentifiedGuest,
+    Calendar,
+    CalendarItem,
+    OrganizerConfig,
+)
+from agir.groups.models import SupportGroup
 from agir.lib.utils import front_url
 from agir.notifications.models import Notification
 
@@ -14,3 +30,186 @@ def delete_event_notification(sender, instance, raw, **kwargs):
         Notification.objects.filter(
             link=front_url("view_event", args=[instance.pk])
         ).delete()
+
+
+NO_ATTENDEE = ((0, 0), (0, 0))
+
+
+def _previous_attendee_counts(instance):
+    loaded_values = getattr(instance, "_loaded_values", {})
+    if any(f not in loaded_values for f in instance.ATTENDEE_COUNT_FIELDS):
+        return None
+    return type(instance)(
+        **{f: loaded_values[f] for f in instance.ATTENDEE_COUNT_FIELDS}
+    ).get_attendee_counts()
+
+
+def _update_attendee_counts(event_id, previous, current):
+    """Répercute sur l'événement la variation de la contribution d'une inscription"""
+    events = Event.objects.filter(pk=event_id)
+
+    if previous is None:
+        # l'état précédent est inconnu : on recalcule entièrement les compteurs
+        events.update_attendee_counts()
+        return
+
+    all_delta, confirmed_delta = (
+        tuple(c - p for c, p in zip(current_part, previous_part))
+        for current_part, previous_part in zip(current, previous)
+    )
+
+    if any(all_delta) or any(confirmed_delta):
+        events.add_to_attendee_counts(all_delta, confirmed_delta)
+
+
+def _attendee_post_save(event_id, instance, created, raw):
+    if raw:
+        previous = None
+    elif created:
+        previous = NO_ATTENDEE
+    else:
+        previous = _previous_attendee_counts(instance)
+
+    _update_attendee_counts(event_id, previous, instance.get_attendee_counts())
+    instance._loaded_values = {
+        f.attname: getattr(instance, f.attname) for f in instance._meta.concrete_fields
+    }
+
+
+@receiver(post_save, sender=RSVP, dispatch_uid="rsvp_update_attendee_counts")
+def rsvp_update_attendee_counts(sender, instance, created, raw, **kwargs):
+    _attendee_post_save(instance.event_id, instance, created, raw)
+
+
+@receiver(
+    post_save,
+    sender=IdentifiedGuest,
+    dispatch_uid="identified_guest_update_attendee_counts",
+)
+def identified_guest_update_attendee_counts(sender, instance, created, raw, **kwargs):
+    _attendee_post_save(instance.rsvp.event_id, instance, created, raw)
+
+
+@receiver(post_delete, sender=RSVP, dispatch_uid="rsvp_delete_attendee_counts")
+def rsvp_delete_attendee_counts(sender, instance, **kwargs):
+    _update_attendee_counts(
+        instance.event_id, instance.get_attendee_counts(), NO_ATTENDEE
+    )
+
+
+@receiver(
+    post_delete,
+    sender=IdentifiedGuest,
+    dispatch_uid="identified_guest_delete_attendee_counts",
+)
+def identified_guest_delete_attendee_counts(sender, instance, **kwargs):
+    _update_attendee_counts(
+        instance.rsvp.event_id, instance.get_attendee_counts(), NO_ATTENDEE
+    )
+
+
+def _invalidate_calendar_feeds(calendar_ids):
+    ics.invalidate_feeds(
+        ics.FEED_CALENDAR,
+        Calendar.objects.filter(pk__in=calendar_ids).values_list("slug", flat=True),
+    )
+
+
+def _invalidate_event_feeds(event):
+    ics.invalidate_feeds(ics.FEED_EVENT, [event.pk])
+    _invalidate_calendar_feeds(
+        CalendarItem.objects.filter(event=event).values("calendar_id")
+    )
+    ics.invalidate_feeds(
+        ics.FEED_GROUP,
+        list(
+            OrganizerConfig.objects.filter(event=event, as_group__isnull=False)
+            .values_list("as_group_id", flat=True)
+            .distinct()
+        ),
+    )
+
+
+@receiver(post_save, sender=Event, dispatch_uid="event_invalidate_ics_feeds")
+def event_invalidate_ics_feeds(sender, instance, raw, **kwargs):
+    if not raw:
+        _invalidate_event_feeds(instance)
+
+
+@receiver(pre_delete, sender=Event, dispatch_uid="event_delete_invalidate_ics_feeds")
+def event_delete_invalidate_ics_feeds(sender, instance, **kwargs):
+    # avant la suppression, tant que les liens vers les agendas et les groupes existent
+    _invalidate_event_feeds(instance)
+
+
+@receiver(post_delete, sender=Calendar, dispatch_uid="calendar_update_children_path")
+def calendar_update_children_path(sender, instance, **kwargs):
+    # les sous-agendas directs deviennent des agendas racines
+    if instance.path:
+        Calendar.objects.filter(path__startswith=instance.path).update(
+            path=Substr("path", len(instance.path) + 1)
+        )
+
+
+@receiver(pre_save, sender=Calendar, dispatch_uid="calendar_save_ics_feeds")
+def calendar_invalidate_ics_feeds(sender, instance, raw, **kwargs):
+    # on invalide le flux sous le slug actuellement enregistré, qui peut être modifié
+    if instance.pk is not None and not raw:
+        _invalidate_calendar_feeds([instance.pk])
+
+
+@receiver(post_delete, sender=Calendar, dispatch_uid="calendar_delete_ics_feeds")
+def calendar_delete_invalidate_ics_feeds(sender, instance, **kwargs):
+    ics.invalidate_feeds(ics.FEED_CALENDAR, [instance.slug])
+
+
+@receiver(post_save, sender=CalendarItem, dispatch_uid="calendar_item_save_ics_feeds")
+@receiver(
+    post_delete, sender=CalendarItem, dispatch_uid="calendar_item_delete_ics_feeds"
+)
+def calendar_item_invalidate_ics_feeds(sender, instance, **kwargs):
+    _invalidate_calendar_feeds([instance.calendar_id])
+
+
+@receiver(
+    m2m_changed, sender=Calendar.events.through, dispatch_uid="calendar_ics_feeds"
+)
+def calendar_events_invalidate_ics_feeds(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if not reverse:
+        _invalidate_calendar_feeds([instance.pk])
+    elif pk_set:
+        _invalidate_calendar_feeds(pk_set)
+    else:
+        _invalidate_calendar_feeds(instance.calendar_items.values("calendar_id"))
+
+
+@receiver(
+    post_save, sender=OrganizerConfig, dispatch_uid="organizer_config_save_ics_feeds"
+)
+@receiver(
+    post_delete,
+    sender=OrganizerConfig,
+    dispatch_uid="organizer_config_delete_ics_feeds",
+)
+def organizer_config_invalidate_ics_feeds(sender, instance, **kwargs):
+    if instance.as_group_id:
+        ics.invalidate_feeds(ics.FEED_GROUP, [instance.as_group_id])
+
+
+@receiver(post_save, sender=SupportGroup, dispatch_uid="group_invalidate_ics_feeds")
+def group_invalidate_ics_feeds(sender, instance, raw, **kwargs):
+    # un groupe désactivé ne doit plus servir son flux
+    if not raw:
+        ics.invalidate_feeds(ics.FEED_GROUP, [instance.pk])
+
+
+@receiver(
+    post_delete, sender=SupportGroup, dispatch_uid="group_delete_invalidate_ics_feeds"
+)
+def group_delete_invalidate_ics_feeds(sender, instance, **kwargs):
+    ics.invalidate_feeds(ics.FEED_GROUP, [instance.pk])
@@ -194,6 +194,76 @@ def send_rsvp_notification(rsvp_pk):
     )
 
 
+@emailing_task
+def send_rsvp_notifications(event_pk, rsvp_pks):
+    """Envoie en une seule fois les confirmations d'une inscription groupée
+
+    Les participants reçoivent leur confirmation par une même connexion SMTP, et les
+    organisateurs ne reçoivent qu'une seule notification pour l'ensemble du lot.
+    """
+    try:
+        event = Event.objects.get(pk=event_pk)
+    except Event.DoesNotExist:
+        return
+
+    rsvps = list(
+        RSVP.objects.filter(event=event, pk__in=rsvp_pks).select_related("person")
+    )
+    if not rsvps:
+        return
+
+    attendee_bindings = {
+        "EVENT_NAME": event.name,
+        "EVENT_SCHEDULE": event.get_display_date(),
+        "CONTACT_NAME": event.contact_name,
+        "CONTACT_EMAIL": event.contact_email,
+        "LOCATION_NAME": event.location_name,
+        "LOCATION_ADDRESS": event.short_address,
+        "EVENT_LINK": front_url("view_event", auto_login=False, args=[event.pk]),
+    }
+
+    send_mosaico_email(
+        code="EVENT_RSVP_CONFIRMATION",
+        subject=_("Confirmation de votre participation à l'événement"),
+        from_email=settings.EMAIL_FROM,
+        recipients=[rsvp.person for rsvp in rsvps],
+        bindings=attendee_bindings,
+        attachments=(
+            {
+                "filename": "event.ics",
+                "content": str(ics.Calendar(events=[event.to_ics()])),
+                "mimetype": "text/calendar",
+            },
+        ),
+    )
+
+    if event.rsvps.count() > 50:
+        return
+
+    attendees = {rsvp.person_id for rsvp in rsvps}
+    recipients = [
+        organizer_config.person
+        for organizer_config in event.organizer_configs.filter(
+            notifications_enabled=True
+        ).select_related("person")
+        if organizer_config.person_id not in attendees
+    ]
+
+    organizer_bindings = {
+        "EVENT_NAME": event.name,
+        "PERSON_INFORMATION": ", ".join(str(rsvp.person) for rsvp in rsvps),
+        "MANAGE_EVENT_LINK": front_url("manage_event", kwargs={"pk": event.pk}),
+    }
+
+    send_mosaico_email(
+        code="EVENT_RSVP_NOTIFICATION",
+        subject=_("De nouveaux participants à l'un de vos événements"),
+        from_email=settings.EMAIL_FROM,
+        recipients=recipients,
+        bindings=organizer_bindings,
+    )
+
+
 @emailing_task
 def send_guest_confirmation(rsvp_pk):
     try:
@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from agir.people.models import Person
+
+from ..actions.rsvps import (
+    bulk_rsvp_to_free_event,
+    rsvp_to_free_event,
+    RSVPException,
+)
+from ..models import Event, RSVP
+
+
+class BulkRSVPTestCase(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.event = Event.objects.create(
+            name="Grand meeting",
+            start_time=now + timezone.timedelta(days=1),
+            end_time=now + timezone.timedelta(days=1, hours=2),
+            max_participants=3,
+        )
+        self.people = [
+            Person.objects.create_insoumise(f"person{i}@domain.com") for i in range(4)
+        ]
+
+    @mock.patch("agir.events.actions.rsvps.transaction.on_commit", lambda f: f())
+    @mock.patch("agir.events.actions.rsvps.send_rsvp_notifications")
+    def test_can_rsvp_many_people_at_once(self, send_rsvp_notifications):
+        # les inscriptions annulées sont comptées dans le nombre de participants
+        self.event.max_participants = 4
+        self.event.save()
+        RSVP.objects.create(
+            event=self.event, person=self.people[0], status=RSVP.STATUS_CANCELED
+        )
+
+        rsvps = bulk_rsvp_to_free_event(self.event, self.people[:3])
+
+        self.assertEqual(len(rsvps), 3)
+        self.assertEqual(
+            RSVP.objects.filter(event=self.event, status=RSVP.STATUS_CONFIRMED).count(),
+            3,
+        )
+        send_rsvp_notifications.delay.assert_called_once_with(
+            self.event.pk, [rsvp.pk for rsvp in rsvps]
+        )
+
+    @mock.patch("agir.events.actions.rsvps.send_rsvp_notifications")
+    def test_bulk_rsvp_is_all_or_nothing_when_event_is_full(
+        self, send_rsvp_notifications
+    ):
+        with self.assertRaises(RSVPException):
+            bulk_rsvp_to_free_event(self.event, self.people)
+
+        self.assertFalse(RSVP.objects.filter(event=self.event).exists())
+
+    @mock.patch("agir.events.actions.rsvps.send_rsvp_notification")
+    @mock.patch("agir.events.actions.rsvps.send_rsvp_notifications")
+    def test_counter_prevents_overselling(
+        self, send_rsvp_notifications, send_rsvp_notification
+    ):
+        bulk_rsvp_to_free_event(self.event, self.people[:2])
+        rsvp_to_free_event(self.event, self.people[2])
+
+        with self.assertRaises(RSVPException):
+            rsvp_to_free_event(self.event, self.people[3])
+
+        RSVP.objects.get(event=self.event, person=self.people[0]).delete()
+        rsvp_to_free_event(self.event, self.people[3])
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participants, 3)
@@ -1,10 +1,13 @@
+from unittest.mock import patch
+
 from django.test import TestCase
 from django.db import IntegrityError, transaction
 from django.utils import timezone
 
 from agir.people.models import Person
 
-from ..models import Event, Calendar, RSVP
+from ..actions.rsvps import add_free_identified_guest
+from ..models import Event, Calendar, CalendarItem, RSVP
 
 
 class BasicEventTestCase(TestCase):
@@ -32,6 +35,52 @@ class BasicEventTestCase(TestCase):
                 Event.objects.create(name="Event test 2", end_time=self.end_time)
 
 
+class CalendarTreeTestCase(TestCase):
+    def setUp(self):
+        self.root = Calendar.objects.create_calendar("Racine")
+        self.child = Calendar.objects.create_calendar("Enfant", parent=self.root)
+        self.grandchild = Calendar.objects.create_calendar(
+            "Petit-enfant", parent=self.child
+        )
+        self.other = Calendar.objects.create_calendar("Autre")
+
+    def assertDescendants(self, calendar, expected):
+        calendar.refresh_from_db()
+        self.assertCountEqual(calendar.descendants(), expected)
+
+    def test_descendants(self):
+        self.assertDescendants(self.root, [self.root, self.child, self.grandchild])
+        self.assertDescendants(self.child, [self.child, self.grandchild])
+        self.assertDescendants(self.other, [self.other])
+
+    def test_reparenting_moves_subtree(self):
+        self.child.parent = self.other
+        self.child.save()
+
+        self.assertDescendants(self.root, [self.root])
+        self.assertDescendants(self.other, [self.other, self.child, self.grandchild])
+
+    def test_deleting_parent_makes_children_roots(self):
+        self.root.delete()
+
+        self.assertDescendants(self.child, [self.child, self.grandchild])
+        self.child.refresh_from_db()
+        self.assertEqual(self.child.path, f"{self.child.pk}/")
+
+    def test_upcoming_events_in_calendar(self):
+        now = timezone.now()
+        event = Event.objects.create(
+            name="Événement",
+            start_time=now + timezone.timedelta(days=1),
+            end_time=now + timezone.timedelta(days=1, hours=2),
+        )
+        CalendarItem.objects.create(event=event, calendar=self.grandchild)
+        CalendarItem.objects.create(event=event, calendar=self.child)
+
+        self.assertEqual(list(Event.objects.upcoming().in_calendar(self.root)), [event])
+        self.assertFalse(Event.objects.in_calendar(self.other).exists())
+
+
 class RSVPTestCase(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -68,6 +117,7 @@ class RSVPTestCase(TestCase):
     def test_participants_count(self):
         RSVP.objects.create(person=self.person, event=self.event, guests=10)
 
+        self.event.refresh_from_db()
         self.assertEqual(self.event.participants, 11)
 
         RSVP.objects.create(
@@ -75,4 +125,81 @@ class RSVPTestCase(TestCase):
             event=self.event,
         )
 
+        self.event.refresh_from_db()
         self.assertEqual(self.event.participants, 12)
+
+    def test_attendee_counts_are_kept_up_to_date(self):
+        self.event.payment_parameters = {"price": 1000}
+        self.event.save()
+
+        rsvp = RSVP.objects.create(
+            person=self.person,
+            event=self.event,
+            guests=2,
+            status=RSVP.STATUS_AWAITING_PAYMENT,
+        )
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.all_attendee_count, 3)
+        self.assertEqual(self.event.confirmed_attendee_count, 0)
+
+        rsvp = RSVP.objects.get(pk=rsvp.pk)
+        rsvp.status = RSVP.STATUS_CONFIRMED
+        rsvp.save()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.all_attendee_count, 3)
+        self.assertEqual(self.event.confirmed_attendee_count, 3)
+
+        rsvp.guests = 1
+        rsvp.save()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.all_attendee_count, 2)
+        self.assertEqual(self.event.confirmed_attendee_count, 2)
+
+        rsvp.delete()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.all_attendee_count, 0)
+        self.assertEqual(self.event.confirmed_attendee_count, 0)
+
+    def test_saving_stale_event_keeps_attendee_counts(self):
+        stale_event = Event.objects.get(pk=self.event.pk)
+        RSVP.objects.create(person=self.person, event=self.event, guests=1)
+
+        stale_event.name = "Nouveau nom"
+        stale_event.save()
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.name, "Nouveau nom")
+        self.assertEqual(self.event.all_attendee_count, 2)
+        self.assertEqual(self.event.confirmed_attendee_count, 2)
+
+    @patch("agir.events.actions.rsvps.send_guest_confirmation")
+    def test_guest_added_without_form_is_counted(self, send_guest_confirmation):
+        self.event.allow_guests = True
+        self.event.save()
+        RSVP.objects.create(person=self.person, event=self.event)
+
+        guest = add_free_identified_guest(self.event, self.person, None)
+
+        self.assertEqual(guest.rsvp.guests, 1)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.all_attendee_count, 2)
+        self.assertEqual(self.event.confirmed_attendee_count, 2)
+
+        # l'inscription en mémoire ne doit pas annuler l'ajout de l'invité
+        guest.rsvp.notifications_enabled = False
+        guest.rsvp.save()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.all_attendee_count, 2)
+        self.assertEqual(RSVP.objects.get(pk=guest.rsvp.pk).guests, 1)
+
+    def test_update_attendee_counts(self):
+        RSVP.objects.create(person=self.person, event=self.event, guests=1)
+        Event.objects.filter(pk=self.event.pk).update(
+            all_attendee_count=0, confirmed_attendee_count=0
+        )
+
+        Event.objects.filter(pk=self.event.pk).update_attendee_counts()
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.all_attendee_count, 2)
+        self.assertEqual(self.event.confirmed_attendee_count, 2)
@@ -3,16 +3,18 @@ from unittest import mock
 
 from datetime import timedelta
 
+import ics
 from django.contrib.gis.geos import Point
 from django.core.exceptions import ValidationError
 from django.contrib import messages
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils import timezone, formats
 from django.utils.http import urlencode
 
 from rest_framework.reverse import reverse
 from rest_framework import status
 
+from agir.api.redis import using_separate_redis_server
 from agir.authentication.tokens import subscription_confirmation_token_generator
 from agir.carte.views import EventMapView
 from agir.events.actions import legal
@@ -21,6 +23,7 @@ from agir.events.tasks import (
     send_guest_confirmation,
     send_rsvp_notification,
 )
+from agir.front.sitemaps import update_sitemaps
 from agir.groups.models import SupportGroup, Membership
 from agir.lib.tests.mixins import FakeDataMixin
 from agir.lib.utils import front_url
@@ -28,6 +31,7 @@ from agir.payments.actions.payments import complete_payment
 from agir.payments.models import Payment
 from agir.people.models import Person, PersonForm, PersonFormSubmission, PersonTag
 
+from .. import ics as ics_feeds
 from ..forms import EventForm
 from ..models import (
     Event,
@@ -723,6 +727,7 @@ class RSVPTestCase(TestCase):
         )
         self.assertRedirects(response, url)
         self.assertIn(self.person, self.simple_event.attendees.all())
+        self.simple_event.refresh_from_db()
         self.assertEqual(2, self.simple_event.participants)
 
         rsvp_notification.delay.assert_called_once()
@@ -735,6 +740,7 @@ class RSVPTestCase(TestCase):
         )
         self.assertRedirects(res, reverse("dashboard"))
         self.assertNotIn(self.person, self.simple_event.attendees.all())
+        self.simple_event.refresh_from_db()
         self.assertEqual(1, self.simple_event.participants)
 
     def test_can_view_rsvp(self):
@@ -743,6 +749,7 @@ class RSVPTestCase(TestCase):
         url = reverse("view_event", kwargs={"pk": self.simple_event.pk})
         response = self.client.get(url)
         self.assertIn("Inscription confirmée", response.content.decode())
+        self.simple_event.refresh_from_db()
         self.assertEqual(1, self.simple_event.participants)
 
     def test_cannot_rsvp_if_max_participants_reached(self):
@@ -767,6 +774,7 @@ class RSVPTestCase(TestCase):
         self.assertEqual(msgs[0].level, messages.ERROR)
         self.assertIn("complet.", msgs[0].message)
 
+        self.simple_event.refresh_from_db()
         self.assertEqual(1, self.simple_event.participants)
 
     @mock.patch("agir.events.actions.rsvps.send_guest_confirmation")
@@ -782,6 +790,7 @@ class RSVPTestCase(TestCase):
         self.assertRedirects(
             response, reverse("view_event", kwargs={"pk": self.simple_event.pk})
         )
+        self.simple_event.refresh_from_db()
         self.assertEqual(2, self.simple_event.participants)
 
         msgs = list(messages.get_messages(response.wsgi_request))
@@ -803,6 +812,7 @@ class RSVPTestCase(TestCase):
         self.assertRedirects(
             response, reverse("view_event", kwargs={"pk": self.simple_event.pk})
         )
+        self.simple_event.refresh_from_db()
         self.assertEqual(1, self.simple_event.participants)
 
         msgs = list(messages.get_messages(response.wsgi_request))
@@ -823,6 +833,7 @@ class RSVPTestCase(TestCase):
         self.assertRedirects(
             response, reverse("view_event", kwargs={"pk": self.simple_event.pk})
         )
+        self.simple_event.refresh_from_db()
         self.assertEqual(1, self.simple_event.participants)
 
         msgs = list(messages.get_messages(response.wsgi_request))
@@ -848,6 +859,7 @@ class RSVPTestCase(TestCase):
         self.person.refresh_from_db()
         self.assertIn(self.person, self.form_event.attendees.all())
         self.assertEqual(self.person.meta["custom-field"], "another custom value")
+        self.form_event.refresh_from_db()
         self.assertEqual(2, self.form_event.participants)
 
         rsvp_notification.delay.assert_called_once()
@@ -892,6 +904,7 @@ class RSVPTestCase(TestCase):
         msgs = list(messages.get_messages(response.wsgi_request))
         self.assertEqual(msgs[0].level, messages.SUCCESS)
 
+        self.form_event.refresh_from_db()
         self.assertEqual(2, self.form_event.participants)
 
         guest_confirmation.delay.assert_called_once()
@@ -915,6 +928,7 @@ class RSVPTestCase(TestCase):
         msgs = list(messages.get_messages(response.wsgi_request))
         self.assertEqual(msgs[0].level, messages.ERROR)
 
+        self.form_event.refresh_from_db()
         self.assertEqual(1, self.form_event.participants)
 
     @mock.patch("django.db.transaction.on_commit")
@@ -1117,6 +1131,7 @@ class RSVPTestCase(TestCase):
         complete_payment(payment)
         event_notification_listener(payment)
 
+        self.form_paying_event.refresh_from_db()
         self.assertEqual(2, self.form_paying_event.participants)
 
         on_commit.assert_called_once()
@@ -1203,6 +1218,7 @@ class RSVPTestCase(TestCase):
         self.person.refresh_from_db()
         self.assertIn(self.person, self.form_event.attendees.all())
         self.assertEqual(self.person.meta["custom-field"], "another custom value")
+        self.form_event.refresh_from_db()
         self.assertEqual(2, self.form_event.participants)
 
         rsvp_notification.delay.assert_called_once()
@@ -1280,6 +1296,7 @@ class RSVPTestCase(TestCase):
         self.person.refresh_from_db()
         self.assertIn(self.person, self.form_event.attendees.all())
         self.assertEqual(self.person.meta["custom-field"], "another custom value")
+        self.form_event.refresh_from_db()
         self.assertEqual(2, self.form_event.participants)
 
         rsvp_notification.delay.assert_called_once()
@@ -1390,6 +1407,94 @@ class CalendarPageTestCase(TestCase):
         self.assertContains(res, 'href="/agenda/my_calendar/?page=1')
 
 
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+@mock.patch("agir.events.ics.transaction.on_commit", lambda f: f())
+class CalendarIcsTestCase(TestCase):
+    def setUp(self):
+        self.calendar = Calendar.objects.create(name="My calendar", slug="my_calendar")
+
+        now = timezone.now()
+        self.upcoming_event = Event.objects.create(
+            name="Événement à venir",
+            start_time=now + timedelta(days=1),
+            end_time=now + timedelta(days=1, hours=2),
+        )
+        self.old_event = Event.objects.create(
+            name="Vieil événement",
+            start_time=now - timedelta(days=400),
+            end_time=now - timedelta(days=400) + timedelta(hours=2),
+        )
+        for event in (self.upcoming_event, self.old_event):
+            CalendarItem.objects.create(event=event, calendar=self.calendar)
+
+        self.url = reverse("ics_calendar", kwargs={"slug": "my_calendar"})
+
+    def test_feed_only_contains_recent_events(self):
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertContains(res, str(self.upcoming_event.pk))
+        self.assertNotContains(res, str(self.old_event.pk))
+
+    def test_conditional_requests_get_not_modified(self):
+        res = self.client.get(self.url)
+        etag = res["ETag"]
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.upcoming_event.name = "Nouveau nom"
+        self.upcoming_event.save()
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertContains(res, "Nouveau nom")
+
+    def test_feed_is_served_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_feed_invalidated_while_built_is_not_served(self):
+        def build_calendar():
+            # une modification est validée pendant la génération du flux
+            self.upcoming_event.name = "Nouveau nom"
+            self.upcoming_event.save()
+            return ics.Calendar()
+
+        ics_feeds.get_feed(ics_feeds.FEED_CALENDAR, "my_calendar", build_calendar)
+
+        res = self.client.get(self.url)
+        self.assertContains(res, "Nouveau nom")
+
+    def test_deleted_calendar_feed_is_not_served(self):
+        self.client.get(self.url)
+        self.calendar.delete()
+
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_feed_is_not_served_under_previous_slug(self):
+        self.client.get(self.url)
+        self.calendar.slug = "new_slug"
+        self.calendar.save()
+
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deleted_group_feed_is_not_served(self):
+        group = SupportGroup.objects.create(name="Groupe")
+        url = reverse("ics_group", kwargs={"pk": group.pk})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        group.delete()
+
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
 class ExternalRSVPTestCase(TestCase):
     def setUp(self):
         self.now = now = timezone.now().astimezone(timezone.get_default_timezone())
@@ -1544,7 +1649,10 @@ class DoNotListEventTestCase(TestCase):
         self.assertNotContains(response, "Un événement qui sera non listé")
         pass
 
+    @using_separate_redis_server
+    @mock.patch("agir.front.signals.transaction.on_commit", lambda f: f())
     def test_unlisted_events_are_not_in_sitemap(self):
+        update_sitemaps(full=True)
         response = self.client.get(
             reverse(
                 "django.contrib.sitemaps.views.sitemap", kwargs={"section": "events"}
@@ -1554,6 +1662,7 @@ class DoNotListEventTestCase(TestCase):
 
         self.event.do_not_list = True
         self.event.save()
+        update_sitemaps()
 
         response = self.client.get(
             reverse(
@@ -1,17 +1,20 @@
+from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.generics import ListAPIView
 
+from agir.api.db_routers import read_from_replica
 from agir.events.filters import EventAPIFilter
 from agir.events.models import Event
 from agir.events.serializers import EventSerializer
-from agir.lib.pagination import APIPaginator
+from agir.lib.pagination import KeysetPagination
 
 __all__ = ["EventSearchAPIView"]
 
 
+@method_decorator(read_from_replica, name="dispatch")
 class EventSearchAPIView(ListAPIView):
     queryset = Event.objects.all()
     filter_backends = (DjangoFilterBackend,)
     filterset_class = EventAPIFilter
     serializer_class = EventSerializer
-    pagination_class = APIPaginator
+    pagination_class = KeysetPagination
@@ -1,9 +1,10 @@
 import ics
 from django.conf import settings
-from django.http import Http404, HttpResponse
+from django.http import Http404
 from django.utils import timezone
 from django.views.generic import ListView, DetailView
 
+from agir.events import ics as ics_feeds
 from agir.events.models import Calendar, Event
 from agir.front.view_mixins import ObjectOpengraphMixin
 from agir.lib.views import IframableMixin
@@ -30,54 +31,34 @@ class CalendarView(IframableMixin, ObjectOpengraphMixin, ListView):
         return super().get(request, *args, **kwargs)
 
     def get_queryset(self):
-        calendar_ids = self.get_calendar_ids(self.calendar.id)
-
         return (
             Event.objects.upcoming(as_of=timezone.now())
-            .filter(calendar_items__calendar_id__in=calendar_ids)
+            .in_calendar(self.calendar)
             .order_by("start_time", "id")
-            .distinct("start_time", "id")
         )
 
     def get_context_data(self, **kwargs):
-        # get all ids of calendar that are either the one selected, or children of it
         return super().get_context_data(
             default_event_image=settings.DEFAULT_EVENT_IMAGE, calendar=self.calendar
         )
 
-    @staticmethod
-    def get_calendar_ids(parent_id):
-        ids = Calendar.objects.raw(
-            """
-        WITH RECURSIVE children AS (
-            SELECT id
-            FROM events_calendar
-            WHERE id = %s
-          UNION ALL
-            SELECT c.id
-            FROM events_calendar AS c
-            JOIN children
-            ON c.parent_id = children.id
-        )
-        SELECT id FROM children;
-        """,
-            [parent_id],
-        )
-
-        return list(ids)
-
 
 class CalendarIcsView(DetailView):
     model = Calendar
 
-    def render_to_response(self, context, **response_kwargs):
-        calendar = ics.Calendar(
+    def get(self, request, *args, **kwargs):
+        feed = ics_feeds.get_feed(
+            ics_feeds.FEED_CALENDAR, kwargs["slug"], self.build_calendar
+        )
+        return ics_feeds.feed_response(request, feed)
+
+    def build_calendar(self):
+        self.object = self.get_object()
+        return ics.Calendar(
             events=[
                 event.to_ics()
-                for event in self.object.events.filter(
-                    visibility=Event.VISIBILITY_PUBLIC
+                for event in ics_feeds.bounded_events(
+                    self.object.events.filter(visibility=Event.VISIBILITY_PUBLIC)
                 )
             ]
         )
-
-        return HttpResponse(calendar, content_type="text/calendar")
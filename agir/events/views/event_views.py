@@ -6,7 +6,6 @@ from django.http import (
     Http404,
     HttpResponseRedirect,
     JsonResponse,
-    HttpResponse,
     HttpResponseGone,
 )
 from django.template import loader
@@ -31,6 +30,7 @@ from agir.authentication.view_mixins import (
     GlobalOrObjectPermissionRequiredMixin,
     SoftLoginRequiredMixin,
 )
+from agir.events import ics as ics_feeds
 from agir.events.actions.legal import ASKED_QUESTIONS
 from agir.events.actions.rsvps import assign_jitsi_meeting
 from agir.front.view_mixins import (
@@ -305,10 +305,14 @@ class UploadEventImageView(
 class EventIcsView(BaseEventDetailView):
     model = Event
 
-    def render_to_response(self, context, **response_kwargs):
-        ics_calendar = ics.Calendar(events=[context["event"].to_ics()])
-
-        return HttpResponse(ics_calendar, content_type="text/calendar")
+    def get(self, request, *args, **kwargs):
+        # les permissions ont déjà été vérifiées dans `dispatch`
+        feed = ics_feeds.get_feed(
+            ics_feeds.FEED_EVENT,
+            kwargs["pk"],
+            lambda: ics.Calendar(events=[self.get_object().to_ics()]),
+        )
+        return ics_feeds.feed_response(request, feed)
 
 
 # CREATION VIEWS
@@ -0,0 +1,18 @@
+from django.core.management import BaseCommand
+
+from agir.front.sitemaps import update_sitemaps
+
+
+class Command(BaseCommand):
+    help = "Regenerate the sitemap pages whose objects changed, and the sitemap index"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-f",
+            "--full",
+            action="store_true",
+            help="Recompute the page boundaries and regenerate every page",
+        )
+
+    def handle(self, *args, full, **options):
+        self.stdout.write(f"{update_sitemaps(full=full)} page(s) regenerated")
@@ -0,0 +1,27 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from agir.front.sitemaps import sitemaps, mark_object_changed
+
+
+def sitemap_object_changed(sender, instance, raw=False, section=None, **kwargs):
+    if not raw:
+        transaction.on_commit(partial(mark_object_changed, section, instance.pk))
+
+
+for section, sitemap_class in sitemaps.items():
+    handler = partial(sitemap_object_changed, section=section)
+    post_save.connect(
+        handler,
+        sender=sitemap_class.model,
+        weak=False,
+        dispatch_uid=f"sitemap_{section}_save",
+    )
+    post_delete.connect(
+        handler,
+        sender=sitemap_class.model,
+        weak=False,
+        dispatch_uid=f"sitemap_{section}_delete",
+    )
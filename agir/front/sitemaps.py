@@ -1,12 +1,40 @@
+"""Plans du site, générés à l'avance et servis depuis Redis
+
+Les pages des plans de site sont découpées selon la clé primaire des objets : la page
+`i` contient les objets dont la clé est comprise entre la `i`-ième borne et la suivante.
+Les bornes sont recalculées lors d'une génération complète (commande
+`update_sitemaps --full`), et restent fixes entre deux générations complètes : une
+modification d'objet ne nécessite alors de regénérer que la page qui le contient.
+
+Les vues ne font que lire le contenu déjà rendu dans Redis, sans aucune requête à la
+base de données.
+"""
+import json
+import logging
+from bisect import bisect_right
+from urllib.parse import urljoin
+from uuid import UUID
+
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
+from django.template.loader import render_to_string
 from django.urls import reverse
+from redis import RedisError
 
+from agir.api.redis import get_auth_redis_client
+from agir.lib.utils import front_url
 from agir.municipales.models import CommunePage
 from ..events.models import Event
 from ..groups.models import SupportGroup
 
+logger = logging.getLogger(__name__)
+
+SITEMAP_PAGE_SIZE = 5000
+SITEMAP_KEY_PREFIX = "Sitemap:"
+
 
 class EventSitemap(Sitemap):
+    model = Event
     changefreq = "always"
 
     def items(self):
@@ -20,6 +48,7 @@ class EventSitemap(Sitemap):
 
 
 class SupportGroupSitemap(Sitemap):
+    model = SupportGroup
     changefreq = "always"
 
     def items(self):
@@ -33,6 +62,7 @@ class SupportGroupSitemap(Sitemap):
 
 
 class CommunesSitemap(Sitemap):
+    model = CommunePage
     changefreq = "always"
 
     def items(self):
@@ -53,3 +83,148 @@ sitemaps = {
     "groups": SupportGroupSitemap,
     "communes": CommunesSitemap,
 }
+
+
+def get_index_key():
+    return f"{SITEMAP_KEY_PREFIX}index"
+
+
+def get_page_key(section, page):
+    return f"{SITEMAP_KEY_PREFIX}{section}:{page}"
+
+
+def get_bounds_key(section):
+    return f"{SITEMAP_KEY_PREFIX}{section}:bounds"
+
+
+def get_dirty_key(section):
+    return f"{SITEMAP_KEY_PREFIX}{section}:dirty"
+
+
+def _json_key(pk):
+    # l'ordre lexicographique des UUID en minuscules est celui de PostgreSQL
+    return str(pk) if isinstance(pk, UUID) else pk
+
+
+def get_page_bounds(section):
+    """Renvoie les bornes des pages de la section, ou `None` si elle n'a pas été générée
+
+    La première borne vaut toujours `None` : la première page n'a pas de borne inférieure.
+    """
+    bounds = get_auth_redis_client().get(get_bounds_key(section))
+    return json.loads(bounds) if bounds is not None else None
+
+
+def compute_page_bounds(sitemap):
+    pks = sitemap.items().order_by("pk").values_list("pk", flat=True)
+    return [None] + [
+        _json_key(pk)
+        for i, pk in enumerate(pks.iterator())
+        if i and i % SITEMAP_PAGE_SIZE == 0
+    ]
+
+
+def render_page(sitemap, bounds, page):
+    items = sitemap.items().order_by("pk")
+    if page > 0:
+        items = items.filter(pk__gte=bounds[page])
+    if page + 1 < len(bounds):
+        items = items.filter(pk__lt=bounds[page + 1])
+
+    urlset = [
+        {
+            "item": item,
+            "location": urljoin(settings.FRONT_DOMAIN, sitemap.location(item)),
+            "lastmod": sitemap.lastmod(item),
+            "changefreq": sitemap.changefreq,
+        }
+        for item in items.iterator()
+    ]
+    return render_to_string("sitemap.xml", {"urlset": urlset})
+
+
+def render_index(page_counts):
+    locations = []
+    for section, count in page_counts.items():
+        url = front_url(
+            "django.contrib.sitemaps.views.sitemap",
+            kwargs={"section": section},
+            auto_login=False,
+        )
+        locations.append(url)
+        locations.extend(f"{url}?p={page}" for page in range(2, count + 1))
+
+    return render_to_string("sitemap_index.xml", {"sitemaps": locations})
+
+
+def _pop_dirty_pages(section):
+    pipeline = get_auth_redis_client().pipeline()
+    pipeline.smembers(get_dirty_key(section))
+    pipeline.delete(get_dirty_key(section))
+    members, _ = pipeline.execute()
+    return sorted(int(page) for page in members)
+
+
+def update_sitemaps(full=False):
+    """Regénère les pages des plans de site modifiées depuis la dernière mise à jour
+
+    :param full: s'il faut recalculer le découpage en pages et regénérer toutes les pages
+    :return: le nombre de pages regénérées
+    """
+    client = get_auth_redis_client()
+    page_counts = {}
+    rendered = 0
+
+    for section, sitemap_class in sitemaps.items():
+        sitemap = sitemap_class()
+        previous_bounds = get_page_bounds(section)
+
+        if full or previous_bounds is None:
+            # les objets modifiés pendant la génération sont marqués après le recalcul
+            client.delete(get_dirty_key(section))
+            bounds = compute_page_bounds(sitemap)
+            pages = range(len(bounds))
+        else:
+            bounds = previous_bounds
+            pages = [p for p in _pop_dirty_pages(section) if p < len(bounds)]
+
+        pipeline = client.pipeline()
+        for page in pages:
+            pipeline.set(
+                get_page_key(section, page), render_page(sitemap, bounds, page)
+            )
+        if previous_bounds is not None:
+            for page in range(len(bounds), len(previous_bounds)):
+                pipeline.delete(get_page_key(section, page))
+        pipeline.set(get_bounds_key(section), json.dumps(bounds))
+        pipeline.execute()
+
+        page_counts[section] = len(bounds)
+        rendered += len(pages)
+
+    client.set(get_index_key(), render_index(page_counts))
+    return rendered
+
+
+def mark_object_changed(section, pk):
+    """Marque comme à regénérer la page de la section qui contient l'objet"""
+    try:
+        bounds = get_page_bounds(section)
+        if bounds is None:
+            # la section sera entièrement générée à la prochaine mise à jour
+            return
+        page = bisect_right(bounds[1:], _json_key(pk))
+        get_auth_redis_client().sadd(get_dirty_key(section), page)
+    except RedisError:
+        # la page sera regénérée lors de la prochaine génération complète
+        logger.warning(
+            "Impossible de marquer la page du plan de site à regénérer", exc_info=True
+        )
+
+
+def get_rendered_index():
+    return get_auth_redis_client().get(get_index_key())
+
+
+def get_rendered_page(section, page):
+    return get_auth_redis_client().get(get_page_key(section, page))
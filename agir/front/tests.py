@@ -6,7 +6,9 @@ from django.test import TestCase
 from django.utils import timezone
 from rest_framework import status
 
+from ..api.redis import using_separate_redis_server
 from ..events.models import Event, OrganizerConfig
+from .sitemaps import update_sitemaps
 from ..groups.models import SupportGroup, Membership
 from ..people.models import Person, PersonTag
 from ..polls.models import Poll, PollOption, PollChoice
@@ -142,6 +144,54 @@ class NBUrlsTestCase(TestCase):
         self.assertEqual(response.status_code, 404)
 
 
+@using_separate_redis_server
+@mock.patch("agir.front.sitemaps.SITEMAP_PAGE_SIZE", 2)
+@mock.patch("agir.front.signals.transaction.on_commit", lambda f: f())
+class SitemapTestCase(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.groups = sorted(
+            (SupportGroup.objects.create(name=f"Groupe {i}") for i in range(5)),
+            key=lambda g: g.pk,
+        )
+        self.event = Event.objects.create(
+            name="Événement",
+            start_time=now + timedelta(days=1),
+            end_time=now + timedelta(days=1, hours=2),
+        )
+        self.url = reverse(
+            "django.contrib.sitemaps.views.sitemap", kwargs={"section": "groups"}
+        )
+
+    def test_sitemaps_are_served_without_database_access(self):
+        update_sitemaps(full=True)
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/sitemap.xml")
+        self.assertContains(response, f"{self.url}?p=3")
+        self.assertNotContains(response, f"{self.url}?p=4")
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {"p": 3})
+        self.assertContains(response, str(self.groups[4].pk))
+        self.assertNotContains(response, str(self.groups[0].pk))
+
+        response = self.client.get(self.url, {"p": 4})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_only_changed_pages_are_regenerated(self):
+        update_sitemaps(full=True)
+        self.assertEqual(update_sitemaps(), 0)
+
+        self.groups[2].published = False
+        self.groups[2].save()
+
+        self.assertEqual(update_sitemaps(), 1)
+        response = self.client.get(self.url, {"p": 2})
+        self.assertContains(response, str(self.groups[3].pk))
+        self.assertNotContains(response, str(self.groups[2].pk))
+
+
 class PollTestCase(TestCase):
     def setUp(self):
         self.person = Person.objects.create_insoumise(
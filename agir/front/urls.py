@@ -1,10 +1,8 @@
 from django.conf import settings
-from django.contrib.sitemaps.views import sitemap, index as sitemap_index
 from django.urls import reverse_lazy, path, re_path
 from django.views.generic import RedirectView
 
 from .views import NSPView
-from ..front.sitemaps import sitemaps
 from . import views
 
 urlpatterns = [
@@ -12,11 +10,10 @@ urlpatterns = [
     # https://lafranceinsoumise.fr/
     path("homepage/", RedirectView.as_view(url=settings.MAIN_DOMAIN), name="homepage"),
     # sitemap
-    path("sitemap.xml", sitemap_index, {"sitemaps": sitemaps}),
+    path("sitemap.xml", views.sitemap_index),
     path(
         "sitemap-<section>.xml",
-        sitemap,
-        {"sitemaps": sitemaps},
+        views.sitemap,
         name="django.contrib.sitemaps.views.sitemap",
     ),
     # old redirections
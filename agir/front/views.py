@@ -6,6 +6,7 @@ from django.views.generic import View, RedirectView
 from ..events.models import Event
 from ..groups.models import SupportGroup
 from ..lib.http import add_query_params_to_url
+from . import sitemaps
 
 
 class NBUrlsView(View):
@@ -92,3 +93,22 @@ class NSPView(RedirectView):
             )
 
         return url
+
+
+def sitemap_index(request):
+    content = sitemaps.get_rendered_index()
+    if content is None:
+        raise Http404()
+    return HttpResponse(content, content_type="application/xml")
+
+
+def sitemap(request, section):
+    try:
+        page = int(request.GET.get("p", 1))
+    except ValueError:
+        raise Http404()
+
+    content = page > 0 and sitemaps.get_rendered_page(section, page - 1)
+    if not content:
+        raise Http404()
+    return HttpResponse(content, content_type="application/xml")
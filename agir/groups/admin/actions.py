@@ -2,10 +2,15 @@ from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.utils.translation import ugettext as _
 
+from agir.api.db_routers import use_replica, get_read_database
 from ..actions import groups_to_csv_lines
 
 
 def export_groups(modeladmin, request, queryset):
+    # la réponse est générée après la fin de la vue : la base doit être choisie ici
+    with use_replica():
+        queryset = queryset.using(get_read_database())
+
     response = StreamingHttpResponse(
         groups_to_csv_lines(queryset), content_type="text/csv"
     )
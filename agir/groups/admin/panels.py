@@ -3,7 +3,7 @@ from datetime import timedelta
 from django.conf import settings
 from django.contrib import admin
 from django.contrib.gis.admin import OSMGeoAdmin
-from django.db.models import Count, Q, QuerySet
+from django.db.models import Count, F, Q, QuerySet
 from django.db.models.expressions import RawSQL
 from django.urls import path
 from django.urls import reverse
@@ -292,10 +292,7 @@ class SupportGroupAdmin(CenterOnFranceMixin, OSMGeoAdmin):
                 'SELECT COUNT(*) FROM "groups_membership" WHERE "supportgroup_id" = "groups_supportgroup"."id"',
                 (),
             ),
-            allocation=RawSQL(
-                'SELECT SUM(amount) FROM "donations_operation" WHERE "group_id" = "groups_supportgroup"."id"',
-                (),
-            ),
+            allocation=F("balance__amount"),
         )
 
     def get_search_results(self, request, queryset, search_term):
@@ -0,0 +1,17 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("groups", "0041_auto_20201021_1525"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="membership",
+            index=models.Index(fields=["created"], name="membership_created_index"),
+        ),
+    ]
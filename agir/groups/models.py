@@ -235,6 +235,7 @@ class Membership(ExportModelOperationsMixin("membership"), TimeStampedModel):
         verbose_name = _("adhésion")
         verbose_name_plural = _("adhésions")
         unique_together = ("supportgroup", "person")
+        indexes = (models.Index(fields=["created"], name="membership_created_index"),)
 
     def __str__(self):
         return _("{person} --> {supportgroup},  ({type})").format(
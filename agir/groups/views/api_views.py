@@ -1,23 +1,26 @@
+from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.generics import ListAPIView
 
+from agir.api.db_routers import read_from_replica
 from agir.groups.filters import GroupAPIFilterSet
 from agir.groups.models import SupportGroup, SupportGroupSubtype
 from agir.groups.serializers import (
     SupportGroupSerializer,
     SupportGroupSubtypeSerializer,
 )
-from agir.lib.pagination import APIPaginator
+from agir.lib.pagination import KeysetPagination
 
 __all__ = ["GroupSearchAPIView", "GroupSubtypesView"]
 
 
+@method_decorator(read_from_replica, name="dispatch")
 class GroupSearchAPIView(ListAPIView):
     queryset = SupportGroup.objects.active()
     filter_backends = (DjangoFilterBackend,)
     filterset_class = GroupAPIFilterSet
     serializer_class = SupportGroupSerializer
-    pagination_class = APIPaginator
+    pagination_class = KeysetPagination
 
 
 class GroupSubtypesView(ListAPIView):
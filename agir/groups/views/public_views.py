@@ -8,7 +8,6 @@ from django.http import (
     HttpResponseForbidden,
     HttpResponseRedirect,
     HttpResponseBadRequest,
-    HttpResponse,
     Http404,
 )
 from django.urls import reverse_lazy, reverse
@@ -21,6 +20,7 @@ from agir.authentication.view_mixins import (
     GlobalOrObjectPermissionRequiredMixin,
     HardLoginRequiredMixin,
 )
+from agir.events import ics as ics_feeds
 from agir.front.view_mixins import ObjectOpengraphMixin, FilterView
 from agir.groups.filters import GroupFilterSet
 from agir.groups.forms import ExternalJoinForm
@@ -111,8 +111,15 @@ class SupportGroupDetailView(
 class SupportGroupIcsView(DetailView):
     queryset = SupportGroup.objects.active().all()
 
-    def render_to_response(self, context, **response_kwargs):
-        calendar = ics.Calendar(
+    def get(self, request, *args, **kwargs):
+        feed = ics_feeds.get_feed(
+            ics_feeds.FEED_GROUP, kwargs["pk"], self.build_calendar
+        )
+        return ics_feeds.feed_response(request, feed)
+
+    def build_calendar(self):
+        self.object = self.get_object()
+        return ics.Calendar(
             events=[
                 ics.event.Event(
                     name=event.name,
@@ -123,12 +130,12 @@ class SupportGroupIcsView(DetailView):
                     location=event.short_address,
                     url=front_url("view_event", args=[event.pk], auto_login=False),
                 )
-                for event in context["supportgroup"].organized_events.all()
+                for event in ics_feeds.bounded_events(
+                    self.object.organized_events.distinct()
+                )
             ]
         )
 
-        return HttpResponse(calendar, content_type="text/calendar")
-
 
 class QuitSupportGroupView(
     HardLoginRequiredMixin, GlobalOrObjectPermissionRequiredMixin, DeleteView
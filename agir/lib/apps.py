@@ -3,3 +3,24 @@ from django.apps import AppConfig
 
 class LibConfig(AppConfig):
     name = "agir.lib"
+
+    def ready(self):
+        from django.core.signals import request_started, request_finished
+        from reversion.signals import post_revision_commit
+
+        from agir.api.db_connections import (
+            check_idle_connections,
+            mark_connections_idle,
+        )
+        from .history import store_revision_history_steps
+
+        request_started.connect(
+            check_idle_connections, dispatch_uid="check_idle_connections"
+        )
+        request_finished.connect(
+            mark_connections_idle, dispatch_uid="mark_connections_idle"
+        )
+
+        post_revision_commit.connect(
+            store_revision_history_steps, dispatch_uid="store_revision_history_steps"
+        )
@@ -1,39 +1,178 @@
+import hashlib
+import shutil
 import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import os
+from django.conf import settings
+from prometheus_client import Counter, Histogram
 
+WKHTMLTOPDF_ARGS = ["wkhtmltopdf", "--quiet", "--encoding", "utf-8"]
+PDF_CACHE_DIRECTORY = "cache/pdf"
 
-def html_to_pdf(html_content, dest_path=None):
+rendering_duration = Histogram(
+    "agir_pdf_rendering_seconds",
+    "Durée de génération des documents PDF",
+    ["renderer"],
+    buckets=(0.25, 0.5, 1, 2, 3, 5, 8, 10, 15, 30),
+)
+cache_requests = Counter(
+    "agir_pdf_cache_requests_total",
+    "Recherches dans le cache de documents PDF",
+    ["result"],
+)
+
+_executor = None
+
+
+def _get_executor():
+    # le pool de threads est créé une seule fois par processus, pour que tous les lots
+    # se partagent la même limite de processus wkhtmltopdf simultanés
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PDF_RENDERING_WORKERS,
+            thread_name_prefix="wkhtmltopdf",
+        )
+    return _executor
+
+
+def _get_cache_directory():
+    return Path(settings.MEDIA_ROOT) / PDF_CACHE_DIRECTORY
+
+
+def _get_cache_path(html_content):
+    key = hashlib.sha256(
+        "\0".join([*WKHTMLTOPDF_ARGS, html_content]).encode()
+    ).hexdigest()
+    return _get_cache_directory() / key[:2] / f"{key}.pdf"
+
+
+def _copy_file(source, dest_path):
+    Path(dest_path).parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(source, dest_path)
+
+
+def _copy_from_cache(cache_path, dest_path):
+    try:
+        _copy_file(cache_path, dest_path)
+        # la date de modification sert de date de dernière utilisation pour l'éviction
+        os.utime(cache_path)
+    except FileNotFoundError:
+        # le document a été supprimé du cache entre temps
+        return False
+    return True
+
+
+def _store_in_cache(source, cache_path):
+    # le document est copié dans un fichier temporaire du même répertoire, puis renommé :
+    # un autre processus ne peut donc jamais lire un document partiellement copié
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=cache_path.parent, suffix=".tmp", delete=False
+    ) as tmp:
+        try:
+            with open(source, "rb") as f:
+                shutil.copyfileobj(f, tmp)
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+    os.replace(tmp.name, cache_path)
+
+
+def clear_pdf_cache(max_age):
+    """Supprime du cache les documents PDF inutilisés depuis plus de `max_age` secondes
+
+    :return: le nombre de fichiers supprimés
+    """
+    limit = time.time() - max_age
+    deleted = 0
+    for path in _get_cache_directory().glob("*/*"):
+        try:
+            if path.stat().st_mtime < limit:
+                path.unlink()
+                deleted += 1
+        except FileNotFoundError:
+            pass
+    return deleted
+
+
+def html_to_pdf(html_content, dest_path=None, cache=False):
+    """Génère un document PDF à partir d'un contenu HTML avec wkhtmltopdf
+
+    :param html_content: le contenu HTML du document
+    :param dest_path: le chemin du fichier PDF à créer ; si omis, le contenu du PDF est
+      disponible dans l'attribut `stdout` de la valeur de retour
+    :param cache: s'il faut réutiliser un document déjà généré pour le même contenu HTML,
+      à n'utiliser que pour des documents susceptibles d'être générés plusieurs fois à
+      l'identique
+    :return: le `CompletedProcess` de wkhtmltopdf, ou `None` si le document a été trouvé
+      dans le cache
+    """
     if dest_path is None:
         dest_path = "-"
+        cache = False
 
-    process = subprocess.run(
-        ["wkhtmltopdf", "--encoding", "utf-8", "-", dest_path],
-        input=html_content.encode(),
-        capture_output=True,
-        timeout=10,
-        check=True,
-    )
+    if cache:
+        cache_path = _get_cache_path(html_content)
+        if cache_path.exists() and _copy_from_cache(cache_path, dest_path):
+            cache_requests.labels("hit").inc()
+            return None
+        cache_requests.labels("miss").inc()
+
+    with rendering_duration.labels("wkhtmltopdf").time():
+        process = subprocess.run(
+            [*WKHTMLTOPDF_ARGS, "-", str(dest_path)],
+            input=html_content.encode(),
+            capture_output=True,
+            timeout=10,
+            check=True,
+        )
+
+    if cache:
+        _store_in_cache(dest_path, cache_path)
 
     return process
 
 
+def html_to_pdf_many(documents, cache=False):
+    """Génère plusieurs documents PDF en parallèle
+
+    Les documents sont répartis entre un nombre limité de processus wkhtmltopdf
+    simultanés (paramètre `PDF_RENDERING_WORKERS`).
+
+    :param documents: un itérable de couples `(html_content, dest_path)`
+    :param cache: voir `html_to_pdf`
+    :return: la liste des exceptions levées pour chaque document, ou `None` pour les
+      documents générés avec succès, dans l'ordre des documents
+    """
+    futures = [
+        _get_executor().submit(html_to_pdf, html_content, dest_path, cache)
+        for html_content, dest_path in documents
+    ]
+    return [f.exception() for f in futures]
+
+
 def join_pdf_documents(pdfs, dest_path):
 
     os.makedirs(os.path.dirname(dest_path), exist_ok=True)
 
     # https://stackoverflow.com/questions/2507766/merge-convert-multiple-pdf-files-into-one-pdf
 
-    process = subprocess.run(
-        [
-            "ghostscript",
-            "-dBATCH",  # Causes Ghostscript to exit after processing all files
-            "-dNOPAUSE",  # Disables the prompt and pause at the end of each page.
-            "-q",  # Quiet startup
-            "-sDEVICE=pdfwrite",  # Sélectionne la sortie en PDF
-            f"-sOutputFile={dest_path}",
-            *[str(p) for p in pdfs],
-        ]
-    )
+    with rendering_duration.labels("ghostscript").time():
+        process = subprocess.run(
+            [
+                "ghostscript",
+                "-dBATCH",  # Causes Ghostscript to exit after processing all files
+                "-dNOPAUSE",  # Disables the prompt and pause at the end of each page.
+                "-q",  # Quiet startup
+                "-sDEVICE=pdfwrite",  # Sélectionne la sortie en PDF
+                f"-sOutputFile={dest_path}",
+                *[str(p) for p in pdfs],
+            ]
+        )
 
     return process
@@ -1,32 +1,198 @@
-from itertools import chain
+"""Historique des modifications des objets versionnés avec django-reversion
+
+Comparer deux versions successives d'un objet nécessite de les désérialiser toutes les
+deux. Pour ne le faire qu'une fois, la différence entre chaque version et la précédente
+est calculée à l'enregistrement de la révision, et conservée dans Redis pendant
+`HISTORY_STEP_TTL` secondes sous une forme compacte : les noms des champs modifiés et
+les valeurs des seuls champs nécessaires à l'affichage (`HISTORY_FIELDS`).
+
+Les étapes absentes de Redis (versions antérieures, étapes expirées, perte des données)
+sont recalculées à la lecture ; la commande `compute_history_steps` permet de toutes les
+précalculer.
+"""
+import json
+import logging
 from typing import Optional
 
+from django.core.serializers.json import DjangoJSONEncoder
+from redis import RedisError
 from reversion.models import Version
 
+from agir.api.redis import get_auth_redis_client
+
+logger = logging.getLogger(__name__)
+
+HISTORY_STEP_PREFIX = "HistoryStep:"
+HISTORY_STEP_TTL = 90 * 24 * 3600
+
 
 class HistoryMixin:
     DIFFED_FIELDS = []
+    # champs dont `get_history_step` a besoin de connaître la valeur à chaque version
+    HISTORY_FIELDS = []
+    # nombre d'étapes affichées par défaut sur les pages d'historique
+    HISTORY_PAGE_SIZE = 20
 
     @classmethod
-    def get_history_step(cls, old: Optional[Version], new: Version, **kwargs):
+    def get_history_step(cls, step: dict, version: Version, **kwargs):
+        """Construit l'étape d'historique à afficher
+
+        :param step: l'étape précalculée, avec les clés `creation` (s'il s'agit de la
+          première version), `diff` (les noms des champs de `DIFFED_FIELDS` modifiés),
+          `old` et `new` (les valeurs des champs de `HISTORY_FIELDS` dans la version
+          précédente et dans cette version)
+        :param version: la version, avec sa révision
+        """
         raise NotImplementedError("Cette méthode doit être implémentée")
 
     @classmethod
-    def get_diff(cls, before, after):
-        return [
-            str(cls._meta.get_field(f).verbose_name)
-            for f in cls.DIFFED_FIELDS
-            if after.get(f) != before.get(f)
-        ]
+    def get_diff(cls, fields):
+        return [str(cls._meta.get_field(f).verbose_name) for f in fields]
 
-    def get_history(self, **kwargs):
+    def get_history(self, *, last=None, **kwargs):
+        """Renvoie les étapes de l'historique de l'objet, de la plus ancienne à la dernière
+
+        :param last: le nombre d'étapes à renvoyer, en partant de la dernière, `None`
+          pour renvoyer tout l'historique
+        """
         versions = list(
             Version.objects.get_for_object(self)
-            .order_by("pk")
+            .order_by("-pk")
             .select_related("revision__user__person")
+            .defer("serialized_data", "object_repr")[:last]
         )
+        versions.reverse()
+        steps = get_history_steps(type(self), self.pk, versions)
 
         return [
-            self.get_history_step(previous_version, version)
-            for previous_version, version in zip(chain([None], versions[:-1]), versions)
+            self.get_history_step(steps[version.pk], version, **kwargs)
+            for version in versions
         ]
+
+    def get_history_page(self, full=False, **kwargs):
+        """Renvoie les dernières étapes de l'historique à afficher
+
+        :param full: s'il faut renvoyer tout l'historique, plutôt que les
+          `HISTORY_PAGE_SIZE` dernières étapes
+        :return: un couple formé de la liste des étapes, et d'un booléen qui indique si
+          des étapes plus anciennes ont été omises
+        """
+        if full:
+            return self.get_history(**kwargs), False
+
+        history = self.get_history(last=self.HISTORY_PAGE_SIZE + 1, **kwargs)
+        return history[-self.HISTORY_PAGE_SIZE :], len(history) > self.HISTORY_PAGE_SIZE
+
+
+def get_step_key(version_id):
+    return f"{HISTORY_STEP_PREFIX}{version_id}"
+
+
+def compute_history_step(model, old: Optional[Version], new: Version):
+    """Calcule l'étape d'historique entre deux versions, sous forme sérialisée"""
+    old_fields = old.field_dict if old else {}
+    new_fields = new.field_dict
+
+    return json.dumps(
+        {
+            "creation": old is None,
+            "diff": [
+                f
+                for f in model.DIFFED_FIELDS
+                if old_fields and new_fields.get(f) != old_fields.get(f)
+            ],
+            "old": {f: old_fields.get(f) for f in model.HISTORY_FIELDS if old_fields},
+            "new": {f: new_fields.get(f) for f in model.HISTORY_FIELDS},
+        },
+        cls=DjangoJSONEncoder,
+    )
+
+
+def load_history_step(model, serialized):
+    step = json.loads(serialized)
+    for values in (step["old"], step["new"]):
+        for f, value in values.items():
+            values[f] = model._meta.get_field(f).to_python(value)
+    return step
+
+
+def store_history_steps(steps):
+    if not steps:
+        return
+    try:
+        pipeline = get_auth_redis_client().pipeline(transaction=False)
+        for version_id, step in steps.items():
+            pipeline.set(get_step_key(version_id), step, ex=HISTORY_STEP_TTL)
+        pipeline.execute()
+    except RedisError:
+        # les étapes seront recalculées à la prochaine lecture
+        logger.warning("Impossible d'enregistrer l'historique", exc_info=True)
+
+
+def compute_object_history(model, object_id, version_ids=None):
+    """Calcule et enregistre les étapes d'historique d'un objet
+
+    :param version_ids: les versions pour lesquelles calculer l'étape, `None` pour toutes
+    :return: un dictionnaire des étapes sérialisées, par identifiant de version
+    """
+    versions = Version.objects.get_for_object_reference(model, object_id).order_by("pk")
+    if version_ids is not None:
+        versions = versions.filter(pk__lte=max(version_ids))
+
+    steps = {}
+    previous = None
+    for version in versions.iterator():
+        # `field_dict` n'est désérialisé que pour les versions réellement comparées
+        if version_ids is None or version.pk in version_ids:
+            steps[version.pk] = compute_history_step(model, previous, version)
+        previous = version
+
+    store_history_steps(steps)
+    return steps
+
+
+def get_history_steps(model, object_id, versions):
+    """Renvoie les étapes d'historique des versions d'un même objet, par identifiant"""
+    if not versions:
+        return {}
+
+    try:
+        serialized = get_auth_redis_client().mget(
+            [get_step_key(version.pk) for version in versions]
+        )
+    except RedisError:
+        logger.warning("Impossible de lire l'historique", exc_info=True)
+        serialized = [None] * len(versions)
+
+    steps = {
+        version.pk: step
+        for version, step in zip(versions, serialized)
+        if step is not None
+    }
+
+    missing = {version.pk for version in versions if version.pk not in steps}
+    if missing:
+        steps.update(compute_object_history(model, object_id, missing))
+
+    return {
+        version_id: load_history_step(model, step) for version_id, step in steps.items()
+    }
+
+
+def store_revision_history_steps(sender, revision, versions, **kwargs):
+    """Précalcule les étapes d'historique des versions d'une nouvelle révision"""
+    steps = {}
+    for version in versions:
+        model = version._model
+        if model is None or not issubclass(model, HistoryMixin):
+            continue
+
+        previous = (
+            Version.objects.get_for_object_reference(model, version.object_id)
+            .filter(pk__lt=version.pk)
+            .order_by("-pk")
+            .first()
+        )
+        steps[version.pk] = compute_history_step(model, previous, version)
+
+    store_history_steps(steps)
@@ -0,0 +1,193 @@
+"""Mesure des performances de chaque vue et de chaque tâche Celery
+
+Pendant le traitement d'une requête (voir `agir.lib.middleware.PerformanceMiddleware`)
+ou l'exécution d'une tâche (voir `agir.api.celery`), on compte les requêtes SQL et leur
+durée, les accès au cache et la durée du rendu des templates. Ces mesures sont exportées
+vers Prometheus par nom de vue et par nom de tâche.
+
+Pour une fraction `PERFORMANCE_SAMPLE_RATE` des requêtes et des tâches, on conserve en
+plus le nombre et la durée cumulée des requêtes SQL par forme de requête : si le
+traitement dépasse `PERFORMANCE_SLOW_THRESHOLD` secondes, un résumé des formes les plus
+coûteuses est journalisé.
+"""
+import logging
+import random
+import re
+import threading
+from collections import defaultdict
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django_redis.cache import RedisCache
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+SLOW_LOG_QUERIES = 10
+
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+duration = Histogram(
+    "agir_perf_seconds",
+    "Durée totale de traitement",
+    ["kind", "name"],
+    buckets=SECONDS_BUCKETS,
+)
+db_queries = Histogram(
+    "agir_perf_db_queries",
+    "Nombre de requêtes SQL",
+    ["kind", "name"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+db_seconds = Histogram(
+    "agir_perf_db_seconds",
+    "Durée cumulée des requêtes SQL",
+    ["kind", "name"],
+    buckets=SECONDS_BUCKETS,
+)
+template_seconds = Histogram(
+    "agir_perf_template_seconds",
+    "Durée du rendu des templates",
+    ["kind", "name"],
+    buckets=SECONDS_BUCKETS,
+)
+cache_accesses = Counter(
+    "agir_perf_cache_accesses", "Accès au cache", ["kind", "name", "result"],
+)
+
+KIND_VIEW = "view"
+KIND_TASK = "task"
+
+_state = threading.local()
+
+_placeholders_re = re.compile(r"%s(?:, %s)+")
+
+
+def get_current_measurement():
+    return getattr(_state, "measurement", None)
+
+
+def fingerprint(sql):
+    # les clauses IN de longueurs différentes correspondent à la même forme de requête
+    return _placeholders_re.sub("%s, ...", sql)
+
+
+class Measurement:
+    """Mesures collectées pendant le traitement d'une requête ou d'une tâche"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.start = None
+        self.duration = None
+        self.query_count = 0
+        self.query_time = 0.0
+        # `None` si aucune réponse n'a été rendue à partir d'un template
+        self.template_time = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.queries = (
+            defaultdict(lambda: [0, 0.0])
+            if random.random() < settings.PERFORMANCE_SAMPLE_RATE
+            else None
+        )
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        # utilisé comme wrapper d'exécution des requêtes SQL
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            self.query_count += 1
+            self.query_time += elapsed
+            if self.queries is not None:
+                stats = self.queries[sql]
+                stats[0] += 1
+                stats[1] += elapsed
+
+    def add_template_time(self, elapsed):
+        self.template_time = (self.template_time or 0) + elapsed
+
+    def begin(self):
+        self._stack = ExitStack()
+        for conn in connections.all():
+            self._stack.enter_context(conn.execute_wrapper(self))
+        _state.measurement = self
+        self.start = perf_counter()
+
+    def end(self):
+        self.duration = perf_counter() - self.start
+        _state.measurement = None
+        self._stack.close()
+
+    def record(self, name):
+        duration.labels(self.kind, name).observe(self.duration)
+        db_queries.labels(self.kind, name).observe(self.query_count)
+        db_seconds.labels(self.kind, name).observe(self.query_time)
+        if self.template_time is not None:
+            template_seconds.labels(self.kind, name).observe(self.template_time)
+        if self.cache_hits:
+            cache_accesses.labels(self.kind, name, "hit").inc(self.cache_hits)
+        if self.cache_misses:
+            cache_accesses.labels(self.kind, name, "miss").inc(self.cache_misses)
+
+        if (
+            self.queries is not None
+            and self.duration > settings.PERFORMANCE_SLOW_THRESHOLD
+        ):
+            self.log_slow(name)
+
+    def log_slow(self, name):
+        by_fingerprint = defaultdict(lambda: [0, 0.0])
+        for sql, (count, elapsed) in self.queries.items():
+            stats = by_fingerprint[fingerprint(sql)]
+            stats[0] += count
+            stats[1] += elapsed
+
+        slowest = sorted(
+            by_fingerprint.items(), key=lambda item: item[1][1], reverse=True
+        )[:SLOW_LOG_QUERIES]
+
+        logger.warning(
+            "Traitement lent (%s %s) : %.3f s, %d requête(s) SQL en %.3f s, "
+            "rendu des templates en %.3f s\n%s",
+            self.kind,
+            name,
+            self.duration,
+            self.query_count,
+            self.query_time,
+            self.template_time or 0,
+            "\n".join(
+                f"{count} × {elapsed:.3f} s : {sql}"
+                for sql, (count, elapsed) in slowest
+            ),
+        )
+
+
+class InstrumentedRedisCache(RedisCache):
+    """Cache Redis qui compte les accès réussis et manqués de la requête en cours"""
+
+    _missing = object()
+
+    def get(self, key, default=None, **kwargs):
+        value = super().get(key, default=self._missing, **kwargs)
+        measurement = get_current_measurement()
+        if measurement is not None:
+            if value is self._missing:
+                measurement.cache_misses += 1
+            else:
+                measurement.cache_hits += 1
+        return default if value is self._missing else value
+
+    def get_many(self, keys, **kwargs):
+        keys = list(keys)
+        values = super().get_many(keys, **kwargs)
+        measurement = get_current_measurement()
+        if measurement is not None:
+            measurement.cache_hits += len(values)
+            measurement.cache_misses += len(keys) - len(values)
+        return values
@@ -1,3 +1,4 @@
+from contextlib import nullcontext
 from email.mime.base import MIMEBase
 from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
@@ -104,7 +105,8 @@ def send_mosaico_email(
     :param from_email: the address from which the email is to be sent
     :param recipients: a list of recipients to which the email will be send; alternatively, a single address
     :param bindings: a dictionary of replacements variables and their target values in the Mosaico template
-    :param connection: an optional email server connection to use to send the emails
+    :param connection: an optional email server connection to use to send the emails; it is left open so that
+      the caller can reuse it for other emails
     :param backend: if no connection is given, an optional mail backend to use to send the emails
     :param fail_silently: whether any error should be raised, or just be ignored; by default it will raise
     :param gen_connection_params_function: a function that takes a recipient and generates connection params
@@ -122,6 +124,9 @@ def send_mosaico_email(
 
     if connection is None:
         connection = get_connection(backend, fail_silently)
+        managed_connection = connection
+    else:
+        managed_connection = nullcontext()
 
     if preferences_link:
         bindings["PREFERENCES_LINK"] = front_url("contact")
@@ -137,7 +142,7 @@ def send_mosaico_email(
     except TemplateDoesNotExist:
         text_template = None
 
-    with connection:
+    with managed_connection:
         for recipient in recipients:
             # recipient can be either a Person or an email address
             if isinstance(recipient, Person):
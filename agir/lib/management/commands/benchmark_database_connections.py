@@ -0,0 +1,54 @@
+from statistics import mean, median
+from time import perf_counter
+
+from django.core.management import BaseCommand
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from agir.api.db_connections import check_idle_connections, mark_connections_idle
+
+
+class Command(BaseCommand):
+    help = "Compare request latency with new and persistent database connections"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-n",
+            "--requests",
+            type=int,
+            default=200,
+            help="number of simulated requests for each mode",
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def run_request(self, conn):
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+
+    def measure(self, conn, count, persistent):
+        durations = []
+        for _ in range(count):
+            start = perf_counter()
+            check_idle_connections()
+            self.run_request(conn)
+            mark_connections_idle()
+            if not persistent:
+                # ce que fait Django à la fin de chaque requête avec CONN_MAX_AGE = 0
+                conn.close()
+            durations.append(perf_counter() - start)
+        conn.close()
+        return durations
+
+    def report(self, label, durations):
+        durations = sorted(durations)
+        self.stdout.write(
+            f"{label}: mean {mean(durations) * 1000:.2f} ms, "
+            f"median {median(durations) * 1000:.2f} ms, "
+            f"p95 {durations[int(len(durations) * 0.95)] * 1000:.2f} ms"
+        )
+
+    def handle(self, *args, requests, database, **options):
+        conn = connections[database]
+
+        self.report("new connection", self.measure(conn, requests, False))
+        self.report("persistent connection", self.measure(conn, requests, True))
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from agir.lib.documents import clear_pdf_cache
+
+
+class Command(BaseCommand):
+    help = "Delete the cached PDF documents unused for some time (run daily)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.PDF_CACHE_MAX_AGE,
+            help="delete documents unused for more than this number of days",
+        )
+
+    def handle(self, *args, days, **options):
+        deleted = clear_pdf_cache(days * 24 * 3600)
+        self.stdout.write(f"{deleted} cached document(s) deleted")
@@ -0,0 +1,27 @@
+import reversion
+from django.core.management import BaseCommand
+from reversion.models import Version
+
+from agir.lib.history import HistoryMixin, compute_object_history
+
+
+class Command(BaseCommand):
+    help = "Precompute the history steps of every existing version"
+
+    def handle(self, *args, **options):
+        for model in reversion.get_registered_models():
+            if not issubclass(model, HistoryMixin):
+                continue
+
+            object_ids = (
+                Version.objects.get_for_model(model)
+                .order_by()
+                .values_list("object_id", flat=True)
+                .distinct()
+            )
+
+            steps = 0
+            for object_id in object_ids.iterator():
+                steps += len(compute_object_history(model, object_id))
+
+            self.stdout.write(f"{model._meta.label}: {steps} step(s)")
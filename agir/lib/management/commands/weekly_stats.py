@@ -5,6 +5,7 @@ from django.utils import timezone
 from django.utils.formats import date_format
 
 from agir.lib.management_utils import date_as_local_datetime_argument
+from agir.statistics.actions import get_activity_statistics, get_current_statistics
 from ...stats import *
 
 
@@ -68,9 +69,13 @@ class Command(BaseCommand):
             )
         self.stdout.write("\n")
 
-        main_week_stats = get_general_stats(start, end)
-        previous_week_stats = get_general_stats(one_period_before, start)
-        earliest_week_stats = get_general_stats(two_period_before, one_period_before)
+        main_week_stats = get_activity_statistics(start.date(), end.date())
+        previous_week_stats = get_activity_statistics(
+            one_period_before.date(), start.date()
+        )
+        earliest_week_stats = get_activity_statistics(
+            two_period_before.date(), one_period_before.date()
+        )
 
         print(
             "{} nouveaux signataires ({} la {period} précédente, {} celle d'avant)".format(
@@ -121,9 +126,9 @@ class Command(BaseCommand):
             )
         )
 
-        print("\nActuellement :\n")
+        snapshot_date, instant_stats = get_current_statistics()
+        print(f"\nAu {date_format(snapshot_date)} :\n")
 
-        instant_stats = get_instant_stats()
         print("{} inscrit⋅e⋅s aux emails".format(instant_stats["subscribers"]))
         print("{} membres de groupes".format(instant_stats["group_members"]))
         print(
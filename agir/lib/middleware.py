@@ -1,8 +1,13 @@
+from time import perf_counter
 from urllib.parse import urljoin
 
 from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.utils.http import urlquote
 
+from agir.api import db_routers
+from agir.lib.instrumentation import KIND_VIEW, Measurement, get_current_measurement
+
 
 class TurbolinksMiddleware:
     def __init__(self, get_response):
@@ -15,3 +20,78 @@ class TurbolinksMiddleware:
         response["Turbolinks-Location"] = location
 
         return response
+
+
+class ReplicaPinningMiddleware:
+    """Garantit à un client qu'il relit ses propres écritures
+
+    Lorsqu'une requête a écrit en base, un cookie de courte durée est posé : tant qu'il
+    est présent, les lectures de ce client se font sur la base principale, même dans les
+    vues autorisées à lire sur une réplica.
+    """
+
+    COOKIE_NAME = "replica_pin"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        db_routers.reset_state(pinned=self.COOKIE_NAME in request.COOKIES)
+
+        response = self.get_response(request)
+
+        if db_routers.has_written() and db_routers.get_replicas():
+            response.set_cookie(
+                self.COOKIE_NAME,
+                "1",
+                max_age=settings.REPLICA_PIN_DURATION,
+                secure=request.is_secure(),
+                httponly=True,
+                samesite="Lax",
+            )
+
+        return response
+
+
+class PerformanceMiddleware:
+    """Mesure les requêtes SQL, les accès au cache et le rendu des templates de chaque vue
+
+    Les mesures sont exportées par nom de vue (voir `agir.lib.instrumentation`).
+    """
+
+    UNRESOLVED_VIEW = "<unresolved>"
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_INSTRUMENTATION:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        measurement = Measurement(KIND_VIEW)
+        measurement.begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            measurement.end()
+
+        measurement.record(
+            request.resolver_match.view_name
+            if request.resolver_match is not None
+            else self.UNRESOLVED_VIEW
+        )
+
+        return response
+
+    def process_template_response(self, request, response):
+        # ce middleware étant le premier de la liste, cette méthode est appelée juste
+        # avant le rendu de la réponse
+        measurement = get_current_measurement()
+        if measurement is not None:
+            start = perf_counter()
+
+            def record_render_time(rendered_response):
+                measurement.add_template_time(perf_counter() - start)
+
+            response.add_post_render_callback(record_render_time)
+
+        return response
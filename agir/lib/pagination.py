@@ -1,14 +1,196 @@
+import base64
+import datetime
+import json
+import uuid
 from collections import OrderedDict
+from decimal import Decimal
+from functools import reduce
+from operator import or_
 
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import F, FloatField, OrderBy, Q
+from django.db.models.functions import Cast
 from django.utils.translation import ugettext_lazy as _
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination, BasePagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
-class APIPaginator(PageNumberPagination):
+def estimate_count(queryset):
+    """Renvoie le nombre de lignes estimé par le planificateur de PostgreSQL
+
+    L'estimation ne coûte qu'une requête EXPLAIN, quelle que soit la taille du résultat,
+    mais peut être assez éloignée du nombre réel.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+def _encode_cursor_value(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """Pagination par curseur, sans COUNT ni OFFSET
+
+    Les pages sont délimitées par les valeurs des champs de tri du dernier élément de la
+    page précédente (l'ordre du queryset, complété par la clé primaire) : le coût d'une
+    page ne dépend pas de sa profondeur, et les insertions concurrentes ne décalent pas
+    les résultats. Seule la page suivante est proposée.
+
+    Les champs et expressions de tri ne doivent pas pouvoir être nuls (une distance à
+    des coordonnées absentes, par exemple). Le paramètre `count=estimate` ajoute à la
+    réponse le nombre de résultats estimé par le planificateur.
+    """
+
     page_size = 20
     page_size_query_param = "page_size"
     max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = _("Curseur invalide.")
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        """Renvoie la liste des couples `(expression, décroissant)` de l'ordre du queryset
+
+        L'ordre peut mentionner des noms de champs ou d'annotations, ou des expressions
+        (par exemple une distance calculée avec `Distance`).
+        """
+        ordering = []
+        for field in queryset.query.order_by or queryset.model._meta.ordering:
+            if isinstance(field, OrderBy):
+                ordering.append((field.expression, field.descending))
+            elif hasattr(field, "resolve_expression"):
+                ordering.append((field, False))
+            elif field.startswith("-"):
+                ordering.append((F(field[1:]), True))
+            else:
+                ordering.append((F(field), False))
+
+        pk_name = queryset.model._meta.pk.name
+        if not any(
+            isinstance(expression, F) and expression.name in ("pk", pk_name)
+            for expression, desc in ordering
+        ):
+            ordering.append((F("pk"), False))
+
+        return ordering
+
+    def get_key_expression(self, queryset, expression):
+        output_field = expression.resolve_expression(
+            queryset.query.chain()
+        ).output_field
+
+        if isinstance(output_field, FloatField):
+            # les rangs de recherche sont des réels simple précision : on les compare en
+            # double précision pour que les valeurs du curseur soient exactes ; les
+            # distances sont de même comparées comme des nombres (en mètres) plutôt que
+            # comme des objets `Distance`, que le curseur ne saurait pas représenter
+            return Cast(expression, FloatField()), FloatField()
+        return expression, output_field
+
+    def decode_cursor(self, encoded, output_fields):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if len(values) != len(output_fields):
+                raise ValueError()
+            return [f.to_python(v) for f, v in zip(output_fields, values)]
+        except (ValueError, TypeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, values):
+        return base64.urlsafe_b64encode(
+            json.dumps([_encode_cursor_value(v) for v in values]).encode()
+        ).decode()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        keys = OrderedDict()
+        output_fields = []
+        descending = []
+        for i, (expression, desc) in enumerate(self.get_ordering(queryset)):
+            keys[f"_keyset_{i}"], output_field = self.get_key_expression(
+                queryset, expression
+            )
+            output_fields.append(output_field)
+            descending.append(desc)
+
+        queryset = queryset.annotate(**keys).order_by(
+            *(f"-{key}" if desc else key for key, desc in zip(keys, descending))
+        )
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) == "estimate":
+            self.count = estimate_count(queryset)
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            values = self.decode_cursor(encoded, output_fields)
+            aliases = list(keys)
+            queryset = queryset.filter(
+                reduce(
+                    or_,
+                    (
+                        Q(
+                            **{aliases[j]: values[j] for j in range(i)},
+                            **{
+                                f"{aliases[i]}__{'lt' if descending[i] else 'gt'}": values[
+                                    i
+                                ]
+                            },
+                        )
+                        for i in range(len(aliases))
+                    ),
+                )
+            )
+
+        results = list(queryset[: page_size + 1])
+
+        self.next_cursor = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            self.next_cursor = self.encode_cursor(
+                [getattr(results[-1], key) for key in keys]
+            )
+
+        return results
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+        )
+
+    def get_paginated_response(self, data):
+        response = OrderedDict([("next", self.get_next_link()), ("results", data)])
+        if self.count is not None:
+            response["count"] = self.count
+        return Response(response)
 
 
 class LegacyPaginator(PageNumberPagination):
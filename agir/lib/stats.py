@@ -7,19 +7,25 @@ from agir.events.models import Event, EventSubtype
 
 
 def get_general_stats(start, end):
+    """Calcule les statistiques d'activité entre `start` (inclus) et `end` (exclu)"""
     return {
-        "new_supporters": Person.objects.filter(created__range=(start, end)).count(),
+        "new_supporters": Person.objects.filter(
+            created__gte=start, created__lt=end
+        ).count(),
         "new_groups": SupportGroup.objects.filter(
-            published=True, created__range=(start, end)
+            published=True, created__gte=start, created__lt=end
         ).count(),
         "new_events": Event.objects.filter(
-            visibility=Event.VISIBILITY_PUBLIC, created__range=(start, end)
+            visibility=Event.VISIBILITY_PUBLIC, created__gte=start, created__lt=end
         ).count(),
         "events_happened": Event.objects.filter(
-            visibility=Event.VISIBILITY_PUBLIC, start_time__range=(start, end)
+            visibility=Event.VISIBILITY_PUBLIC,
+            start_time__gte=start,
+            start_time__lt=end,
         ).count(),
         "new_memberships": Person.objects.filter(
-            memberships__created__range=(start, end),
+            memberships__created__gte=start,
+            memberships__created__lt=end,
             memberships__supportgroup__type=SupportGroup.TYPE_LOCAL_GROUP,
             memberships__supportgroup__published=True,
         )
@@ -4,7 +4,12 @@ from agir.people.models import Person
 from .celery import http_task
 from .geo import geocode_element
 
-__all__ = ["geocode_event", "geocode_support_group", "geocode_person"]
+__all__ = [
+    "geocode_event",
+    "geocode_support_group",
+    "geocode_person",
+    "geocode_people",
+]
 
 
 def create_geocoder(model):
@@ -22,6 +27,19 @@ def create_geocoder(model):
     return http_task(geocode_model)
 
 
+def create_batch_geocoder(model):
+    def geocode_models(pks):
+        # les éléments déjà géocodés lors d'une précédente tentative sont ignorés
+        for item in model.objects.filter(pk__in=pks, coordinates_type__isnull=True):
+            geocode_element(item)
+            item.save()
+
+    geocode_models.__name__ = "geocode_{}_batch".format(model.__name__.lower())
+
+    return http_task(geocode_models)
+
+
 geocode_event = create_geocoder(Event)
 geocode_support_group = create_geocoder(SupportGroup)
 geocode_person = create_geocoder(Person)
+geocode_people = create_batch_geocoder(Person)
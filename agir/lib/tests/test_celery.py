@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase
+
+from agir.api.celery import app
+
+
+class TaskRoutingTestCase(SimpleTestCase):
+    def get_queue(self, task_name):
+        return app.amqp.router.route({}, task_name)["queue"].name
+
+    def test_login_emails_do_not_share_queue_with_bulk_notifications(self):
+        self.assertEqual(
+            self.get_queue("agir.authentication.tasks.send_login_email"), "realtime"
+        )
+        self.assertEqual(
+            self.get_queue("agir.events.tasks.send_event_changed_notification"), "bulk",
+        )
+
+    def test_glob_routes(self):
+        self.assertEqual(
+            self.get_queue("agir.people.tasks.send_confirmation_email"), "realtime"
+        )
+        self.assertEqual(
+            self.get_queue("agir.lib.tasks.geocode_person_batch"), "external-http"
+        )
+
+    def test_unrouted_tasks_use_default_queue(self):
+        self.assertEqual(
+            self.get_queue("agir.events.tasks.send_secretariat_notification"), "celery"
+        )
@@ -0,0 +1,39 @@
+from time import monotonic
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from agir.api.db_connections import check_idle_connections, mark_connections_idle
+
+
+@override_settings(DATABASE_HEALTH_CHECK_DELAY=30)
+class CheckIdleConnectionsTestCase(SimpleTestCase):
+    def setUp(self):
+        self.conn = mock.Mock(in_atomic_block=False, idle_since=None)
+        patcher = mock.patch("agir.api.db_connections.connections")
+        self.connections = patcher.start()
+        self.connections.all.return_value = [self.conn]
+        self.addCleanup(patcher.stop)
+
+    def test_recently_used_connection_is_not_checked(self):
+        mark_connections_idle()
+        check_idle_connections()
+
+        self.conn.is_usable.assert_not_called()
+        self.conn.close.assert_not_called()
+
+    def test_broken_idle_connection_is_closed(self):
+        self.conn.idle_since = monotonic() - 60
+        self.conn.is_usable.return_value = False
+
+        check_idle_connections()
+
+        self.conn.close.assert_called_once()
+
+    def test_working_idle_connection_is_kept(self):
+        self.conn.idle_since = monotonic() - 60
+        self.conn.is_usable.return_value = True
+
+        check_idle_connections()
+
+        self.conn.close.assert_not_called()
@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory
+
+from agir.api import db_routers
+from agir.lib.middleware import ReplicaPinningMiddleware
+from agir.people.models import Person
+
+
+@mock.patch("agir.api.db_routers.get_replicas", lambda: ["replica0"])
+class ReplicaRouterTestCase(TestCase):
+    def setUp(self):
+        db_routers.reset_state()
+        self.router = db_routers.ReplicaRouter()
+
+    def tearDown(self):
+        db_routers.reset_state()
+
+    def test_reads_from_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Person), "default")
+
+    def test_reads_from_replica_when_asked(self):
+        with db_routers.use_replica():
+            self.assertEqual(self.router.db_for_read(Person), "replica0")
+        self.assertEqual(self.router.db_for_read(Person), "default")
+
+    def test_reads_own_writes(self):
+        with db_routers.use_replica():
+            self.assertEqual(self.router.db_for_write(Person), "default")
+            self.assertEqual(self.router.db_for_read(Person), "default")
+
+    def test_sessions_do_not_count_as_writes(self):
+        with db_routers.use_replica():
+            self.assertEqual(self.router.db_for_write(Session), "default")
+            self.assertEqual(self.router.db_for_read(Session), "default")
+            self.assertEqual(self.router.db_for_read(Person), "replica0")
+
+    def test_pinned_client_reads_from_primary(self):
+        db_routers.reset_state(pinned=True)
+        with db_routers.use_replica():
+            self.assertEqual(self.router.db_for_read(Person), "default")
+
+    def test_migrations_only_on_primary(self):
+        self.assertTrue(self.router.allow_migrate("default", "people"))
+        self.assertFalse(self.router.allow_migrate("replica0", "people"))
+
+
+@mock.patch("agir.api.db_routers.get_replicas", lambda: ["replica0"])
+class ReplicaPinningMiddlewareTestCase(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        db_routers.reset_state()
+
+    def test_sets_cookie_after_write(self):
+        def view(request):
+            Person.objects.create_insoumise("test@example.com")
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(view)(self.factory.post("/"))
+        self.assertIn(ReplicaPinningMiddleware.COOKIE_NAME, response.cookies)
+
+    def test_no_cookie_without_write(self):
+        response = ReplicaPinningMiddleware(lambda request: HttpResponse())(
+            self.factory.get("/")
+        )
+        self.assertNotIn(ReplicaPinningMiddleware.COOKIE_NAME, response.cookies)
+
+    def test_cookie_pins_reads_to_primary(self):
+        request = self.factory.get("/")
+        request.COOKIES[ReplicaPinningMiddleware.COOKIE_NAME] = "1"
+
+        def view(request):
+            with db_routers.use_replica():
+                return HttpResponse(db_routers.get_read_database())
+
+        response = ReplicaPinningMiddleware(view)(request)
+        self.assertEqual(response.content, b"default")
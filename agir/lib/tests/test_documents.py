@@ -0,0 +1,78 @@
+import os
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from agir.lib.documents import html_to_pdf, html_to_pdf_many, clear_pdf_cache
+
+
+def fake_wkhtmltopdf(args, input, **kwargs):
+    Path(args[-1]).write_bytes(b"%PDF " + input)
+
+
+@mock.patch("agir.lib.documents.subprocess.run", side_effect=fake_wkhtmltopdf)
+class HtmlToPdfTestCase(SimpleTestCase):
+    def setUp(self):
+        self.dir = TemporaryDirectory()
+        self.path = Path(self.dir.name)
+        self.media_root = override_settings(MEDIA_ROOT=self.dir.name)
+        self.media_root.enable()
+
+    def tearDown(self):
+        self.media_root.disable()
+        self.dir.cleanup()
+
+    def test_cached_documents_are_not_rendered_again(self, run):
+        html_to_pdf("<p>Bonjour</p>", self.path / "first.pdf", cache=True)
+        html_to_pdf("<p>Bonjour</p>", self.path / "second.pdf", cache=True)
+
+        run.assert_called_once()
+        self.assertEqual(
+            (self.path / "second.pdf").read_bytes(), b"%PDF <p>Bonjour</p>"
+        )
+
+        html_to_pdf("<p>Au revoir</p>", self.path / "third.pdf", cache=True)
+        self.assertEqual(run.call_count, 2)
+
+    def test_cache_contains_no_temporary_file(self, run):
+        html_to_pdf("<p>Bonjour</p>", self.path / "first.pdf", cache=True)
+
+        cached = list((self.path / "cache").glob("**/*.*"))
+        self.assertEqual(len(cached), 1)
+        self.assertEqual(cached[0].suffix, ".pdf")
+        self.assertEqual(cached[0].read_bytes(), b"%PDF <p>Bonjour</p>")
+
+    def test_clear_unused_documents(self, run):
+        html_to_pdf("<p>Ancien</p>", self.path / "old.pdf", cache=True)
+        html_to_pdf("<p>Récent</p>", self.path / "recent.pdf", cache=True)
+        (old_cached,) = [
+            path
+            for path in (self.path / "cache").glob("**/*.pdf")
+            if path.read_bytes() == b"%PDF <p>Ancien</p>"
+        ]
+        two_days_ago = time.time() - 2 * 24 * 3600
+        os.utime(old_cached, (two_days_ago, two_days_ago))
+
+        self.assertEqual(clear_pdf_cache(24 * 3600), 1)
+        self.assertFalse(old_cached.exists())
+
+        html_to_pdf("<p>Récent</p>", self.path / "recent.pdf", cache=True)
+        html_to_pdf("<p>Ancien</p>", self.path / "old.pdf", cache=True)
+        self.assertEqual(run.call_count, 3)
+
+    def test_no_cache_by_default(self, run):
+        html_to_pdf("<p>Bonjour</p>", self.path / "first.pdf")
+        html_to_pdf("<p>Bonjour</p>", self.path / "second.pdf")
+
+        self.assertEqual(run.call_count, 2)
+
+    def test_render_many_documents(self, run):
+        errors = html_to_pdf_many(
+            (f"<p>{i}</p>", self.path / f"{i}.pdf") for i in range(10)
+        )
+
+        self.assertEqual(errors, [None] * 10)
+        self.assertEqual((self.path / "7.pdf").read_bytes(), b"%PDF <p>7</p>")
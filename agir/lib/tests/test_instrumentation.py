@@ -0,0 +1,57 @@
+from django.http import HttpResponse
+from django.template.response import TemplateResponse
+from django.template import engines
+from django.test import TestCase, RequestFactory, override_settings
+from prometheus_client import REGISTRY
+
+from agir.lib.instrumentation import fingerprint
+from agir.lib.middleware import PerformanceMiddleware
+from agir.people.models import Person
+
+
+def get_sample(metric, name=PerformanceMiddleware.UNRESOLVED_VIEW):
+    return REGISTRY.get_sample_value(metric, {"kind": "view", "name": name}) or 0
+
+
+@override_settings(
+    PERFORMANCE_INSTRUMENTATION=True,
+    PERFORMANCE_SAMPLE_RATE=1,
+    PERFORMANCE_SLOW_THRESHOLD=0,
+)
+class PerformanceMiddlewareTestCase(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_counts_queries_and_logs_slow_requests(self):
+        def view(request):
+            Person.objects.filter(first_name__in=["a", "b"]).count()
+            Person.objects.filter(first_name__in=["a", "b", "c"]).count()
+            return HttpResponse()
+
+        queries = get_sample("agir_perf_db_queries_sum")
+
+        with self.assertLogs("agir.lib.instrumentation", "WARNING") as logs:
+            PerformanceMiddleware(view)(self.factory.get("/"))
+
+        self.assertEqual(get_sample("agir_perf_db_queries_sum") - queries, 2)
+        self.assertIn("2 ×", logs.output[0])
+
+    def test_measures_template_rendering(self):
+        template = engines["django"].from_string("{{ value }}")
+        middleware = PerformanceMiddleware(
+            lambda request: middleware.process_template_response(
+                request, TemplateResponse(request, template, {"value": 1})
+            ).render()
+        )
+        renders = get_sample("agir_perf_template_seconds_count")
+
+        with self.assertLogs("agir.lib.instrumentation", "WARNING"):
+            middleware(self.factory.get("/"))
+
+        self.assertEqual(get_sample("agir_perf_template_seconds_count") - renders, 1)
+
+    def test_fingerprint_groups_in_clauses(self):
+        self.assertEqual(
+            fingerprint('SELECT 1 WHERE "id" IN (%s, %s, %s)'),
+            fingerprint('SELECT 1 WHERE "id" IN (%s, %s)'),
+        )
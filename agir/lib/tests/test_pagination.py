@@ -0,0 +1,93 @@
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from agir.events.models import Event
+from agir.lib.pagination import KeysetPagination
+
+
+class KeysetPaginationTestCase(APITestCase):
+    def setUp(self):
+        now = timezone.now()
+        # deux événements commencent en même temps, pour vérifier le départage par la clé
+        self.events = [
+            Event.objects.create(
+                name=f"Événement {i}",
+                start_time=now + timezone.timedelta(days=1 + i // 2 * 2),
+                end_time=now + timezone.timedelta(days=2 + i // 2 * 2),
+            )
+            for i in range(5)
+        ]
+
+    def get_all_pages(self, url, params):
+        results = []
+        pages = 0
+        res = self.client.get(url, params)
+
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages += 1
+            results.extend(e["id"] for e in res.data["results"])
+            if res.data["next"] is None:
+                return results, pages
+            res = self.client.get(res.data["next"])
+
+    def test_can_walk_through_all_pages(self):
+        results, pages = self.get_all_pages(
+            reverse("search_event_api"), {"page_size": 2}
+        )
+
+        self.assertEqual(pages, 3)
+        self.assertCountEqual(results, [str(e.pk) for e in self.events])
+        self.assertEqual(len(set(results)), 5)
+
+    def test_new_events_do_not_shift_pages(self):
+        url = reverse("search_event_api")
+        res = self.client.get(url, {"page_size": 2})
+        first_page = [e["id"] for e in res.data["results"]]
+
+        Event.objects.create(
+            name="Nouvel événement",
+            start_time=timezone.now() + timezone.timedelta(days=30),
+            end_time=timezone.now() + timezone.timedelta(days=31),
+        )
+
+        res = self.client.get(res.data["next"])
+        self.assertTrue(
+            set(first_page).isdisjoint(e["id"] for e in res.data["results"])
+        )
+
+    def test_invalid_cursor(self):
+        res = self.client.get(reverse("search_event_api"), {"cursor": "nimportequoi"})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_can_ask_for_estimated_count(self):
+        res = self.client.get(reverse("search_event_api"), {"count": "estimate"})
+        self.assertIsInstance(res.data["count"], int)
+
+    def test_can_order_by_distance(self):
+        paris = Point(2.35, 48.85, srid=4326)
+        for i, event in enumerate(self.events):
+            # du plus éloigné au plus proche, deux événements à la même distance
+            event.coordinates = Point(2.35, 48.85 + (4 - i) // 2 * 0.1, srid=4326)
+            event.save()
+        queryset = Event.objects.order_by(Distance("coordinates", paris))
+
+        results = []
+        params = {"page_size": 2}
+        while True:
+            paginator = KeysetPagination()
+            request = Request(APIRequestFactory().get("/", params))
+            results.extend(paginator.paginate_queryset(queryset, request))
+            if paginator.next_cursor is None:
+                break
+            params["cursor"] = paginator.next_cursor
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[0], self.events[4])
+        self.assertCountEqual(results[1:3], self.events[2:4])
+        self.assertCountEqual(results[3:], self.events[:2])
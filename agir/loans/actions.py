@@ -3,13 +3,15 @@ from pathlib import Path
 from typing import Mapping, Iterable
 from uuid import uuid4
 
+from django.conf import settings
 from django.template.loader import get_template
+from django.utils import timezone
 from django.utils.safestring import mark_safe
 from markdown import markdown
 from markdown.extensions.toc import TocExtension
 from sepaxml import SepaTransfer
 
-from agir.lib.documents import html_to_pdf
+from agir.lib.documents import html_to_pdf, html_to_pdf_many
 from agir.lib.iban import to_iban
 from agir.loans.data.banks import iban_to_bic
 from agir.payments.models import Payment
@@ -27,16 +29,66 @@ def generate_html_contract(payment_type, contract_information, baselevel=1):
     )
 
 
-def save_pdf_contract(payment_type, contract_information, dest_path):
-    dest_dir = Path(dest_path).parent
-    dest_dir.mkdir(parents=True, exist_ok=True)
+def get_signature_datetime():
+    return (
+        timezone.now()
+        .astimezone(timezone.get_default_timezone())
+        .strftime("%d/%m/%Y à %H:%M")
+    )
+
 
+def render_contract(payment_type, contract_information):
     html_contract = generate_html_contract(payment_type, contract_information)
-    contract_with_layout = get_template(payment_type.pdf_layout_template_name).render(
+    return get_template(payment_type.pdf_layout_template_name).render(
         context={"contract_body": mark_safe(html_contract)}
     )
 
-    html_to_pdf(contract_with_layout, dest_path)
+
+def save_pdf_contract(payment_type, contract_information, dest_path):
+    dest_dir = Path(dest_path).parent
+    dest_dir.mkdir(parents=True, exist_ok=True)
+
+    html_to_pdf(render_contract(payment_type, contract_information), dest_path)
+
+
+def generate_contracts(payment_type, payments):
+    """Génère en parallèle les contrats de plusieurs paiements
+
+    Les contrats générés avec succès sont enregistrés dans les métadonnées de leur
+    paiement, comme pour la tâche `generate_contract`.
+
+    :param payment_type: le type de prêt de tous ces paiements
+    :param payments: les paiements dont il faut générer le contrat
+    :return: la liste des couples `(paiement, exception)` des contrats en échec
+    """
+    signature_datetime = get_signature_datetime()
+    documents = []
+
+    for payment in payments:
+        payment.meta["signature_datetime"] = signature_datetime
+        contract_path = payment_type.contract_path(payment)
+        dest_path = Path(settings.MEDIA_ROOT) / contract_path
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        documents.append(
+            (
+                payment,
+                contract_path,
+                (render_contract(payment_type, payment.meta), dest_path),
+            )
+        )
+
+    errors = html_to_pdf_many(document for _, _, document in documents)
+
+    failures = []
+    for (payment, contract_path, _), error in zip(documents, errors):
+        if error is not None:
+            failures.append((payment, error))
+            continue
+
+        payment.meta["contract_path"] = contract_path
+        payment.save()
+
+    return failures
 
 
 def generate_reimbursement_file(config: Mapping[str, str], payments: Iterable[Payment]):
@@ -0,0 +1,52 @@
+from django.core.management import BaseCommand, CommandError
+from tqdm import tqdm
+
+from agir.loans.actions import generate_contracts
+from agir.payments.models import Payment
+from agir.payments.types import PAYMENT_TYPES
+
+BATCH_SIZE = 50
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate in batch the contracts of completed loans that do not have one yet. "
+        "Confirmation emails are NOT sent."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("payment_type")
+        parser.add_argument(
+            "-f",
+            "--force",
+            action="store_true",
+            help="Regenerate contracts even when they already exist.",
+        )
+
+    def handle(self, *args, payment_type, force, **options):
+        if payment_type not in PAYMENT_TYPES or not hasattr(
+            PAYMENT_TYPES[payment_type], "contract_path"
+        ):
+            raise CommandError(f"'{payment_type}' n'est pas un type de prêt.")
+
+        payments = Payment.objects.filter(
+            type=payment_type, status=Payment.STATUS_COMPLETED
+        ).order_by("id")
+        if not force:
+            payments = payments.exclude(meta__has_key="contract_path")
+
+        payments = list(payments)
+        failures = []
+        for i in tqdm(range(0, len(payments), BATCH_SIZE), unit=" lots"):
+            failures.extend(
+                generate_contracts(
+                    PAYMENT_TYPES[payment_type], payments[i : i + BATCH_SIZE]
+                )
+            )
+
+        for payment, error in failures:
+            self.stderr.write(f"Paiement n°{payment.id} : {error!r}")
+
+        self.stdout.write(
+            f"{len(payments) - len(failures)} contrat(s) généré(s), {len(failures)} échec(s)"
+        )
@@ -2,12 +2,11 @@ import subprocess
 from pathlib import Path
 
 from django.conf import settings
-from django.utils import timezone
 from slugify import slugify
 
 from agir.lib.celery import emailing_task, retriable_task
 from agir.lib.mailing import send_mosaico_email
-from agir.loans.actions import save_pdf_contract
+from agir.loans.actions import save_pdf_contract, get_signature_datetime
 from agir.loans.display import SUBSTITUTIONS
 from agir.payments.models import Payment
 from agir.payments.types import PAYMENT_TYPES
@@ -33,11 +32,7 @@ def generate_contract(payment_id, force=False):
         return payment.meta.get("contract_path")
 
     contract_information = payment.meta
-    contract_information["signature_datetime"] = (
-        timezone.now()
-        .astimezone(timezone.get_default_timezone())
-        .strftime("%d/%m/%Y à %H:%M")
-    )
+    contract_information["signature_datetime"] = get_signature_datetime()
 
     contract_full_path = Path(settings.MEDIA_ROOT) / contract_path
 
@@ -15,7 +15,7 @@ def generate_cost_certificate(data, dest_path):
 
     with TemporaryDirectory() as dir:
         pdf_certificate_path = Path(dir) / "certificate.pdf"
-        html_to_pdf(html_content, dest_path=pdf_certificate_path)
+        html_to_pdf(html_content, dest_path=pdf_certificate_path, cache=True)
 
         join_pdf_documents(
             [pdf_certificate_path, str(Path(__file__).parent / "facture_grenier.pdf")],
@@ -168,7 +168,7 @@ class CommuneCostCertificateFormView(CommunePageMixin, SingleObjectMixin, FormVi
         part = form.cleaned_data["nombre"] / 200_000
         generate_cost_certificate(
             {
-                "date": now(),
+                "date": now().date(),
                 "pourcentage": "{:.2%}".format(part),
                 "montant": int(207_097 * part),
                 "nom_ville": self.object.name,
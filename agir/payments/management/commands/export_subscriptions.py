@@ -1,65 +1,130 @@
 from argparse import FileType
 from io import BytesIO
 
+import numpy as np
 import pandas as pd
 from django.core.mail import EmailMessage, get_connection
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from glom import Coalesce, T, glom
 
 from agir.lib.management_utils import month_argument, month_range, email_argument
 from agir.payments.models import Payment
+from agir.people.models import PersonEmail
 from agir.system_pay.models import SystemPayTransaction
 
-FILE_DESC = {
-    "Code_uuid": (
-        "systempaytransaction_set",
-        T.get(status=SystemPayTransaction.STATUS_COMPLETED),
-        "uuid",
-        T.hex,
-    ),
-    "No_abonnement": "subscription.id",
-    "Email": Coalesce("person.email", "email"),
-    "Nom": Coalesce("person.last_name", "subscription.meta.last_name"),
-    "Prénom": Coalesce(
-        "person.first_name", "subscription.meta.first_name", skip=("",), default=""
-    ),
-    "No_et_Voie": Coalesce(
-        "person.location_address1",
-        "subscription.meta.first_name",
-        skip=("",),
-        default="",
-    ),
-    "Lieu_dit": Coalesce(
-        "person.location_address2",
-        "subscription.meta.location_address2",
-        skip=("",),
-        default="",
-    ),
-    "Code_Postal": Coalesce(
-        "person.location_zip", "subscription.meta.location_zip", skip=("",), default=""
-    ),
-    "Ville": Coalesce(
-        "person.location_city",
-        "subscription.meta.location_city",
-        skip=("",),
-        default="",
-    ),
-    "Pays": (
-        Coalesce(
-            "person.location_country",
-            "subscription.meta.location_country",
-            skip=("",),
-            default="",
-        ),
-        str,
-    ),
-    "Nationalité": "subscription.meta.nationality",
-    "Téléphone": Coalesce(
-        ("person.contact_phone", T.as_e164), "subscription.meta.contact_phone"
-    ),
+# colonnes renseignées à partir de la personne, ou à défaut des informations
+# enregistrées avec la souscription : (champ de la personne, clé de `subscription.meta`)
+PERSON_COLUMNS = {
+    "Nom": ("last_name", "last_name"),
+    "Prénom": ("first_name", "first_name"),
+    "No_et_Voie": ("location_address1", "location_address1"),
+    "Lieu_dit": ("location_address2", "location_address2"),
+    "Code_Postal": ("location_zip", "location_zip"),
+    "Ville": ("location_city", "location_city"),
+    "Pays": ("location_country", "location_country"),
+    "Téléphone": ("contact_phone", "contact_phone"),
 }
 
+COLUMNS = [
+    "Code_uuid",
+    "No_abonnement",
+    "Email",
+    "Nom",
+    "Prénom",
+    "No_et_Voie",
+    "Lieu_dit",
+    "Code_Postal",
+    "Ville",
+    "Pays",
+    "Nationalité",
+    "Téléphone",
+]
+
+
+def coalesce(*series):
+    """Renvoie pour chaque ligne la première valeur non vide parmi les séries"""
+    result = series[0].replace("", np.nan)
+    for s in series[1:]:
+        result = result.fillna(s.replace("", np.nan))
+    return result.fillna("")
+
+
+def get_primary_emails(person_ids):
+    """Renvoie l'adresse principale de chaque personne, comme `Person.email`"""
+    emails = pd.DataFrame(
+        PersonEmail.objects.filter(person_id__in=person_ids).values_list(
+            "person_id", "address", "_bounced", "_order"
+        ),
+        columns=["person_id", "address", "bounced", "order"],
+    )
+    return (
+        emails.sort_values(["bounced", "order"])
+        .drop_duplicates("person_id")
+        .set_index("person_id")["address"]
+    )
+
+
+def get_subscriptions_export(payments):
+    """Construit le tableau d'export à partir d'un queryset de paiements
+
+    Les données sont récupérées en trois requêtes (paiements avec leur personne et leur
+    souscription, transactions SystemPay, adresses email), puis assemblées avec pandas.
+    """
+    person_fields = [f"person__{f}" for f, _ in PERSON_COLUMNS.values()]
+    df = pd.DataFrame(
+        payments.values_list(
+            "id",
+            "email",
+            "subscription_id",
+            "subscription__meta",
+            "person_id",
+            *person_fields,
+        ),
+        columns=["id", "email", "subscription_id", "meta", "person_id", *person_fields],
+    )
+    if df.empty:
+        return pd.DataFrame(columns=COLUMNS)
+
+    meta = pd.DataFrame.from_records(
+        [m or {} for m in df["meta"]], index=df.index
+    ).reindex(
+        columns=[k for _, k in PERSON_COLUMNS.values()] + ["nationality"],
+        fill_value="",
+    )
+
+    transactions = pd.DataFrame(
+        SystemPayTransaction.objects.filter(
+            payment_id__in=df["id"].tolist(),
+            status=SystemPayTransaction.STATUS_COMPLETED,
+        ).values_list("payment_id", "uuid"),
+        columns=["payment_id", "uuid"],
+    ).drop_duplicates("payment_id")
+    uuids = transactions.set_index("payment_id")["uuid"].map(lambda u: u.hex)
+
+    emails = get_primary_emails(df["person_id"].dropna().tolist())
+
+    df["person__contact_phone"] = df["person__contact_phone"].map(
+        lambda p: p.as_e164 if p else ""
+    )
+    df["person__location_country"] = df["person__location_country"].map(
+        lambda c: str(c) if c else ""
+    )
+
+    result = pd.DataFrame(
+        {
+            "Code_uuid": df["id"].map(uuids).fillna(""),
+            "No_abonnement": df["subscription_id"],
+            "Email": coalesce(df["person_id"].map(emails), df["email"]),
+            **{
+                column: coalesce(df[f"person__{field}"], meta[key])
+                for column, (field, key) in PERSON_COLUMNS.items()
+            },
+            "Nationalité": meta["nationality"],
+        }
+    )
+
+    return result[COLUMNS]
+
 
 MESSAGE_BODY = """
 Bonjour,
@@ -103,19 +168,13 @@ class Command(BaseCommand):
             now = timezone.now()
             month = month_range(now.year, now.month)
 
-        payments = (
-            Payment.objects.filter(
-                status=Payment.STATUS_COMPLETED,
-                subscription__isnull=False,
-                created__range=month,
-            )
-            .select_related("subscription", "person")
-            .prefetch_related("systempaytransaction_set")
+        payments = Payment.objects.filter(
+            status=Payment.STATUS_COMPLETED,
+            subscription__isnull=False,
+            created__range=month,
         )
 
-        results = glom(payments, [FILE_DESC])
-
-        df = pd.DataFrame(results)
+        df = get_subscriptions_export(payments)
         xls_buffer = BytesIO()
         df.to_excel(xls_buffer, engine="xlwt", index=False)
         xls_file = xls_buffer.getvalue()
@@ -1,3 +1,97 @@
+import uuid
+
 from django.test import TestCase
 
-# Create your tests here.
+from agir.payments.management.commands.export_subscriptions import (
+    get_subscriptions_export,
+)
+from agir.payments.models import Payment, Subscription
+from agir.people.models import Person
+from agir.system_pay.models import SystemPayTransaction
+
+
+class ExportSubscriptionsTestCase(TestCase):
+    def setUp(self):
+        self.person = Person.objects.create_insoumise(
+            "person@domain.com", first_name="Marie", location_city="Paris"
+        )
+        self.person.add_email("other@domain.com")
+
+        self.subscription = Subscription.objects.create(
+            person=self.person,
+            price=1000,
+            meta={"last_name": "Curie", "nationality": "FR"},
+        )
+        self.anonymous_subscription = Subscription.objects.create(
+            price=500,
+            meta={
+                "first_name": "Pierre",
+                "last_name": "Dupont",
+                "location_city": "Lyon",
+                "nationality": "FR",
+            },
+        )
+
+        self.payments = [
+            Payment.objects.create(
+                person=self.person,
+                email=self.person.email,
+                price=1000,
+                status=Payment.STATUS_COMPLETED,
+                subscription=self.subscription,
+            ),
+            Payment.objects.create(
+                email="pierre@domain.com",
+                price=500,
+                status=Payment.STATUS_COMPLETED,
+                subscription=self.anonymous_subscription,
+            ),
+        ]
+        self.uuid = uuid.uuid4()
+        SystemPayTransaction.objects.create(
+            payment=self.payments[0],
+            status=SystemPayTransaction.STATUS_COMPLETED,
+            uuid=self.uuid,
+        )
+
+    def test_export_uses_person_then_subscription_information(self):
+        with self.assertNumQueries(3):
+            df = get_subscriptions_export(
+                Payment.objects.filter(pk__in=[p.pk for p in self.payments]).order_by(
+                    "id"
+                )
+            )
+
+        self.assertEqual(
+            df.to_dict("records"),
+            [
+                {
+                    "Code_uuid": self.uuid.hex,
+                    "No_abonnement": self.subscription.pk,
+                    "Email": "person@domain.com",
+                    "Nom": "Curie",
+                    "Prénom": "Marie",
+                    "No_et_Voie": "",
+                    "Lieu_dit": "",
+                    "Code_Postal": "",
+                    "Ville": "Paris",
+                    "Pays": "FR",
+                    "Nationalité": "FR",
+                    "Téléphone": "",
+                },
+                {
+                    "Code_uuid": "",
+                    "No_abonnement": self.anonymous_subscription.pk,
+                    "Email": "pierre@domain.com",
+                    "Nom": "Dupont",
+                    "Prénom": "Pierre",
+                    "No_et_Voie": "",
+                    "Lieu_dit": "",
+                    "Code_Postal": "",
+                    "Ville": "Lyon",
+                    "Pays": "",
+                    "Nationalité": "FR",
+                    "Téléphone": "",
+                },
+            ],
+        )
@@ -0,0 +1,170 @@
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from phonenumber_field.phonenumber import to_python as to_phone_number
+
+from agir.lib.tasks import geocode_people
+from agir.people import metrics
+from agir.people.models import Person, PersonEmail
+
+__all__ = ["IMPORTED_FIELDS", "ImportReport", "import_people"]
+
+IMPORTED_FIELDS = [
+    "first_name",
+    "last_name",
+    "contact_phone",
+    "location_address1",
+    "location_address2",
+    "location_zip",
+    "location_city",
+    "location_country",
+]
+
+IMPORT_BATCH_SIZE = 1000
+GEOCODING_BATCH_SIZE = 100
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.existing = 0
+        self.duplicates = 0
+        self.invalid = 0
+
+    def __str__(self):
+        return (
+            f"{self.created} personne(s) créée(s), {self.existing} déjà existante(s), "
+            f"{self.duplicates} doublon(s) et {self.invalid} ligne(s) invalide(s)"
+        )
+
+
+def normalize_row(row):
+    """Nettoie et valide une ligne d'import
+
+    Renvoie un couple `(email, fields)`, ou lève une `ValidationError` si l'adresse email
+    est invalide. Les numéros de téléphone invalides sont simplement ignorés.
+    """
+    email = PersonEmail.objects.normalize_email(row.get("email") or "")
+    validate_email(email)
+
+    fields = {
+        f: row[f].strip() for f in IMPORTED_FIELDS if f in row and row[f] is not None
+    }
+
+    if fields.get("contact_phone"):
+        phone_number = to_phone_number(fields["contact_phone"])
+        if phone_number and phone_number.is_valid():
+            fields["contact_phone"] = phone_number
+        else:
+            del fields["contact_phone"]
+
+    return email, {k: v for k, v in fields.items() if v}
+
+
+def import_people(
+    rows,
+    *,
+    tags=(),
+    is_insoumise=True,
+    newsletters=None,
+    batch_size=IMPORT_BATCH_SIZE,
+    report=None,
+):
+    """Importe en masse des personnes à partir d'un itérable de dictionnaires
+
+    Les lignes sont traitées par lots : chaque lot est dédupliqué en une seule requête
+    contre les adresses déjà connues, puis les personnes et adresses manquantes sont
+    insérées avec `bulk_create`. Les personnes existantes ne sont pas modifiées, mais
+    reçoivent les tags indiqués. Le géocodage des nouvelles personnes est programmé par
+    lots.
+
+    :param rows: un itérable de dictionnaires, avec au moins la clé `email`
+    :param tags: les `PersonTag` à ajouter à toutes les personnes importées
+    :param is_insoumise: la valeur de `is_insoumise` pour les nouvelles personnes
+    :param newsletters: les lettres d'information des nouvelles personnes
+    :param batch_size: le nombre de lignes traitées par transaction
+    :param report: un `ImportReport` éventuel à compléter
+    :return: le `ImportReport`
+    """
+    if newsletters is None:
+        newsletters = [Person.NEWSLETTER_LFI] if is_insoumise else []
+    if report is None:
+        report = ImportReport()
+
+    rows = iter(rows)
+    seen = set()
+
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return report
+
+        normalized = {}
+        for row in batch:
+            try:
+                email, fields = normalize_row(row)
+            except ValidationError:
+                report.invalid += 1
+                continue
+
+            if email.upper() in seen:
+                report.duplicates += 1
+                continue
+
+            seen.add(email.upper())
+            normalized[email] = fields
+
+        _import_batch(
+            normalized,
+            tags=tags,
+            is_insoumise=is_insoumise,
+            newsletters=newsletters,
+            report=report,
+        )
+
+
+def _import_batch(rows, *, tags, is_insoumise, newsletters, report):
+    with transaction.atomic():
+        existing = Person.objects.get_people_by_emails(rows)
+        report.existing += len(existing)
+
+        new_people = {
+            email: Person(
+                is_insoumise=is_insoumise, newsletters=list(newsletters), **fields
+            )
+            for email, fields in rows.items()
+            if email not in existing
+        }
+
+        Person.objects.bulk_create(new_people.values())
+        PersonEmail.objects.bulk_create(
+            PersonEmail(address=email, person=person, _order=0)
+            for email, person in new_people.items()
+        )
+
+        person_ids = {p.id for p in existing.values()} | {
+            p.id for p in new_people.values()
+        }
+        Person.tags.through.objects.bulk_create(
+            [
+                Person.tags.through(person_id=person_id, persontag_id=tag.id)
+                for person_id in person_ids
+                for tag in tags
+            ],
+            ignore_conflicts=True,
+        )
+
+        to_geocode = [
+            str(p.id) for p in new_people.values() if p.location_zip or p.location_city
+        ]
+        transaction.on_commit(lambda: _schedule_geocoding(to_geocode))
+
+    metrics.subscriptions.inc(len(new_people))
+    report.created += len(new_people)
+
+
+def _schedule_geocoding(person_ids):
+    for i in range(0, len(person_ids), GEOCODING_BATCH_SIZE):
+        geocode_people.delay(person_ids[i : i + GEOCODING_BATCH_SIZE])
@@ -8,6 +8,7 @@ from django.utils import timezone
 from agir.authentication.tokens import subscription_confirmation_token_generator
 from agir.elus.models import types_elus, STATUT_A_VERIFIER_INSCRIPTION
 from agir.lib.http import add_query_params_to_url
+from agir.people.counters import increment_nsp_counter
 from agir.people.models import Person
 
 
@@ -74,6 +75,8 @@ def save_subscription_information(person, type, data):
 
     person.newsletters = list(SUBSCRIPTION_NEWSLETTERS[type].union(person.newsletters))
 
+    new_nsp_supporter = type == SUBSCRIPTION_TYPE_NSP and not person.is_2022
+
     if type in SUBSCRIPTION_FIELD and not getattr(person, SUBSCRIPTION_FIELD[type]):
         setattr(person, SUBSCRIPTION_FIELD[type], True)
     subscriptions = person.meta.setdefault("subscriptions", {})
@@ -96,6 +99,9 @@ def save_subscription_information(person, type, data):
 
         person.save()
 
+        if new_nsp_supporter:
+            transaction.on_commit(increment_nsp_counter)
+
 
 def nsp_confirmed_url(id, data):
     params = {"agir_id": str(id)}
@@ -9,7 +9,7 @@ from django.utils.html import format_html
 from agir.lib.form_fields import AdminRichEditorWidget, AdminJsonWidget
 from agir.lib.forms import CoordinatesFormMixin
 from agir.people.forms import LegacySubscribedMixin
-from agir.people.models import Person
+from agir.people.models import Person, PersonTag
 from agir.people.person_forms.actions import (
     validate_custom_fields,
     get_people_form_class,
@@ -102,6 +102,24 @@ class AddPersonEmailForm(forms.Form):
         self.helper.add_input(Submit("ajouter", "Ajouter"))
 
 
+class ImportPeopleForm(forms.Form):
+    file = forms.FileField(
+        label="Fichier CSV",
+        help_text="Le fichier doit comporter au moins une colonne « email ». Les colonnes first_name, last_name, "
+        "contact_phone, location_address1, location_address2, location_zip, location_city et location_country "
+        "sont aussi importées.",
+    )
+    tags = forms.ModelMultipleChoiceField(
+        label="Tags à ajouter", queryset=PersonTag.objects.all(), required=False
+    )
+    is_insoumise = forms.BooleanField(
+        label="Les nouvelles personnes sont insoumises",
+        required=False,
+        initial=True,
+        help_text="Assurez-vous d'avoir le consentement explicite des personnes importées.",
+    )
+
+
 class ChoosePrimaryAccount(forms.Form):
     primary_account = forms.ModelChoiceField(
         label="Compte principal", required=True, queryset=Person.objects.all()
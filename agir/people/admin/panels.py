@@ -32,6 +32,7 @@ from agir.people.admin.views import (
     AddPersonEmailView,
     MergePersonsView,
     StatisticsView,
+    ImportPeopleView,
 )
 from agir.people.models import Person, PersonTag
 from agir.people.person_forms.display import default_person_form_display
@@ -291,6 +292,13 @@ class PersonAdmin(DisplayContactPhoneMixin, CenterOnFranceMixin, OSMGeoAdmin):
                 ),
                 name="people_person_merge",
             ),
+            path(
+                "import/",
+                self.admin_site.admin_view(
+                    partial(ImportPeopleView.as_view(), model_admin=self)
+                ),
+                name="people_person_import",
+            ),
             path(
                 "statistiques/",
                 self.admin_site.admin_view(
@@ -4,6 +4,7 @@ from uuid import uuid4
 
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
+from django.core.files.storage import default_storage
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import transaction
 from django.db.models import Count, F, Func, Value
@@ -17,10 +18,15 @@ from django.views.generic.detail import SingleObjectMixin
 
 from agir.lib.admin import AdminViewMixin
 from agir.people.actions.management import merge_persons
-from agir.people.admin.forms import AddPersonEmailForm, ChoosePrimaryAccount
+from agir.people.admin.forms import (
+    AddPersonEmailForm,
+    ChoosePrimaryAccount,
+    ImportPeopleForm,
+)
 from agir.people.models import Person
 from agir.people.person_forms.display import default_person_form_display
 from agir.people.person_forms.models import PersonForm
+from agir.people.tasks import import_people_file
 
 
 class FormSubmissionViewsMixin:
@@ -192,6 +198,41 @@ class MergePersonsView(AdminViewMixin, FormView):
         )
 
 
+class ImportPeopleView(AdminViewMixin, FormView):
+    form_class = ImportPeopleForm
+    template_name = "admin/people/person/import.html"
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.has_perm("people.add_person"):
+            raise PermissionDenied()
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        kwargs = super().get_context_data(**kwargs)
+
+        kwargs.update(
+            self.get_admin_helpers(form=kwargs["form"], fields=kwargs["form"].fields)
+        )
+
+        return kwargs
+
+    def form_valid(self, form):
+        # l'import est réalisé en tâche de fond pour ne pas être limité par la durée des requêtes
+        path = default_storage.save(f"imports/{uuid4()}.csv", form.cleaned_data["file"])
+        import_people_file.delay(
+            path,
+            [tag.id for tag in form.cleaned_data["tags"]],
+            is_insoumise=form.cleaned_data["is_insoumise"],
+        )
+
+        messages.add_message(
+            request=self.request,
+            level=messages.SUCCESS,
+            message="L'import a été lancé, les personnes vont apparaître progressivement.",
+        )
+        return HttpResponseRedirect(reverse("admin:people_person_changelist"))
+
+
 class StatisticsView(AdminViewMixin, TemplateView):
     template_name = "admin/people/person/statistics.html"
 
@@ -1,5 +1,6 @@
 from agir.authentication.models import Role
 from agir.authentication.backend_mixins import GetRoleMixin
+from agir.people.models import PersonEmail
 
 
 class PersonBackend(GetRoleMixin):
@@ -12,7 +13,7 @@ class PersonBackend(GetRoleMixin):
     def authenticate(self, request, email=None, password=None):
         try:
             role = Role._default_manager.select_related("person").get(
-                person__emails__address__iexact=email
+                person__emails__in=PersonEmail.objects.filter_by_address(email)
             )
         except Role.DoesNotExist:
             Role().set_password(password)
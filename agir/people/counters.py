@@ -0,0 +1,44 @@
+"""Compteurs publics, maintenus dans Redis
+
+Les compteurs sont incrémentés au fil des inscriptions, et régulièrement recalés sur la
+base de données (commande `update_counters`) pour tenir compte des désinscriptions et
+des modifications faites par d'autres moyens. Les lire ne coûte donc aucune requête.
+"""
+import logging
+
+from redis import RedisError
+
+from agir.api.redis import get_auth_redis_client
+from agir.people.models import Person
+
+logger = logging.getLogger(__name__)
+
+NSP_COUNTER_KEY = "PeopleCounter:nsp"
+
+# n'incrémente le compteur que s'il a déjà été initialisé depuis la base de données
+_INCREMENT_IF_EXISTS = """
+if redis.call('exists', KEYS[1]) == 1 then
+    return redis.call('incrby', KEYS[1], ARGV[1])
+end
+"""
+
+
+def increment_nsp_counter(amount=1):
+    try:
+        get_auth_redis_client().eval(_INCREMENT_IF_EXISTS, 1, NSP_COUNTER_KEY, amount)
+    except RedisError:
+        # le compteur sera corrigé lors du prochain recalage
+        logger.exception("Impossible d'incrémenter le compteur NSP")
+
+
+def reconcile_nsp_counter():
+    value = Person.objects.filter(is_2022=True).count()
+    get_auth_redis_client().set(NSP_COUNTER_KEY, value)
+    return value
+
+
+def get_nsp_counter():
+    value = get_auth_redis_client().get(NSP_COUNTER_KEY)
+    if value is None:
+        return reconcile_nsp_counter()
+    return int(value)
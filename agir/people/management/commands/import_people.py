@@ -0,0 +1,49 @@
+import csv
+
+from django.core.management.base import BaseCommand
+from tqdm import tqdm
+
+from agir.people.actions.imports import import_people, ImportReport
+from agir.people.models import PersonTag
+
+
+class Command(BaseCommand):
+    help = (
+        "Import people in bulk from a CSV file with at least an `email` column. "
+        "WARNING: make sure you have the full consent of all concerned individuals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", type=open)
+
+        parser.add_argument(
+            "-t",
+            "--tag",
+            action="append",
+            dest="tags",
+            default=[],
+            help="Add this tag to all imported people (may be repeated).",
+        )
+        parser.add_argument(
+            "-n",
+            "--non-insoumis",
+            action="store_false",
+            dest="insoumis",
+            default=True,
+            help="Create new accounts as non members, not subscribed to any newsletter.",
+        )
+        parser.add_argument("-d", "--delimiter", default=",")
+
+    def handle(self, *args, file, tags, insoumis, delimiter, **options):
+        tags = [PersonTag.objects.get_or_create(label=tag)[0] for tag in tags]
+        report = ImportReport()
+
+        with file:
+            import_people(
+                tqdm(csv.DictReader(file, delimiter=delimiter), unit=" lignes"),
+                tags=tags,
+                is_insoumise=insoumis,
+                report=report,
+            )
+
+        self.stdout.write(str(report))
@@ -0,0 +1,10 @@
+from django.core.management import BaseCommand
+
+from agir.people.counters import reconcile_nsp_counter
+
+
+class Command(BaseCommand):
+    help = "Reset the public counters stored in Redis from the database"
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"NSP: {reconcile_nsp_counter()}")
@@ -0,0 +1,19 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # la table des personnes est trop volumineuse pour être verrouillée le temps de la
+    # création de l'index
+    atomic = False
+
+    dependencies = [
+        ("people", "0072_auto_20201121_1320"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="person",
+            index=models.Index(fields=["created"], name="person_created_index"),
+        ),
+    ]
@@ -10,6 +10,7 @@ from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.db import models, transaction, IntegrityError
 from django.db.models import Q
+from django.db.models.functions import Upper
 from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.http import urlencode
@@ -99,10 +100,37 @@ class PersonManager(models.Manager.from_queryset(PersonQueryset)):
     def get_by_natural_key(self, email):
         email_field_class = self.model.emails.rel.related_model
         try:
-            return email_field_class.objects.get_by_natural_key(email).person
+            return (
+                email_field_class.objects.select_related("person")
+                .get_by_natural_key(email)
+                .person
+            )
         except email_field_class.DoesNotExist:
             raise self.model.DoesNotExist
 
+    def get_people_by_emails(self, emails):
+        """Renvoie un dictionnaire associant à chaque adresse email connue la personne correspondante
+
+        La recherche ne tient pas compte de la casse, et est réalisée en une seule requête ; les clés
+        du dictionnaire renvoyé sont les adresses telles qu'elles ont été passées en argument, et les
+        adresses inconnues en sont absentes.
+        """
+        email_field_class = self.model.emails.rel.related_model
+        emails = {email: email.strip().upper() for email in emails if email}
+
+        people = {
+            person_email.address_upper: person_email.person
+            for person_email in email_field_class.objects.select_related(
+                "person"
+            ).filter_by_addresses(emails.values())
+        }
+
+        return {
+            email: people[normalized]
+            for email, normalized in emails.items()
+            if normalized in people
+        }
+
     def _create_person(
         self,
         email,
@@ -395,6 +423,7 @@ class Person(
         indexes = (
             GinIndex(fields=["search"], name="search_index"),
             models.Index(fields=["contact_phone"], name="contact_phone_index"),
+            models.Index(fields=["created"], name="person_created_index"),
         )
 
     def save(self, *args, **kwargs):
@@ -571,7 +600,26 @@ class PersonTag(AbstractLabel):
         verbose_name = _("tag")
 
 
-class PersonEmailManager(models.Manager):
+class PersonEmailQueryset(models.QuerySet):
+    def filter_by_address(self, address):
+        """Filtre sur une adresse email sans tenir compte de la casse
+
+        L'expression utilisée correspond à l'index unique `uppercase_email` sur `upper(address)`.
+        """
+        return self.filter_by_addresses([address])
+
+    def filter_by_addresses(self, addresses):
+        return self.annotate(address_upper=Upper("address")).filter(
+            address_upper__in=[
+                address.strip().upper() for address in addresses if address
+            ]
+        )
+
+    def get_by_natural_key(self, address):
+        return self.filter_by_address(address).get()
+
+
+class PersonEmailManager(models.Manager.from_queryset(PersonEmailQueryset)):
     @classmethod
     def normalize_email(cls, email, *, lowercase_local_part=False):
         try:
@@ -596,10 +644,6 @@ class PersonEmailManager(models.Manager):
             **kwargs,
         )
 
-    def get_by_natural_key(self, address):
-        # look first without lowercasing email
-        return self.get(address__iexact=address)
-
 
 class PersonEmail(ExportModelOperationsMixin("person_email"), models.Model):
     """
@@ -659,7 +703,7 @@ class PersonEmail(ExportModelOperationsMixin("person_email"), models.Model):
             errors = e.message_dict
 
         if exclude is None or "address" not in exclude:
-            qs = PersonEmail.objects.filter(address__iexact=self.address)
+            qs = PersonEmail.objects.filter_by_address(self.address)
             if not self._state.adding and self.pk:
                 qs = qs.exclude(pk=self.pk)
 
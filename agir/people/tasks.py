@@ -1,5 +1,8 @@
+import csv
+
 from celery import shared_task
 from django.conf import settings
+from django.core.files.storage import default_storage
 from django.template.loader import render_to_string
 from django.utils.http import urlencode
 from django.utils.safestring import mark_safe
@@ -13,7 +16,8 @@ from agir.authentication.tokens import (
 from agir.lib.display import pretty_time_since
 from agir.lib.mailing import send_mosaico_email
 from agir.lib.utils import front_url
-from .models import Person, PersonFormSubmission, PersonEmail, PersonValidationSMS
+from .actions.imports import import_people
+from .models import Person, PersonFormSubmission, PersonValidationSMS, PersonTag
 from .person_forms.display import default_person_form_display
 from .actions.subscription import (
     SUBSCRIPTIONS_EMAILS,
@@ -41,9 +45,11 @@ def send_welcome_mail(person_pk, type):
 
 @emailing_task
 def send_confirmation_email(email, type=SUBSCRIPTION_TYPE_LFI, **kwargs):
-    if PersonEmail.objects.filter(address__iexact=email).exists():
+    try:
         p = Person.objects.get_by_natural_key(email)
-
+    except Person.DoesNotExist:
+        pass
+    else:
         if "already_subscribed" in SUBSCRIPTIONS_EMAILS[type]:
             message_info = SUBSCRIPTIONS_EMAILS[type]["already_subscribed"]
 
@@ -240,3 +246,19 @@ def send_validation_sms(sms_id):
     message = f"Votre code de validation pour votre compte France insoumise est {formatted_code}"
 
     send_sms(message, sms.phone_number)
+
+
+@shared_task
+def import_people_file(path, tag_ids, is_insoumise=True):
+    """Importe le fichier CSV téléversé depuis l'admin, puis le supprime"""
+    tags = list(PersonTag.objects.filter(id__in=tag_ids))
+
+    try:
+        with default_storage.open(path, "r") as file:
+            report = import_people(
+                csv.DictReader(file), tags=tags, is_insoumise=is_insoumise
+            )
+    finally:
+        default_storage.delete(path)
+
+    return str(report)
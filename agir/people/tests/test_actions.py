@@ -1,9 +1,12 @@
+from unittest.mock import patch
+
 from django.test import TestCase
 
 from agir.lib.tests.mixins import FakeDataMixin
 
-from ..models import Person, PersonForm, PersonFormSubmission
+from ..models import Person, PersonForm, PersonFormSubmission, PersonTag
 from agir.people.person_forms.display import default_person_form_display
+from ..actions.imports import import_people
 from ..actions.management import merge_persons
 
 
@@ -118,3 +121,50 @@ class MergePeopleTestCase(FakeDataMixin, TestCase):
             merge_persons(user, user)
 
         self.assertTrue(Person.objects.filter(pk=user.pk).exists())
+
+
+class ImportPeopleTestCase(TestCase):
+    def setUp(self):
+        self.existing = Person.objects.create_insoumise(
+            "existing@domain.com", first_name="Existant"
+        )
+        self.tag = PersonTag.objects.create(label="importés")
+
+    @patch("agir.people.actions.imports.transaction.on_commit", lambda f: f())
+    @patch("agir.people.actions.imports.geocode_people")
+    def test_import_people(self, geocode_people):
+        report = import_people(
+            [
+                {
+                    "email": "new@DOMAIN.com",
+                    "first_name": "Nouveau",
+                    "location_zip": "75010",
+                },
+                {"email": "Existing@domain.com", "first_name": "Autre"},
+                {"email": "NEW@domain.com"},
+                {"email": "not an email"},
+                {"email": "phone@domain.com", "contact_phone": "pas un numéro"},
+            ],
+            tags=[self.tag],
+            batch_size=2,
+        )
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual(report.existing, 1)
+        self.assertEqual(report.duplicates, 1)
+        self.assertEqual(report.invalid, 1)
+
+        new = Person.objects.get_by_natural_key("new@domain.com")
+        self.assertEqual(new.email, "new@domain.com")
+        self.assertEqual(new.first_name, "Nouveau")
+        self.assertTrue(new.is_insoumise)
+        self.assertEqual(new.contact_phone, "")
+
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.first_name, "Existant")
+        self.assertCountEqual(
+            self.tag.people.all(),
+            [new, self.existing, Person.objects.get_by_natural_key("phone@domain.com")],
+        )
+
+        geocode_people.delay.assert_called_once_with([str(new.id)])
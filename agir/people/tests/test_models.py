@@ -5,7 +5,7 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.test import TestCase
 
 from agir.authentication.models import Role
-from agir.people.models import Person
+from agir.people.models import Person, PersonEmail
 
 
 class BasicPersonTestCase(TestCase):
@@ -82,6 +82,37 @@ class BasicPersonTestCase(TestCase):
 
         self.assertEqual(str(person), "test1@domain.com")
 
+    def test_natural_key_is_case_insensitive(self):
+        person = Person.objects.create_insoumise("Test1@Domain.com")
+
+        self.assertEqual(person, Person.objects.get_by_natural_key("test1@DOMAIN.COM"))
+        self.assertEqual(
+            person.emails.get(),
+            PersonEmail.objects.get_by_natural_key(" TEST1@domain.com "),
+        )
+
+    def test_missing_address_matches_nobody(self):
+        Person.objects.create_insoumise("test1@domain.com")
+
+        self.assertFalse(PersonEmail.objects.filter_by_address(None).exists())
+        with self.assertRaises(Person.DoesNotExist):
+            Person.objects.get_by_natural_key(None)
+
+    def test_get_people_by_emails(self):
+        p1 = Person.objects.create_insoumise("test1@domain.com")
+        p2 = Person.objects.create_insoumise("test2@domain.com")
+        p2.add_email("other@domain.com")
+
+        with self.assertNumQueries(1):
+            people = Person.objects.get_people_by_emails(
+                ["TEST1@domain.com", "test2@domain.com", "Other@domain.com", "no@no.fr"]
+            )
+
+        self.assertEqual(
+            people,
+            {"TEST1@domain.com": p1, "test2@domain.com": p2, "Other@domain.com": p2},
+        )
+
 
 class ContactPhoneTestCase(TestCase):
     def setUp(self):
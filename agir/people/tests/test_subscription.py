@@ -16,6 +16,11 @@ from agir.api.redis import using_separate_redis_server
 from agir.clients.models import Client
 from agir.lib.http import add_query_params_to_url
 from agir.lib.utils import generate_token_params
+from agir.people.actions.subscription import (
+    save_subscription_information,
+    SUBSCRIPTION_TYPE_NSP,
+)
+from agir.people.counters import get_nsp_counter, reconcile_nsp_counter
 from agir.people.models import Person
 from agir.people.tasks import send_confirmation_email
 
@@ -371,3 +376,28 @@ class RetrievePersonAPIViewTestCase(WordpressClientMixin, TestCase):
         self.client.logout()
         res = self.client.get(f"{reverse('api_people_retrieve')}?id={self.person.id}")
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@using_separate_redis_server
+class NSPCounterTestCase(TestCase):
+    def setUp(self):
+        Person.objects.create_person("supporter@domain.com", is_2022=True)
+
+    @mock.patch("agir.people.actions.subscription.transaction.on_commit", lambda f: f())
+    def test_counter_is_incremented_on_subscription(self):
+        self.assertEqual(get_nsp_counter(), 1)
+
+        person = Person.objects.create_person("new@domain.com", is_2022=False)
+        save_subscription_information(person, SUBSCRIPTION_TYPE_NSP, {})
+        save_subscription_information(person, SUBSCRIPTION_TYPE_NSP, {})
+
+        self.assertEqual(get_nsp_counter(), 2)
+
+    def test_public_counter_does_not_query_the_database(self):
+        reconcile_nsp_counter()
+
+        with self.assertNumQueries(0):
+            res = self.client.get(reverse("api_public_nsp_counter"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), {"value": 1})
@@ -21,6 +21,9 @@ api_urls = [
         name="api_people_newsletters",
     ),
     path("api/people/counter/", api.CounterAPIView.as_view(), name="api_counter",),
+    path(
+        "api/people/counter/nsp/", api.nsp_counter_view, name="api_public_nsp_counter"
+    ),
 ]
 
 subscribe_urls = [
@@ -1,6 +1,6 @@
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_headers
+from django.http import JsonResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_GET
 from rest_framework import status
 from rest_framework.generics import GenericAPIView, RetrieveAPIView
 from rest_framework.response import Response
@@ -9,6 +9,7 @@ from agir.lib.rest_framework_permissions import (
     GlobalOrObjectPermissions,
     GlobalOnlyPermissions,
 )
+from agir.people.counters import get_nsp_counter
 from agir.people.models import Person
 from agir.people.serializers import (
     SubscriptionRequestSerializer,
@@ -35,13 +36,18 @@ class CounterAPIView(GenericAPIView):
     queryset = Person.objects.all()  # pour les permissions
     permission_classes = (GlobalOnlyPermissions,)
 
-    @method_decorator(vary_on_headers("Authorization"))
-    @method_decorator(cache_page(60))
     def get(self, request, *args, **kwargs):
-        return Response(
-            {"value": Person.objects.filter(is_2022=True).count()},
-            status=status.HTTP_200_OK,
-        )
+        return Response({"value": get_nsp_counter()}, status=status.HTTP_200_OK)
+
+
+@require_GET
+@cache_control(public=True, max_age=10)
+def nsp_counter_view(request):
+    """Compteur public des signatures NSP, pour les widgets intégrés aux sites
+
+    Ne fait aucune requête à la base de données : la valeur est lue dans Redis.
+    """
+    return JsonResponse({"value": get_nsp_counter()})
 
 
 class ManageNewslettersAPIView(GenericAPIView):
@@ -0,0 +1,116 @@
+import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from agir.lib.stats import get_general_stats, get_instant_stats
+from agir.statistics.models import DailyStatistics, ACTIVITY_FIELDS, SNAPSHOT_FIELDS
+
+__all__ = [
+    "get_today",
+    "compute_daily_statistics",
+    "update_daily_statistics",
+    "get_activity_statistics",
+    "get_current_statistics",
+]
+
+
+def get_today():
+    return timezone.now().astimezone(timezone.get_current_timezone()).date()
+
+
+def get_day_bounds(date):
+    start = timezone.make_aware(datetime.datetime.combine(date, datetime.time()))
+    end = timezone.make_aware(
+        datetime.datetime.combine(date + datetime.timedelta(days=1), datetime.time())
+    )
+    return start, end
+
+
+def compute_daily_statistics(date, snapshot=False):
+    """Calcule et enregistre les statistiques d'une journée terminée
+
+    :param date: la journée concernée, qui doit être passée
+    :param snapshot: s'il faut aussi enregistrer l'état des lieux actuel avec cette
+      journée ; à n'utiliser que pour la veille
+    :return: l'objet `DailyStatistics`
+    """
+    if date >= get_today():
+        raise ValueError(
+            "Impossible de calculer les statistiques d'une journée en cours"
+        )
+
+    values = get_general_stats(*get_day_bounds(date))
+    if snapshot:
+        values.update(get_instant_stats())
+
+    with transaction.atomic():
+        statistics, _ = DailyStatistics.objects.update_or_create(
+            date=date, defaults={f: values.get(f) for f in ACTIVITY_FIELDS}
+        )
+        if snapshot:
+            for f in SNAPSHOT_FIELDS:
+                setattr(statistics, f, values[f])
+            statistics.save(update_fields=SNAPSHOT_FIELDS)
+
+    return statistics
+
+
+def update_daily_statistics(start_date, end_date):
+    """Calcule les statistiques des journées manquantes entre deux dates
+
+    Les journées pas encore terminées sont ignorées.
+
+    :param start_date: la première journée (incluse)
+    :param end_date: la dernière journée (exclue)
+    :return: la liste des journées calculées
+    """
+    end_date = min(end_date, get_today())
+    existing = set(
+        DailyStatistics.objects.filter(
+            date__gte=start_date, date__lt=end_date
+        ).values_list("date", flat=True)
+    )
+
+    missing = [
+        start_date + datetime.timedelta(days=i)
+        for i in range((end_date - start_date).days)
+        if start_date + datetime.timedelta(days=i) not in existing
+    ]
+
+    for date in missing:
+        compute_daily_statistics(date)
+
+    return missing
+
+
+def get_activity_statistics(start_date, end_date):
+    """Renvoie les statistiques d'activité cumulées entre deux dates
+
+    Les statistiques sont lues dans les agrégats quotidiens, en calculant au besoin les
+    journées manquantes.
+
+    :param start_date: la première journée (incluse)
+    :param end_date: la dernière journée (exclue)
+    :return: un dictionnaire avec les mêmes clés que `agir.lib.stats.get_general_stats`
+    """
+    update_daily_statistics(start_date, end_date)
+    return DailyStatistics.objects.filter(
+        date__gte=start_date, date__lt=end_date
+    ).aggregate_activity()
+
+
+def get_current_statistics():
+    """Renvoie le dernier état des lieux enregistré
+
+    L'état des lieux n'est recalculé que si aucun n'a encore été enregistré.
+
+    :return: un couple `(date, statistiques)`, où `statistiques` est un dictionnaire
+      avec les mêmes clés que `agir.lib.stats.get_instant_stats`
+    """
+    statistics = DailyStatistics.objects.latest_snapshot()
+
+    if statistics is None:
+        return get_today(), get_instant_stats()
+
+    return statistics.date, {f: getattr(statistics, f) for f in SNAPSHOT_FIELDS}
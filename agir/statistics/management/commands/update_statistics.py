@@ -0,0 +1,41 @@
+import datetime
+
+from django.core.management import BaseCommand
+
+from agir.lib.management_utils import date_argument
+from agir.statistics.actions import (
+    compute_daily_statistics,
+    get_today,
+    update_daily_statistics,
+)
+
+CATCH_UP_DAYS = 30
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute the daily statistics of yesterday and of any missing day since START "
+        "(by default, the last 30 days). Meant to be run every night."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "start",
+            nargs="?",
+            default=None,
+            metavar="START",
+            help="the first day to check for missing statistics",
+            type=date_argument,
+        )
+
+    def handle(self, *args, start, **options):
+        yesterday = get_today() - datetime.timedelta(days=1)
+        if start is None:
+            start = yesterday - datetime.timedelta(days=CATCH_UP_DAYS)
+
+        compute_daily_statistics(yesterday, snapshot=True)
+        missing = update_daily_statistics(start, yesterday)
+
+        self.stdout.write(
+            f"Statistics computed for {yesterday} and {len(missing)} missing day(s)"
+        )
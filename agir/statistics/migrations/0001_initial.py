@@ -0,0 +1,119 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyStatistics",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="date de création",
+                    ),
+                ),
+                (
+                    "modified",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="dernière modification"
+                    ),
+                ),
+                (
+                    "date",
+                    models.DateField(editable=False, unique=True, verbose_name="date"),
+                ),
+                (
+                    "new_supporters",
+                    models.PositiveIntegerField(verbose_name="nouveaux signataires"),
+                ),
+                (
+                    "new_groups",
+                    models.PositiveIntegerField(verbose_name="nouveaux groupes"),
+                ),
+                (
+                    "new_events",
+                    models.PositiveIntegerField(verbose_name="nouveaux événements"),
+                ),
+                (
+                    "events_happened",
+                    models.PositiveIntegerField(verbose_name="événements survenus"),
+                ),
+                (
+                    "new_memberships",
+                    models.PositiveIntegerField(
+                        verbose_name="personnes ayant rejoint leur premier groupe local"
+                    ),
+                ),
+                (
+                    "subscribers",
+                    models.PositiveIntegerField(
+                        null=True, verbose_name="inscrits aux emails"
+                    ),
+                ),
+                (
+                    "groups",
+                    models.PositiveIntegerField(
+                        null=True, verbose_name="groupes locaux"
+                    ),
+                ),
+                (
+                    "group_members",
+                    models.PositiveIntegerField(
+                        null=True, verbose_name="membres de groupes"
+                    ),
+                ),
+                (
+                    "certified_groups",
+                    models.PositiveIntegerField(
+                        null=True, verbose_name="groupes locaux certifiés"
+                    ),
+                ),
+                (
+                    "certified_group_members",
+                    models.PositiveIntegerField(
+                        null=True, verbose_name="membres de groupes certifiés"
+                    ),
+                ),
+                (
+                    "thematic_groups",
+                    models.PositiveIntegerField(
+                        null=True, verbose_name="groupes thématiques"
+                    ),
+                ),
+                (
+                    "func_groups",
+                    models.PositiveIntegerField(
+                        null=True, verbose_name="groupes fonctionnels"
+                    ),
+                ),
+                (
+                    "pro_groups",
+                    models.PositiveIntegerField(
+                        null=True, verbose_name="groupes professionnels"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "statistiques quotidiennes",
+                "verbose_name_plural": "statistiques quotidiennes",
+                "ordering": ("date",),
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+from django.db import models
+from django.db.models import Sum
+
+from agir.lib.models import TimeStampedModel
+
+ACTIVITY_FIELDS = [
+    "new_supporters",
+    "new_groups",
+    "new_events",
+    "events_happened",
+    "new_memberships",
+]
+
+SNAPSHOT_FIELDS = [
+    "subscribers",
+    "groups",
+    "group_members",
+    "certified_groups",
+    "certified_group_members",
+    "thematic_groups",
+    "func_groups",
+    "pro_groups",
+]
+
+
+class DailyStatisticsQueryset(models.QuerySet):
+    def aggregate_activity(self):
+        """Somme les statistiques d'activité des journées du queryset"""
+        totals = self.aggregate(**{f: Sum(f) for f in ACTIVITY_FIELDS})
+        return {f: totals[f] or 0 for f in ACTIVITY_FIELDS}
+
+    def latest_snapshot(self):
+        """Renvoie la dernière journée pour laquelle un état des lieux a été enregistré"""
+        return self.exclude(subscribers=None).order_by("-date").first()
+
+
+class DailyStatistics(TimeStampedModel):
+    """Statistiques agrégées pour une journée
+
+    Les statistiques d'activité portent sur la journée elle-même. L'état des lieux
+    (nombre d'inscrits, de groupes, etc.) n'est disponible que pour les journées
+    calculées le lendemain même, puisqu'il n'est pas possible de le reconstituer après
+    coup.
+    """
+
+    objects = DailyStatisticsQueryset.as_manager()
+
+    date = models.DateField("date", unique=True, editable=False)
+
+    new_supporters = models.PositiveIntegerField("nouveaux signataires")
+    new_groups = models.PositiveIntegerField("nouveaux groupes")
+    new_events = models.PositiveIntegerField("nouveaux événements")
+    events_happened = models.PositiveIntegerField("événements survenus")
+    new_memberships = models.PositiveIntegerField(
+        "personnes ayant rejoint leur premier groupe local"
+    )
+
+    subscribers = models.PositiveIntegerField("inscrits aux emails", null=True)
+    groups = models.PositiveIntegerField("groupes locaux", null=True)
+    group_members = models.PositiveIntegerField("membres de groupes", null=True)
+    certified_groups = models.PositiveIntegerField(
+        "groupes locaux certifiés", null=True
+    )
+    certified_group_members = models.PositiveIntegerField(
+        "membres de groupes certifiés", null=True
+    )
+    thematic_groups = models.PositiveIntegerField("groupes thématiques", null=True)
+    func_groups = models.PositiveIntegerField("groupes fonctionnels", null=True)
+    pro_groups = models.PositiveIntegerField("groupes professionnels", null=True)
+
+    def __str__(self):
+        return f"Statistiques du {self.date}"
+
+    class Meta:
+        verbose_name = "statistiques quotidiennes"
+        verbose_name_plural = "statistiques quotidiennes"
+        ordering = ("date",)
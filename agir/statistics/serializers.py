@@ -0,0 +1,22 @@
+from rest_framework import serializers
+
+from agir.statistics.models import DailyStatistics, ACTIVITY_FIELDS, SNAPSHOT_FIELDS
+
+
+class DailyStatisticsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DailyStatistics
+        fields = ("date", *ACTIVITY_FIELDS, *SNAPSHOT_FIELDS)
+        read_only_fields = fields
+
+
+class StatisticsRequestSerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, data):
+        if "start" in data and "end" in data and data["start"] > data["end"]:
+            raise serializers.ValidationError(
+                "La date de début doit précéder la date de fin."
+            )
+        return data
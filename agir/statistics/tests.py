@@ -0,0 +1,65 @@
+import datetime
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from agir.people.models import Person
+from agir.statistics.actions import (
+    compute_daily_statistics,
+    get_activity_statistics,
+    get_today,
+)
+from agir.statistics.models import DailyStatistics
+
+
+class DailyStatisticsTestCase(APITestCase):
+    def setUp(self):
+        self.today = get_today()
+        self.yesterday = self.today - datetime.timedelta(days=1)
+
+        for i, days in enumerate([1, 1, 3]):
+            p = Person.objects.create_insoumise(f"person{i}@domain.com")
+            Person.objects.filter(pk=p.pk).update(
+                created=timezone.now() - datetime.timedelta(days=days)
+            )
+
+    def test_compute_daily_statistics(self):
+        statistics = compute_daily_statistics(self.yesterday, snapshot=True)
+
+        self.assertEqual(statistics.new_supporters, 2)
+        self.assertEqual(statistics.subscribers, 3)
+
+        with self.assertRaises(ValueError):
+            compute_daily_statistics(self.today)
+
+    def test_activity_statistics_are_computed_once(self):
+        start = self.today - datetime.timedelta(days=7)
+
+        stats = get_activity_statistics(start, self.today)
+        self.assertEqual(stats["new_supporters"], 3)
+        self.assertEqual(DailyStatistics.objects.count(), 7)
+
+        with self.assertNumQueries(2):
+            get_activity_statistics(start, self.today)
+
+    def test_api_returns_time_series(self):
+        compute_daily_statistics(self.yesterday, snapshot=True)
+        url = reverse("api_daily_statistics")
+
+        res = self.client.get(url)
+        self.assertIn(
+            res.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN]
+        )
+
+        superuser = Person.objects.create_superperson("super@user.fr", None)
+        self.client.force_authenticate(superuser.role)
+
+        res = self.client.get(url, {"start": self.yesterday.isoformat()})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["new_supporters"], 2)
+
+        res = self.client.get(url, {"start": "pas une date"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
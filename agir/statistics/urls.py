@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path(
+        "api/statistiques/",
+        views.DailyStatisticsAPIView.as_view(),
+        name="api_daily_statistics",
+    ),
+]
@@ -0,0 +1,34 @@
+import datetime
+
+from rest_framework.generics import ListAPIView
+
+from agir.lib.rest_framework_permissions import GlobalOnlyPermissions
+from agir.statistics.actions import get_today
+from agir.statistics.models import DailyStatistics
+from agir.statistics.serializers import (
+    DailyStatisticsSerializer,
+    StatisticsRequestSerializer,
+)
+
+DEFAULT_PERIOD = datetime.timedelta(days=30)
+
+
+class DailyStatisticsAPIView(ListAPIView):
+    """Série temporelle des statistiques quotidiennes
+
+    Les paramètres `start` et `end` (inclus) permettent de choisir la période, par
+    défaut les 30 derniers jours.
+    """
+
+    serializer_class = DailyStatisticsSerializer
+    queryset = DailyStatistics.objects.all()
+    permission_classes = (GlobalOnlyPermissions,)
+
+    def filter_queryset(self, queryset):
+        params = StatisticsRequestSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+
+        end = params.validated_data.get("end", get_today())
+        start = params.validated_data.get("start", end - DEFAULT_PERIOD)
+
+        return queryset.filter(date__gte=start, date__lte=end).order_by("date")
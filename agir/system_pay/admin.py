@@ -49,3 +49,27 @@ class SystemPayTransactionAdmin(admin.ModelAdmin):
             return obj.alias.identifier
 
         return "-"
+
+
+@admin.register(models.SystemPayWebhookCall)
+class SystemPayWebhookCallAdmin(admin.ModelAdmin):
+    list_display = ("id", "created", "mode", "order_id", "trans_uuid", "status")
+    readonly_fields = (
+        "created",
+        "mode",
+        "order_id",
+        "trans_uuid",
+        "data",
+        "status",
+        "processed",
+        "error",
+    )
+    fields = readonly_fields
+    list_filter = ("status", "mode")
+    search_fields = ("=order_id", "=trans_uuid")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,46 @@
+from django.core.management import BaseCommand
+
+from agir.system_pay.models import SystemPayWebhookCall
+from agir.system_pay.webhooks import process_webhook_calls
+
+
+class Command(BaseCommand):
+    """Traite les appels SystemPay restés en attente ou en échec
+
+    À exécuter régulièrement par cron, par exemple toutes les heures avec
+    `--retry-failed` : les appels dont la tâche n'a pas pu être exécutée (worker
+    indisponible, tâche abandonnée après plusieurs tentatives) ou dont le traitement a
+    échoué sont ainsi traités sans intervention. Un appel en échec n'est plus retraité
+    après `SystemPayWebhookCall.MAX_ATTEMPTS` traitements : il faut alors corriger la
+    cause de l'erreur et le remettre en attente manuellement.
+    """
+
+    help = "Process pending (and optionally failed) SystemPay webhook calls, from cron"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-r",
+            "--retry-failed",
+            action="store_true",
+            help="Also process again the calls whose processing failed, "
+            "up to a maximum number of attempts.",
+        )
+
+    def handle(self, *args, retry_failed, **options):
+        if retry_failed:
+            SystemPayWebhookCall.objects.filter(
+                status=SystemPayWebhookCall.STATUS_FAILED,
+                attempts__lt=SystemPayWebhookCall.MAX_ATTEMPTS,
+            ).update(status=SystemPayWebhookCall.STATUS_PENDING, processed=None)
+
+        order_ids = (
+            SystemPayWebhookCall.objects.filter(
+                status=SystemPayWebhookCall.STATUS_PENDING
+            )
+            .order_by()
+            .values_list("order_id", flat=True)
+            .distinct()
+        )
+
+        count = sum(process_webhook_calls(order_id) for order_id in list(order_ids))
+        self.stdout.write(f"{count} appel(s) traité(s)")
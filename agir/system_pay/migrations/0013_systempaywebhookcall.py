@@ -0,0 +1,85 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("system_pay", "0012_auto_20201021_1525"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SystemPayWebhookCall",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Date de réception"
+                    ),
+                ),
+                (
+                    "mode",
+                    models.CharField(max_length=30, verbose_name="Mode de paiement"),
+                ),
+                (
+                    "order_id",
+                    models.CharField(
+                        db_index=True, max_length=64, verbose_name="Numéro de commande"
+                    ),
+                ),
+                (
+                    "trans_uuid",
+                    models.UUIDField(
+                        blank=True,
+                        db_index=True,
+                        null=True,
+                        verbose_name="UUID de la transaction",
+                    ),
+                ),
+                ("data", models.JSONField(verbose_name="Contenu de l'appel")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("P", "En attente de traitement"),
+                            ("D", "Traité"),
+                            ("I", "Ignoré (déjà traité)"),
+                            ("F", "Échec du traitement"),
+                        ],
+                        default="P",
+                        max_length=1,
+                        verbose_name="Statut",
+                    ),
+                ),
+                (
+                    "processed",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Date de traitement"
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Erreur")),
+            ],
+            options={
+                "verbose_name": "Appel du webhook SystemPay",
+                "verbose_name_plural": "Appels du webhook SystemPay",
+                "ordering": ("id",),
+            },
+        ),
+        migrations.AddIndex(
+            model_name="systempaywebhookcall",
+            index=models.Index(
+                condition=models.Q(status="P"),
+                fields=["order_id", "id"],
+                name="sp_webhook_pending_idx",
+            ),
+        ),
+    ]
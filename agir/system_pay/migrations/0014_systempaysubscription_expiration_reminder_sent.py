@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("system_pay", "0013_systempaywebhookcall"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="systempaysubscription",
+            name="expiration_reminder_sent",
+            field=models.DateTimeField(
+                editable=False,
+                null=True,
+                verbose_name="Dernier rappel d'expiration de la carte envoyé le",
+            ),
+        ),
+    ]
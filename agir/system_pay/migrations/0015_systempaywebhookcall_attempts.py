@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("system_pay", "0014_systempaysubscription_expiration_reminder_sent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="systempaywebhookcall",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(
+                default=0, editable=False, verbose_name="Nombre de traitements"
+            ),
+        ),
+    ]
@@ -1,5 +1,8 @@
-from django.db.models import JSONField
+from datetime import timedelta
+
+from django.db.models import JSONField, Q
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from django_prometheus.models import ExportModelOperationsMixin
 
@@ -51,9 +54,26 @@ class SystemPayAlias(ExportModelOperationsMixin("system_pay_alias"), TimeStamped
     expiry_date = models.DateField("Date d'expiration de la carte bancaire")
 
 
+# délai minimum entre deux rappels d'expiration de carte pour une même souscription
+EXPIRATION_REMINDER_INTERVAL = timedelta(days=20)
+
+
+class SystemPaySubscriptionQueryset(models.QuerySet):
+    def awaiting_expiration_reminder(self):
+        return self.filter(
+            Q(expiration_reminder_sent__isnull=True)
+            | Q(
+                expiration_reminder_sent__lt=timezone.now()
+                - EXPIRATION_REMINDER_INTERVAL
+            )
+        )
+
+
 class SystemPaySubscription(
     ExportModelOperationsMixin("system_pay_subscription"), TimeStampedModel
 ):
+    objects = SystemPaySubscriptionQueryset.as_manager()
+
     identifier = models.CharField(
         "Identifiant de la souscription", unique=True, max_length=30, blank=False
     )
@@ -68,3 +88,59 @@ class SystemPaySubscription(
     active = models.BooleanField(
         "La souscription est active côté SystemPay", default=True
     )
+
+    expiration_reminder_sent = models.DateTimeField(
+        "Dernier rappel d'expiration de la carte envoyé le", null=True, editable=False,
+    )
+
+
+class SystemPayWebhookCall(models.Model):
+    """Appel du webhook SystemPay, enregistré tel quel avant traitement
+
+    Les appels sont enregistrés dès leur réception, après vérification de leur signature,
+    puis traités de façon asynchrone, dans l'ordre de réception pour une même commande
+    (voir `agir.system_pay.webhooks`).
+    """
+
+    STATUS_PENDING = "P"
+    STATUS_PROCESSED = "D"
+    STATUS_IGNORED = "I"
+    STATUS_FAILED = "F"
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "En attente de traitement"),
+        (STATUS_PROCESSED, "Traité"),
+        (STATUS_IGNORED, "Ignoré (déjà traité)"),
+        (STATUS_FAILED, "Échec du traitement"),
+    )
+
+    # nombre de traitements au delà duquel un appel en échec n'est plus retraité
+    MAX_ATTEMPTS = 5
+
+    created = models.DateTimeField("Date de réception", auto_now_add=True)
+    mode = models.CharField("Mode de paiement", max_length=30)
+    order_id = models.CharField("Numéro de commande", max_length=64, db_index=True)
+    trans_uuid = models.UUIDField(
+        "UUID de la transaction", null=True, blank=True, db_index=True
+    )
+    data = JSONField("Contenu de l'appel")
+
+    status = models.CharField(
+        "Statut", max_length=1, choices=STATUS_CHOICES, default=STATUS_PENDING
+    )
+    processed = models.DateTimeField("Date de traitement", null=True, blank=True)
+    error = models.TextField("Erreur", blank=True)
+    attempts = models.PositiveSmallIntegerField(
+        "Nombre de traitements", default=0, editable=False
+    )
+
+    class Meta:
+        verbose_name = "Appel du webhook SystemPay"
+        verbose_name_plural = "Appels du webhook SystemPay"
+        ordering = ("id",)
+        indexes = (
+            models.Index(
+                fields=["order_id", "id"],
+                condition=models.Q(status="P"),
+                name="sp_webhook_pending_idx",
+            ),
+        )
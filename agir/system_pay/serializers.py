@@ -90,9 +90,12 @@ class SystemPayWebhookSerializer(serializers.Serializer):
         choices=SYSTEMPAY_RECURRENCE_STATUS_CHOICES,
     )  # Ce champ indique un potentiel cas d'erreur de création de souscription
 
-    def __init__(self, sp_config, data=serializers.empty, **kwargs):
+    def __init__(
+        self, sp_config, data=serializers.empty, verify_signature=True, **kwargs
+    ):
         super().__init__(instance=None, data=data)
         self.sp_config = sp_config
+        self.verify_signature = verify_signature
 
     def validate_vads_trans_status(self, value):
         return value and SYSTEMPAY_STATUS_CHOICE[value]
@@ -111,8 +114,9 @@ class SystemPayWebhookSerializer(serializers.Serializer):
         initial_data = self.initial_data
         self.cleaned_data = clean_system_pay_data(initial_data)
 
-        if "signature" not in initial_data or not check_signature(
-            initial_data, self.sp_config["certificate"]
+        if self.verify_signature and (
+            "signature" not in initial_data
+            or not check_signature(initial_data, self.sp_config["certificate"])
         ):
             raise serializers.ValidationError(
                 detail={"signature": "Signature manquante ou incorrecte"},
@@ -0,0 +1,13 @@
+from celery import shared_task
+from django.db import DatabaseError
+
+from agir.system_pay import webhooks
+
+
+# les erreurs de traitement d'un appel sont enregistrées sur l'appel lui-même : seules
+# les erreurs de base de données (verrou, connexion perdue...) font échouer la tâche
+@shared_task(
+    autoretry_for=(DatabaseError,), retry_backoff=True, max_retries=5,
+)
+def process_webhook_calls(order_id):
+    webhooks.process_webhook_calls(order_id)
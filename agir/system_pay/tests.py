@@ -4,6 +4,7 @@ from unittest import mock
 from urllib.parse import urlparse
 
 from django.conf import settings
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 from django.utils import timezone
@@ -14,9 +15,10 @@ from agir.lib.tests.mixins import FakeDataMixin
 from agir.payments.models import Payment, Subscription
 from agir.system_pay import SystemPayPaymentMode
 from agir.system_pay.crypto import get_signature
-from agir.system_pay.models import SystemPayTransaction
+from agir.system_pay.models import SystemPayTransaction, SystemPayWebhookCall
 from agir.system_pay.soap_client import SystemPaySoapClient
 from agir.system_pay.utils import get_trans_id_from_order_id
+from agir.system_pay.webhooks import process_webhook_calls
 
 
 def random_subscription_id():
@@ -166,6 +168,107 @@ class WebhookTestCase(FakeDataMixin, TestCase):
             2, SystemPayTransaction.objects.filter(payment=payment).count()
         )
 
+    @mock.patch("agir.donations.views.donations_views.send_donation_email")
+    def test_webhook_calls_are_recorded_then_processed(self, send_donation_email):
+        payment = Payment.objects.create(
+            person=self.data["people"]["user1"],
+            price=1000,
+            type=DonsConfig.PAYMENT_TYPE,
+            mode=SystemPayPaymentMode.id,
+        )
+        order_id = SystemPayTransaction.objects.create(payment=payment).pk
+        systempay_data = webhookcall_data(
+            order_id=order_id,
+            trans_id=get_trans_id_from_order_id(order_id),
+            operation_type="DEBIT",
+            trans_status="AUTHORISED",
+            amount=payment.price,
+            cust_id=payment.person.pk,
+        )
+
+        with mock.patch("agir.system_pay.views.process_webhook_calls") as task:
+            res = self.client.post(reverse("system_pay:webhook"), systempay_data)
+        self.assertEqual(res.status_code, 200)
+        task.delay.assert_called_once_with(str(order_id))
+
+        call = SystemPayWebhookCall.objects.get()
+        self.assertEqual(call.status, SystemPayWebhookCall.STATUS_PENDING)
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, Payment.STATUS_WAITING)
+
+        call_command("process_system_pay_webhooks", stdout=mock.MagicMock())
+
+        call.refresh_from_db()
+        self.assertEqual(call.status, SystemPayWebhookCall.STATUS_PROCESSED)
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, Payment.STATUS_COMPLETED)
+
+    def test_processing_errors_are_recorded(self):
+        systempay_data = webhookcall_data(
+            order_id=987654,
+            trans_id=get_trans_id_from_order_id(987654),
+            operation_type="DEBIT",
+            trans_status="AUTHORISED",
+            amount=1000,
+            cust_id=self.data["people"]["user1"].pk,
+        )
+
+        res = self.client.post(reverse("system_pay:webhook"), systempay_data)
+        self.assertEqual(res.status_code, 200)
+
+        call = SystemPayWebhookCall.objects.get()
+        self.assertEqual(call.status, SystemPayWebhookCall.STATUS_FAILED)
+        self.assertIn("order_id", call.error)
+
+    @mock.patch("agir.system_pay.webhooks.WebhookCallProcessor.process")
+    def test_unexpected_errors_do_not_block_next_calls(self, process):
+        process.side_effect = [RuntimeError("listener en erreur"), True]
+
+        for trans_status in ["AUTHORISED", "CAPTURED"]:
+            systempay_data = webhookcall_data(
+                order_id=987654,
+                trans_id=get_trans_id_from_order_id(987654),
+                operation_type="DEBIT",
+                trans_status=trans_status,
+                amount=1000,
+                cust_id=self.data["people"]["user1"].pk,
+            )
+            with mock.patch("agir.system_pay.views.process_webhook_calls"):
+                self.client.post(reverse("system_pay:webhook"), systempay_data)
+
+        self.assertEqual(process_webhook_calls("987654"), 2)
+
+        failed, processed = SystemPayWebhookCall.objects.order_by("pk")
+        self.assertEqual(failed.status, SystemPayWebhookCall.STATUS_FAILED)
+        self.assertIn("listener en erreur", failed.error)
+        self.assertEqual(processed.status, SystemPayWebhookCall.STATUS_PROCESSED)
+
+    @mock.patch("agir.system_pay.webhooks.WebhookCallProcessor.process")
+    def test_failed_calls_are_retried_a_limited_number_of_times(self, process):
+        process.side_effect = RuntimeError("listener en erreur")
+
+        systempay_data = webhookcall_data(
+            order_id=987654,
+            trans_id=get_trans_id_from_order_id(987654),
+            operation_type="DEBIT",
+            trans_status="AUTHORISED",
+            amount=1000,
+            cust_id=self.data["people"]["user1"].pk,
+        )
+        self.client.post(reverse("system_pay:webhook"), systempay_data)
+
+        for _ in range(SystemPayWebhookCall.MAX_ATTEMPTS + 2):
+            call_command(
+                "process_system_pay_webhooks",
+                retry_failed=True,
+                stdout=mock.MagicMock(),
+            )
+
+        call = SystemPayWebhookCall.objects.get()
+        self.assertEqual(call.status, SystemPayWebhookCall.STATUS_FAILED)
+        self.assertEqual(call.attempts, SystemPayWebhookCall.MAX_ATTEMPTS)
+        self.assertEqual(process.call_count, SystemPayWebhookCall.MAX_ATTEMPTS)
+
     @mock.patch("agir.donations.views.donations_views.send_donation_email")
     def test_transaction_on_canceled_payment(self, send_donation_email):
         payment = Payment.objects.create(
@@ -0,0 +1,371 @@
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from agir.payments.actions import subscriptions
+from agir.payments.actions.payments import notify_status_change, create_payment
+from agir.payments.actions.subscriptions import (
+    notify_status_change as notify_subscription_status_change,
+)
+from agir.payments.models import Subscription
+from agir.payments.payment_modes import PAYMENT_MODES
+from agir.system_pay.actions import (
+    update_payment_from_transaction,
+    update_subscription_from_transaction,
+    replace_sp_subscription_for_subscription,
+)
+from agir.system_pay.models import (
+    SystemPayTransaction,
+    SystemPayAlias,
+    SystemPaySubscription,
+    SystemPayWebhookCall,
+)
+from agir.system_pay.serializers import SystemPayWebhookSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class DuplicateWebhookCall(Exception):
+    pass
+
+
+class WebhookCallProcessor:
+    """Traite un appel du webhook SystemPay déjà enregistré
+
+    La signature de l'appel a été vérifiée à sa réception : elle n'est pas vérifiée de
+    nouveau, d'autant que les champs sensibles, nécessaires à cette vérification, ne sont
+    pas conservés.
+    """
+
+    def __init__(self, call):
+        self.call = call
+        self.serializer = SystemPayWebhookSerializer(
+            sp_config=PAYMENT_MODES[call.mode].sp_config,
+            data=call.data,
+            verify_signature=False,
+        )
+
+    def process(self):
+        """Traite l'appel
+
+        :return: `True` si l'appel a été traité, `False` s'il a été ignoré parce que la
+          transaction correspondante a déjà été traitée
+        """
+        serializer = self.serializer
+        serializer.is_valid(raise_exception=True)
+
+        # on vérifie, pour garantir l'idempotence, que la transaction n'a pas déjà été
+        # traitée, en cherchant une transaction de même UUID. Même dans le cas des paiements,
+        # où la transaction existe déjà, nous n'avons pas encore son UUID (qui est généré côté
+        # SystemPay) et nous ne devrions donc pas trouver de transaction.
+        try:
+            sp_transaction = serializer.get_transaction_by_uuid()
+        except serializers.ValidationError:
+            # Aucune transaction avec cette UUID n'est connue, ce qui est attendu !
+            pass
+        else:
+            # Transaction déjà traitée !
+            # Si c'est un RETRY ou une demande backoffice (BO), on continue la prise en compte du paiement
+            # Sinon on vérifie que l'appel précédent avait exactement les mêmes
+            # arguments, parce que sinon c'est bizarre,
+            if serializer.validated_data.get("url_check_src") not in ["RETRY", "BO"]:
+                if sp_transaction.webhook_calls:
+                    differences = serializer.differences(
+                        sp_transaction.webhook_calls[-1]
+                    )
+                    if differences:
+                        logger.error(
+                            f"Webhook appelé deux fois différemment pour la même transaction",
+                            extra={
+                                "webhook_call": self.call.pk,
+                                "differences": differences,
+                            },
+                        )
+                        raise DuplicateWebhookCall(
+                            "Webhook appelé deux fois différemment pour la même transaction"
+                        )
+                return False
+
+        operation_type = serializer.data.get("vads_operation_type")
+
+        if operation_type == "CREDIT":
+            self.handle_refund(serializer)
+        elif operation_type == "VERIFICATION":
+            self.handle_subscription(serializer)
+        else:
+            self.handle_payment(serializer)
+
+        return True
+
+    def save_transaction(self, sp_transaction, serializer):
+        """Sauvegarde le contenu de l'appel webhook ainsi que status et uuid de la transaction
+
+        :param sp_transaction:
+        :param serializer:
+        :return:
+        """
+        # sauve les données nettoyées (i.e. les champs sensibles et superflus sont retirés)
+        sp_transaction.webhook_calls.append(serializer.cleaned_data)
+        sp_transaction.status = serializer.validated_data["trans_status"]
+        sp_transaction.uuid = serializer.validated_data.get("trans_uuid")
+        sp_transaction.save()
+
+    def handle_refund(self, serializer):
+        # dans le cas d'un remboursement, l'order_id est l'id de la transaction d'origine
+        original_sp_transaction = serializer.get_transaction_by_order_id()
+        payment = original_sp_transaction.payment
+
+        if payment is None:
+            raise serializers.ValidationError(
+                "pas de paiement associé à la transaction d'origine",
+                code="missing_payment",
+            )
+
+        if payment.mode != self.call.mode:
+            raise serializers.ValidationError(
+                "le mode du paiement ne correspond pas à celui pour lequel le webhook est défini",
+                code="wrong_mode",
+            )
+
+        self.check_refund_transaction_match_payment(serializer, payment)
+
+        sp_transaction, _ = SystemPayTransaction.objects.get_or_create(
+            uuid=serializer.validated_data["vads_trans_uuid"],
+            defaults={"payment": payment, "is_refund": True},
+        )
+
+        self.save_transaction(sp_transaction, serializer)
+
+        update_payment_from_transaction(payment, sp_transaction)
+        notify_status_change(payment)
+
+    def handle_payment(self, serializer):
+        subscription_id = serializer.validated_data.get("subscription")
+
+        if subscription_id:
+            # il s'agit d'un paiement automatique lié à une souscription
+            # on devrait avoir la trace de cette souscription dans notre
+            # base de données
+            sp_subscription = serializer.get_sp_subscription()
+            subscription = sp_subscription.subscription
+
+            if subscription.mode != self.call.mode:
+                raise serializers.ValidationError(
+                    "le mode du paiement ne correspond pas à celui pour lequel le webhook est défini",
+                    code="wrong_mode",
+                )
+
+            if self.update_alias_from_transaction(serializer, sp_subscription):
+                sp_subscription.save()
+
+            self.check_payment_transaction_match_subscription(
+                serializer=serializer, subscription=subscription
+            )
+
+            payment = create_payment(
+                person=subscription.person,
+                type=subscription.type,
+                price=serializer.validated_data["amount"],
+                mode=self.call.mode,
+                subscription=subscription,
+            )
+
+            sp_transaction = SystemPayTransaction(
+                payment=payment, alias=sp_subscription.alias, is_refund=False
+            )
+
+        else:
+            # dans ce cas il s'agit d'un paiement via le formulaire
+            sp_transaction = serializer.get_transaction_by_order_id()
+            payment = sp_transaction.payment
+
+            if payment is None:
+                raise serializers.ValidationError(
+                    "pas de paiement associé à la transaction", code="missing_payment"
+                )
+
+            if payment.mode != self.call.mode:
+                raise serializers.ValidationError(
+                    "le mode du paiement ne correspond pas à celui pour lequel le webhook est défini",
+                    code="wrong_mode",
+                )
+
+        self.save_transaction(sp_transaction, serializer)
+        update_payment_from_transaction(payment, sp_transaction)
+        notify_status_change(payment)
+
+    def handle_subscription(self, serializer):
+        sp_transaction = serializer.get_transaction_by_order_id()
+
+        if sp_transaction.subscription is None:
+            raise serializers.ValidationError(
+                "Souscription manquante sur la transaction", code="missing_subscription"
+            )
+
+        if sp_transaction.subscription.mode != self.call.mode:
+            raise serializers.ValidationError(
+                "le mode de la souscription ne correspond pas à celui pour lequel le webhook est défini",
+                code="wrong_mode",
+            )
+
+        if serializer.is_successful():
+            try:
+                sp_subscription = SystemPaySubscription.objects.get(
+                    identifier=serializer.validated_data["subscription"]
+                )
+            except SystemPaySubscription.DoesNotExist:
+                sp_subscription = SystemPaySubscription(
+                    identifier=serializer.validated_data["subscription"]
+                )
+
+            sp_subscription.subscription = sp_transaction.subscription
+
+            self.update_alias_from_transaction(serializer, sp_subscription)
+            sp_subscription.save()
+
+            replace_sp_subscription_for_subscription(
+                sp_transaction.subscription, sp_subscription
+            )
+
+        self.save_transaction(sp_transaction, serializer)
+
+        update_subscription_from_transaction(
+            sp_transaction.subscription, sp_transaction
+        )
+
+        notify_subscription_status_change(sp_transaction.subscription)
+
+    def update_alias_from_transaction(self, serializer, sp_subscription):
+        """Met à jour l'alias associé à une Souscription SystemPay
+
+        Si l'alias a changé de date d'expiration, met à jour l'alias.
+        Si c'est un nouvel alias, enregistre-le.
+
+        La valeur de retour indique si il faut sauvegarder la souscription SystemPay"""
+
+        alias, created = SystemPayAlias.objects.get_or_create(
+            identifier=serializer.validated_data["identifier"],
+            defaults={"expiry_date": serializer.validated_data["expiry_date"]},
+        )
+
+        # mise à jour de la date d'expiration de l'alias
+        if "expiry_date" in serializer.validated_data:
+            if alias.expiry_date != serializer.validated_data["expiry_date"]:
+                alias.expiry_date = serializer.validated_data["expiry_date"]
+                alias.save()
+
+        # Comparer les alias_id permet d'éviter une RelatedObjectDoesNotExist si aucun alias n'a encore été assigné
+        if sp_subscription.alias_id != alias.id:
+            sp_subscription.alias = alias
+            return True
+        return False
+
+    def check_payment_transaction_match_subscription(self, serializer, subscription):
+        if subscription.person is None:
+            # si la personne n'existe plus, il y a un problème, et on met fin à la souscription si elle est active
+            if subscription.status == Subscription.STATUS_ACTIVE:
+                subscriptions.terminate_subscription(subscription)
+            logger.error(
+                "Paiement automatique déclenché par SystemPay sur une transaction sans personne "
+                "associée. Par sécurité, la subscription a été terminée.",
+                extra={"webhook_call": self.call.pk},
+            )
+
+        if (
+            subscription.person is not None
+            and subscription.person.id != serializer.validated_data["cust_id"]
+        ):
+            logger.error(
+                "Personne différente pour la souscription entre agir et system_pay",
+                extra={"webhook_call": self.call.pk},
+            )
+
+        if subscription.price != serializer.validated_data["amount"]:
+            logger.error(
+                "Le montant d'un paiement mensuel ne correspond pas à celui de la souscription",
+                extra={"webhook_call": self.call.pk},
+            )
+
+        if subscription.status != Subscription.STATUS_ACTIVE:
+            logger.error(
+                "Paiement sur une souscription non active",
+                extra={"webhook_call": self.call.pk},
+            )
+
+    def check_refund_transaction_match_payment(self, serializer, payment):
+        if payment is None:
+            raise serializers.ValidationError(
+                detail="Paiement inexistant", code="missing_payment"
+            )
+
+        if (
+            payment.person is not None
+            and payment.person.id != serializer.validated_data["cust_id"]
+        ):
+            logger.error(
+                "Personne différente pour un remboursement et le paiement d'origine",
+                extra={"webhook_call": self.call.pk},
+            )
+
+        if payment.price != serializer.validated_data["amount"]:
+            logger.error(
+                "Le montant du remboursement ne correspond pas au montant du paiement d'origine",
+                extra={"webhook_call": self.call.pk},
+            )
+
+
+def process_webhook_calls(order_id):
+    """Traite tous les appels en attente pour une même commande
+
+    Les appels sont verrouillés le temps du traitement : deux workers ne peuvent donc pas
+    traiter en même temps des appels d'une même commande, et les appels sont traités dans
+    leur ordre de réception. Chaque appel est traité dans son propre point de sauvegarde,
+    pour que l'échec de l'un, quelle qu'en soit la cause, n'empêche pas le traitement des
+    suivants : l'appel est alors marqué comme échoué, avec son erreur.
+
+    :param order_id: le numéro de commande SystemPay
+    :return: le nombre d'appels traités
+    """
+    with transaction.atomic():
+        calls = list(
+            SystemPayWebhookCall.objects.select_for_update().filter(
+                order_id=order_id, status=SystemPayWebhookCall.STATUS_PENDING
+            )
+        )
+
+        for call in calls:
+            try:
+                with transaction.atomic():
+                    processed = WebhookCallProcessor(call).process()
+            except (serializers.ValidationError, DuplicateWebhookCall) as e:
+                logger.exception(
+                    "Erreur lors du traitement d'une transaction",
+                    extra={"webhook_call": call.pk},
+                )
+                call.status = SystemPayWebhookCall.STATUS_FAILED
+                call.error = str(e)
+            except Exception as e:
+                # erreur inattendue (base de données, listener de paiement...) : seul le
+                # point de sauvegarde de cet appel est annulé, et l'appel pourra être
+                # traité à nouveau avec `process_system_pay_webhooks --retry-failed`,
+                # jusqu'à `SystemPayWebhookCall.MAX_ATTEMPTS` fois
+                logger.exception(
+                    "Erreur inattendue lors du traitement d'une transaction",
+                    extra={"webhook_call": call.pk},
+                )
+                call.status = SystemPayWebhookCall.STATUS_FAILED
+                call.error = f"{e.__class__.__name__}: {e}"
+            else:
+                call.status = (
+                    SystemPayWebhookCall.STATUS_PROCESSED
+                    if processed
+                    else SystemPayWebhookCall.STATUS_IGNORED
+                )
+
+            call.processed = timezone.now()
+            call.attempts += 1
+            call.save(update_fields=["status", "error", "processed", "attempts"])
+
+    return len(calls)
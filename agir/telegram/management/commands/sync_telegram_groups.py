@@ -0,0 +1,23 @@
+from django.core.management import BaseCommand
+
+from agir.telegram.models import TelegramGroup
+from agir.telegram.tasks import update_telegram_groups
+
+
+class Command(BaseCommand):
+    help = "Schedule the synchronization of all Telegram groups with their segment"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-f",
+            "--full",
+            action="store_true",
+            default=False,
+            help="Reload the members of each chat from Telegram instead of relying on the last known state",
+        )
+
+    def handle(self, *args, full, **options):
+        for pk in TelegramGroup.objects.exclude(admin_session=None).values_list(
+            "pk", flat=True
+        ):
+            update_telegram_groups.delay(pk, full=full)
@@ -0,0 +1,77 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("people", "0073_person_created_index"),
+        ("telegram", "0004_auto_20200701_1622"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="telegramgroup",
+            name="telegram_users",
+            field=models.PositiveIntegerField(
+                blank=True,
+                default=0,
+                verbose_name="Nombre d'utilisateurices de Telegram dans le segment",
+            ),
+        ),
+        migrations.CreateModel(
+            name="TelegramGroupMember",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="date de création",
+                    ),
+                ),
+                (
+                    "modified",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="dernière modification"
+                    ),
+                ),
+                (
+                    "chat_id",
+                    models.BigIntegerField(
+                        verbose_name="Identifiant du chat sur Telegram"
+                    ),
+                ),
+                (
+                    "group",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="members",
+                        to="telegram.telegramgroup",
+                    ),
+                ),
+                (
+                    "person",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="telegram_memberships",
+                        to="people.person",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Membre d'un groupe Telegram",
+                "unique_together": {("group", "person")},
+            },
+        ),
+    ]
@@ -49,7 +49,7 @@ class TelegramGroup(TimeStampedModel, models.Model):
         on_delete=models.SET_NULL,
         verbose_name="La session Telegram admin de ce groupe.",
     )
-    telegram_users = models.PositiveSmallIntegerField(
+    telegram_users = models.PositiveIntegerField(
         "Nombre d'utilisateurices de Telegram dans le segment", blank=True, default=0
     )
     segment = models.ForeignKey(
@@ -61,3 +61,23 @@ class TelegramGroup(TimeStampedModel, models.Model):
 
     def __str__(self):
         return self.name
+
+
+class TelegramGroupMember(TimeStampedModel, models.Model):
+    """Dernier état connu de la présence d'une personne dans les chats d'un groupe
+
+    Permet de ne calculer à chaque synchronisation que la différence avec le segment,
+    sans relire la liste des membres de chaque chat sur Telegram.
+    """
+
+    group = models.ForeignKey(
+        "TelegramGroup", related_name="members", on_delete=models.CASCADE
+    )
+    person = models.ForeignKey(
+        "people.Person", related_name="telegram_memberships", on_delete=models.CASCADE
+    )
+    chat_id = models.BigIntegerField("Identifiant du chat sur Telegram")
+
+    class Meta:
+        verbose_name = "Membre d'un groupe Telegram"
+        unique_together = ("group", "person")
@@ -0,0 +1,240 @@
+"""Synchronisation incrémentale des groupes Telegram avec leur segment
+
+Le dernier état connu des membres de chaque groupe est conservé dans la table
+`TelegramGroupMember` : à chaque synchronisation, seules les personnes du segment qui ne
+sont pas encore membres sont traitées. La liste des membres des chats n'est relue sur
+Telegram que lors de la première synchronisation, ou sur demande.
+
+Les appels à l'API de Telegram sont faits hors de toute transaction : la base n'est
+modifiée qu'au fur et à mesure, par petites écritures, de façon à conserver la
+progression en cas d'interruption.
+"""
+import logging
+from time import sleep
+
+from django.db import transaction
+from django.db.models import F, Value, JSONField
+from django.db.models.expressions import CombinedExpression
+from pyrogram import ChatPermissions, InputPhoneContact
+from pyrogram.errors import PeerIdInvalid, FloodWait
+
+from agir.api.redis import get_auth_redis_client
+from agir.lib.phone_numbers import is_mobile_number
+from agir.people.models import Person
+from agir.telegram.models import TelegramGroup, TelegramGroupMember, TELEGRAM_META_KEY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GROUP_PERMISSIONS = ChatPermissions(
+    can_send_messages=False,
+    can_change_info=False,
+    can_invite_users=False,
+    can_pin_messages=False,
+)
+
+CHAT_MAX_MEMBERS = 200
+# délai entre deux ajouts de membres ou créations de chats, pour respecter les limites
+# de Telegram
+API_DELAY = 5
+
+PEER_CACHE_PREFIX = "TelegramPeer:"
+PEER_CACHE_TTL = {True: 7 * 24 * 3600, False: 24 * 3600}
+
+
+def with_flood_wait(func, *args, **kwargs):
+    """Appelle l'API de Telegram en attendant la fin d'une éventuelle limitation"""
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except FloodWait as e:
+            logger.warning(f"Limitation par Telegram, attente de {e.x} secondes")
+            sleep(e.x)
+
+
+def get_cached_peers(phone_numbers):
+    """Renvoie les résultats de résolution déjà en cache, en une seule requête Redis"""
+    if not phone_numbers:
+        return {}
+
+    values = get_auth_redis_client().mget(
+        [f"{PEER_CACHE_PREFIX}{phone}" for phone in phone_numbers]
+    )
+    return {
+        phone: value == b"1"
+        for phone, value in zip(phone_numbers, values)
+        if value is not None
+    }
+
+
+def cache_peers(results):
+    pipeline = get_auth_redis_client().pipeline(transaction=False)
+    for phone, is_user in results.items():
+        pipeline.set(
+            f"{PEER_CACHE_PREFIX}{phone}",
+            "1" if is_user else "0",
+            ex=PEER_CACHE_TTL[is_user],
+        )
+    pipeline.execute()
+
+
+def update_telegram_meta(person_ids, is_user):
+    Person.objects.filter(pk__in=person_ids).update(
+        meta=CombinedExpression(
+            F("meta"),
+            "||",
+            Value({TELEGRAM_META_KEY: is_user}, output_field=JSONField()),
+            output_field=JSONField(),
+        )
+    )
+
+
+def resolve_telegram_users(client, people):
+    """Filtre les personnes qui utilisent Telegram
+
+    Les résultats sont conservés en cache : seules les personnes inconnues du cache
+    sont ajoutées aux contacts et recherchées sur Telegram.
+
+    :param client: le client Telegram
+    :param people: une liste de tuples `(id, numéro, prénom, nom)`
+    :return: la liste des tuples correspondant aux utilisateurices de Telegram
+    """
+    results = get_cached_peers([phone for _, phone, _, _ in people])
+    unknown = [p for p in people if p[1] not in results]
+
+    if unknown:
+        with_flood_wait(
+            client.add_contacts,
+            [
+                InputPhoneContact(
+                    phone=phone, first_name=first_name, last_name=last_name
+                )
+                for _, phone, first_name, last_name in unknown
+            ],
+        )
+
+        new_results = {}
+        for _, phone, _, _ in unknown:
+            try:
+                with_flood_wait(client.resolve_peer, phone)
+                new_results[phone] = True
+            except PeerIdInvalid:
+                new_results[phone] = False
+
+        cache_peers(new_results)
+        results.update(new_results)
+
+        for is_user in (True, False):
+            update_telegram_meta(
+                [id for id, phone, _, _ in unknown if new_results[phone] is is_user],
+                is_user,
+            )
+
+    return [p for p in people if results[p[1]]]
+
+
+def load_chat_members(client, group):
+    """Reconstitue la liste des membres du groupe à partir des chats sur Telegram"""
+    chat_by_number = {
+        f"+{member.user.phone_number}": chat_id
+        for chat_id in group.telegram_ids
+        for member in client.iter_chat_members(chat_id)
+        if member.user.phone_number
+    }
+
+    people = group.segment.get_subscribers_queryset().filter(
+        contact_phone__in=list(chat_by_number)
+    )
+
+    with transaction.atomic():
+        group.members.all().delete()
+        TelegramGroupMember.objects.bulk_create(
+            [
+                TelegramGroupMember(
+                    group=group, person_id=id, chat_id=chat_by_number[str(phone)]
+                )
+                for id, phone in people.values_list("id", "contact_phone")
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def get_people_to_add(group):
+    """Calcule en SQL les personnes du segment qui ne sont pas encore membres"""
+    people = (
+        group.segment.get_subscribers_queryset()
+        .exclude(contact_phone="")
+        .exclude(telegram_memberships__group=group)
+        .values_list("id", "contact_phone", "first_name", "last_name")
+    )
+    return [
+        (id, str(phone), first_name, last_name)
+        for id, phone, first_name, last_name in people.iterator()
+        if is_mobile_number(phone)
+    ]
+
+
+def create_chat(client, group):
+    title = f"{group.name} {len(group.telegram_ids) + 1}"
+    if group.type == TelegramGroup.CHAT_TYPE_SUPERGROUP:
+        chat_id = with_flood_wait(client.create_supergroup, title=title).id
+        with_flood_wait(client.set_chat_permissions, chat_id, DEFAULT_GROUP_PERMISSIONS)
+    else:
+        chat_id = with_flood_wait(client.create_channel, title=title).id
+
+    group.telegram_ids = group.telegram_ids + [chat_id]
+    TelegramGroup.objects.filter(pk=group.pk).update(telegram_ids=group.telegram_ids)
+    sleep(API_DELAY)
+    return chat_id
+
+
+def get_empty_slots(client, chat_id):
+    return CHAT_MAX_MEMBERS - with_flood_wait(client.get_chat_members_count, chat_id)
+
+
+def sync_telegram_group(group, full=False):
+    """Ajoute aux chats du groupe les personnes du segment qui n'y sont pas encore
+
+    :param group: le `TelegramGroup` à synchroniser
+    :param full: s'il faut relire la liste des membres des chats sur Telegram plutôt
+      que de se fier au dernier état connu
+    """
+    client = group.admin_session and group.admin_session.create_client()
+    if client is None:
+        return
+
+    with client:
+        if full or not group.members.exists():
+            load_chat_members(client, group)
+
+        new_members = resolve_telegram_users(client, get_people_to_add(group))
+
+        chat_ids = iter(list(group.telegram_ids))
+        while new_members:
+            chat_id = next(chat_ids, None) or create_chat(client, group)
+            empty_slots = get_empty_slots(client, chat_id)
+
+            while new_members and empty_slots > 0:
+                batch, new_members = (
+                    new_members[:empty_slots],
+                    new_members[empty_slots:],
+                )
+                with_flood_wait(
+                    client.add_chat_members,
+                    chat_id,
+                    [phone for _, phone, _, _ in batch],
+                )
+                TelegramGroupMember.objects.bulk_create(
+                    [
+                        TelegramGroupMember(group=group, person_id=id, chat_id=chat_id)
+                        for id, _, _, _ in batch
+                    ],
+                    ignore_conflicts=True,
+                )
+                sleep(API_DELAY)
+                empty_slots = get_empty_slots(client, chat_id)
+
+    TelegramGroup.objects.filter(pk=group.pk).update(
+        telegram_users=group.segment.get_subscribers_queryset()
+        .filter(telegram_memberships__group=group)
+        .count()
+    )
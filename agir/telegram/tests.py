@@ -0,0 +1,146 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from agir.api.redis import using_separate_redis_server, get_auth_redis_client
+from agir.mailing.models import Segment
+from agir.people.models import Person
+from agir.telegram import sync
+from agir.telegram.models import (
+    TelegramGroup,
+    TelegramGroupMember,
+    TelegramSession,
+    TELEGRAM_META_KEY,
+)
+
+
+@using_separate_redis_server
+class TelegramSyncTestCase(TestCase):
+    def setUp(self):
+        self.member = Person.objects.create_insoumise(
+            "member@domain.com", contact_phone="+33600000001"
+        )
+        self.people = [
+            Person.objects.create_insoumise(
+                f"person{i}@domain.com", contact_phone=f"+3360000001{i}"
+            )
+            for i in range(3)
+        ]
+        self.landline = Person.objects.create_insoumise(
+            "landline@domain.com", contact_phone="+33142000000"
+        )
+        self.no_phone = Person.objects.create_insoumise("nophone@domain.com")
+
+        self.group = TelegramGroup.objects.create(
+            name="Groupe",
+            type=TelegramGroup.CHAT_TYPE_CHANNEL,
+            telegram_ids=[100],
+            segment=Segment.objects.create(name="Segment"),
+            admin_session=TelegramSession.objects.create(
+                phone_number="+33600000099", session_string="session"
+            ),
+        )
+        TelegramGroupMember.objects.create(
+            group=self.group, person=self.member, chat_id=100
+        )
+
+        segment_patcher = mock.patch.object(
+            Segment,
+            "get_subscribers_queryset",
+            lambda segment: Person.objects.filter(
+                pk__in=[
+                    p.pk
+                    for p in [self.member, *self.people, self.landline, self.no_phone]
+                ]
+            ).order_by("contact_phone"),
+        )
+        segment_patcher.start()
+        self.addCleanup(segment_patcher.stop)
+
+    def get_client(self, members_count):
+        client = mock.MagicMock()
+        client.__enter__.return_value = client
+
+        def add_chat_members(chat_id, phones):
+            members_count[chat_id] += len(phones)
+
+        client.get_chat_members_count.side_effect = lambda chat_id: (
+            members_count.setdefault(chat_id, 1)
+        )
+        client.add_chat_members.side_effect = add_chat_members
+        client.create_channel.return_value.id = 200
+        return client
+
+    def test_get_people_to_add(self):
+        self.assertCountEqual(
+            [id for id, _, _, _ in sync.get_people_to_add(self.group)],
+            [p.pk for p in self.people],
+        )
+
+    def test_cache_peers(self):
+        sync.cache_peers({"+33600000010": True, "+33600000011": False})
+
+        self.assertEqual(
+            sync.get_cached_peers(["+33600000010", "+33600000011", "+33600000012"]),
+            {"+33600000010": True, "+33600000011": False},
+        )
+        self.assertGreater(
+            get_auth_redis_client().ttl(f"{sync.PEER_CACHE_PREFIX}+33600000010"),
+            sync.PEER_CACHE_TTL[False],
+        )
+        self.assertEqual(sync.get_cached_peers([]), {})
+
+    def test_update_telegram_meta(self):
+        self.member.meta = {"autre": "valeur"}
+        self.member.save()
+
+        sync.update_telegram_meta([self.member.pk], True)
+
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.meta, {"autre": "valeur", TELEGRAM_META_KEY: True})
+
+    @mock.patch("agir.telegram.sync.sleep")
+    @mock.patch("agir.telegram.sync.CHAT_MAX_MEMBERS", 3)
+    def test_new_members_are_added_in_batches_of_empty_slots(self, sleep):
+        members_count = {100: 2}
+        client = self.get_client(members_count)
+
+        with mock.patch.object(TelegramSession, "create_client", return_value=client):
+            sync.sync_telegram_group(self.group)
+
+        client.add_contacts.assert_called_once()
+        self.assertEqual(
+            [c.args for c in client.add_chat_members.call_args_list],
+            [
+                (100, [str(self.people[0].contact_phone)]),
+                (200, [str(p.contact_phone) for p in self.people[1:]]),
+            ],
+        )
+        self.assertEqual(members_count, {100: 3, 200: 3})
+
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.telegram_ids, [100, 200])
+        self.assertEqual(self.group.telegram_users, 4)
+        self.assertCountEqual(
+            TelegramGroupMember.objects.filter(group=self.group).values_list(
+                "person_id", "chat_id"
+            ),
+            [
+                (self.member.pk, 100),
+                (self.people[0].pk, 100),
+                (self.people[1].pk, 200),
+                (self.people[2].pk, 200),
+            ],
+        )
+
+    @mock.patch("agir.telegram.sync.sleep")
+    def test_cached_non_users_are_not_resolved_again(self, sleep):
+        sync.cache_peers({str(p.contact_phone): False for p in self.people})
+        client = self.get_client({100: 2})
+
+        with mock.patch.object(TelegramSession, "create_client", return_value=client):
+            sync.sync_telegram_group(self.group)
+
+        client.add_contacts.assert_not_called()
+        client.resolve_peer.assert_not_called()
+        client.add_chat_members.assert_not_called()
@@ -0,0 +1,30 @@
+import requests
+from celery import shared_task
+from django.utils import timezone
+
+from agir.lib.celery import http_task
+from agir.people.models import PersonEmail
+
+BOUNCE_BATCH_SIZE = 1000
+
+
+@shared_task
+def handle_bounces(addresses):
+    """Marque comme rejetées toutes les adresses transmises par un webhook.
+
+    Les adresses sont dédupliquées sans tenir compte de la casse, puis mises à jour
+    par lots avec une seule requête UPDATE par lot, en passant par l'index unique
+    sur `upper(address)`.
+    """
+    addresses = sorted({address.strip().upper() for address in addresses if address})
+    now = timezone.now()
+
+    for i in range(0, len(addresses), BOUNCE_BATCH_SIZE):
+        PersonEmail.objects.filter_by_addresses(
+            addresses[i : i + BOUNCE_BATCH_SIZE]
+        ).filter(_bounced=False).update(_bounced=True, bounced_date=now)
+
+
+@http_task
+def confirm_ses_subscription(subscribe_url):
+    requests.get(subscribe_url).raise_for_status()
@@ -1,5 +1,7 @@
 import json
 import base64
+from unittest.mock import patch
+
 from rest_framework.test import APITestCase
 from django.utils import timezone
 from agir.people.models import Person, PersonEmail
@@ -94,3 +96,40 @@ class WebhookTestCase(APITestCase):
         self.person.refresh_from_db()
         self.assertFalse(PersonEmail.objects.get(address="primary@bounce.com").bounced)
         self.assertTrue(PersonEmail.objects.get(address="secondary@bounce.com").bounced)
+
+    def test_sendgrid_batch_is_case_insensitive_and_deduplicated(self):
+        other_person = Person.objects.create_insoumise(email="other@bounce.com")
+        response = self.client.post(
+            "/webhooks/sendgrid_bounce",
+            [
+                {"email": "PRIMARY@bounce.com", "event": "bounce"},
+                {"email": "primary@BOUNCE.com", "event": "dropped"},
+                {"email": "other@bounce.com", "event": "delivered"},
+                {"email": "unknown@bounce.com", "event": "bounce"},
+            ],
+            format="json",
+            HTTP_AUTHORIZATION="Basic "
+            + (base64.b64encode(b"fi:prout").decode("utf-8")),
+        )
+        self.assertEqual(response.status_code, 202)
+        primary = PersonEmail.objects.get(address="primary@bounce.com")
+        self.assertTrue(primary.bounced)
+        self.assertIsNotNone(primary.bounced_date)
+        self.assertFalse(other_person.primary_email.bounced)
+
+    @patch("agir.webhooks.tasks.requests")
+    def test_amazon_subscription_confirmation(self, requests):
+        response = self.client.post(
+            "/webhooks/ses_bounce",
+            json.dumps(
+                {
+                    "Type": "SubscriptionConfirmation",
+                    "SubscribeURL": "https://sns.amazonaws.com/confirm",
+                }
+            ),
+            content_type="text/plain; charset=UTF-8",
+            HTTP_AUTHORIZATION="Basic "
+            + (base64.b64encode(b"fi:prout").decode("utf-8")),
+        )
+        self.assertEqual(response.status_code, 202)
+        requests.get.assert_called_once_with("https://sns.amazonaws.com/confirm")
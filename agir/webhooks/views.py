@@ -1,7 +1,6 @@
 import json
 import logging
 
-import requests
 from django.conf import settings
 from rest_framework import exceptions
 from rest_framework.authentication import BasicAuthentication
@@ -10,7 +9,7 @@ from rest_framework.permissions import BasePermission
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from agir.people.models import PersonEmail
+from .tasks import handle_bounces, confirm_ses_subscription
 
 logger = logging.getLogger(__name__)
 
@@ -35,15 +34,11 @@ class BounceView(APIView):
     permission_classes = (IsBasicAuthenticated,)
     authentication_classes = (SendgridSesWebhookAuthentication,)
 
-    def handle_bounce(self, recipient_email):
-        try:
-            person_email = PersonEmail.objects.get_by_natural_key(recipient_email)
-        except PersonEmail.DoesNotExist:
-            pass
-        else:
-            person_email.bounced = True
-            person_email.save()
-            return
+    def handle_bounces(self, recipient_emails):
+        # le traitement est réalisé de façon asynchrone pour pouvoir répondre
+        # immédiatement, même aux webhooks contenant des milliers d'événements
+        if recipient_emails:
+            handle_bounces.delay(list(recipient_emails))
 
 
 class WrongContentTypeJSONParser(JSONParser):
@@ -56,7 +51,7 @@ class SesBounceView(BounceView):
     def post(self, request):
         response = Response({"status": "Accepted"}, 202)
         if request.data["Type"] == "SubscriptionConfirmation":
-            requests.get(request.data["SubscribeURL"])
+            confirm_ses_subscription.delay(request.data["SubscribeURL"])
             return response
         if request.data["Type"] != "Notification":
             return response
@@ -70,15 +65,18 @@ class SesBounceView(BounceView):
         if message["bounce"]["bounceType"] != "Permanent":
             return response
 
-        self.handle_bounce(message["mail"]["destination"][0])
+        self.handle_bounces([message["mail"]["destination"][0]])
 
         return response
 
 
 class SendgridBounceView(BounceView):
     def post(self, request):
-        for webhook in request.data:
-            if webhook["event"] != "bounce" and webhook["event"] != "dropped":
-                continue
-            self.handle_bounce(webhook["email"])
+        self.handle_bounces(
+            {
+                webhook["email"]
+                for webhook in request.data
+                if webhook["event"] in ("bounce", "dropped")
+            }
+        )
         return Response({"status": "Accepted"}, 202)
@@ -86,7 +86,24 @@ Description=fi-api celery worker
 
 [Service]
 WorkingDirectory=/vagrant
-ExecStart=/usr/local/bin/pipenv run celery worker --app agir.api --concurrency 2 -Q celery
+ExecStart=/usr/local/bin/pipenv run celery worker --app agir.api --concurrency 2 -Q celery,bulk,external-http,pdf
+User=vagrant
+Group=vagrant
+Restart=on-failure
+KillSignal=SIGTERM
+Type=simple
+
+[Install]
+WantedBy=vagrant.mount
+EOT
+
+sudo bash -c "cat > /etc/systemd/system/celery-realtime.service" <<EOT
+[Unit]
+Description=fi-api celery realtime worker
+
+[Service]
+WorkingDirectory=/vagrant
+ExecStart=/usr/local/bin/pipenv run celery worker --app agir.api --concurrency 2 --prefetch-multiplier 1 -Q realtime -n realtime@%%h
 User=vagrant
 Group=vagrant
 Restart=on-failure
@@ -153,6 +170,7 @@ sudo systemctl daemon-reload
 echo "## Enable all services..."
 sudo systemctl enable django
 sudo systemctl enable celery
+sudo systemctl enable celery-realtime
 sudo systemctl enable celery-nuntius
 sudo systemctl enable mailhog
 sudo systemctl enable webpack
@@ -160,6 +178,7 @@ sudo systemctl enable webpack
 echo "## Start all services..."
 sudo systemctl start django
 sudo systemctl start celery
+sudo systemctl start celery-realtime
 sudo systemctl start celery-nuntius
 sudo systemctl start mailhog
 sudo systemctl start webpack